@@ -0,0 +1,119 @@
+"""
+Synthetic siren documents of parametrized size used by the benchmarks. Every generator is deterministic so that
+results are comparable across commits.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+ROOT_URL = 'http://api.io'
+
+
+def item(i, base_url=ROOT_URL):
+    """
+    :param int i: identifier of the item
+    :param str base_url: url the hrefs are relative to
+    :return: embedded item entity with a link and an action
+    :rtype: dict
+    """
+    href = '{0}/items/{1}'.format(base_url, i)
+    return {'class': ['item'], 'rel': ['item'], 'properties': {'id': i, 'name': 'item {0}'.format(i)},
+            'links': [{'rel': ['self'], 'href': href}],
+            'actions': [{'name': 'update', 'href': href, 'method': 'PUT',
+                         'fields': [{'name': 'name', 'type': 'text'}]}]}
+
+
+def collection(size, base_url=ROOT_URL):
+    """
+    :param int size: number of sub-entities
+    :param str base_url: url the hrefs are relative to
+    :return: json of a collection whose items each have a link and an action, half of them being link style
+    :rtype: unicode
+    """
+    entities = []
+    for i in range(size):
+        if i % 2:
+            entities.append({'rel': ['item'], 'href': '{0}/items/{1}'.format(base_url, i)})
+        else:
+            entities.append(item(i, base_url))
+    return json.dumps({'class': ['collection'], 'links': [{'rel': ['self'], 'href': base_url + '/items'}],
+                       'entities': entities})
+
+
+def links(size, base_url=ROOT_URL):
+    """
+    :param int size: number of links
+    :param str base_url: url the hrefs are relative to
+    :return: json of an entity with many links
+    :rtype: unicode
+    """
+    return json.dumps({'class': ['links'], 'links': [{'rel': ['item', 'related'], 'href': '{0}/items/{1}'
+                                                      .format(base_url, i)} for i in range(size)]})
+
+
+def wide(size, base_url=ROOT_URL):
+    """
+    :param int size: number of embedded sub-entities
+    :param str base_url: url the hrefs are relative to
+    :return: json of a collection of fully embedded items
+    :rtype: unicode
+    """
+    return json.dumps({'class': ['collection'], 'links': [{'rel': ['self'], 'href': base_url + '/items'}],
+                       'entities': [item(i, base_url) for i in range(size)]})
+
+
+def deep(depth, base_url=ROOT_URL):
+    """
+    :param int depth: number of nested levels
+    :param str base_url: url the hrefs are relative to
+    :return: json of an entity whose single sub-entity is nested ``depth`` levels deep
+    :rtype: unicode
+    """
+    entity = item(depth, base_url)
+    for level in reversed(range(depth)):
+        parent = item(level, base_url)
+        parent['entities'] = [entity]
+        entity = parent
+    return json.dumps(entity)
+
+
+def action_document(actions, fields, base_url=ROOT_URL, values=False):
+    """
+    :param int actions: number of actions
+    :param int fields: number of fields per action
+    :param str base_url: url the hrefs are relative to
+    :param bool values: whether the fields have default values
+    :return: json of an entity with many actions, half of them having templated hrefs
+    :rtype: unicode
+    """
+    return json.dumps({
+        'class': ['form'], 'properties': {'id': 1}, 'links': [{'rel': ['self'], 'href': base_url + '/form'}],
+        'actions': [{'name': 'action-{0}'.format(a),
+                     'href': '{0}/form/{1}{2}'.format(base_url, a, '/{field0}' if a % 2 else ''),
+                     'method': 'POST', 'type': 'application/json',
+                     'fields': [dict({'name': 'field{0}'.format(f), 'type': 'text'},
+                                     **({'value': 'default {0}'.format(f)} if values else {})) for f in range(fields)]}
+                    for a in range(actions)]})
+
+
+def pages(count, size, base_url=ROOT_URL):
+    """
+    :param int count: number of pages
+    :param int size: number of embedded items per page
+    :param str base_url: url the hrefs are relative to
+    :return: json of each page of a paged collection by path, the first page being at /items
+    :rtype: dict[str, unicode]
+    """
+    documents = {}
+    for page in range(count):
+        path = '/items' if page == 0 else '/items?page={0}'.format(page)
+        page_links = [{'rel': ['self'], 'href': base_url + path}]
+        if page + 1 < count:
+            page_links.append({'rel': ['next'], 'href': '{0}/items?page={1}'.format(base_url, page + 1)})
+        documents[path] = json.dumps({
+            'class': ['collection'], 'links': page_links,
+            'entities': [item(page * size + i, base_url) for i in range(size)]})
+    return documents
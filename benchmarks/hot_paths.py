@@ -0,0 +1,198 @@
+"""
+Benchmarks the hot paths of the library: parsing siren documents, generating python objects, building action
+requests, binding templated strings, preparing gzip requests and traversing a paged collection served by a local
+stub server. Reports operations per second, latency percentiles and peak memory per benchmark.
+
+Usage::
+
+    python benchmarks/hot_paths.py [--quick] [--filter parse] [--output results.json] [--compare baseline.json]
+
+Save the results of one commit with ``--output`` and compare another commit against them with ``--compare``. Runs
+offline, requires Python 3.4+ (tracemalloc).
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import documents
+from stub_server import StubServer
+
+from pypermedia.client import HypermediaClient
+from pypermedia.gzip_requests import GzipRequest
+from pypermedia.metrics import percentile
+from pypermedia.session import create_session
+from pypermedia.siren import SirenBuilder, TemplatedString
+
+#: sizes of the synthetic documents
+SIZES = {
+    'default': dict(wide=1000, deep=50, actions=50, fields=20, many_fields=200, pages=10, page_size=100),
+    'quick': dict(wide=100, deep=10, actions=10, fields=5, many_fields=50, pages=3, page_size=10),
+}
+
+#: latency percentiles reported
+PERCENTS = (50, 90, 99)
+
+
+def parse(body, lazy=False):
+    builder = SirenBuilder()
+    return lambda: builder.from_api_response(body, lazy=lazy)
+
+
+def python_object(body):
+    entity = SirenBuilder().from_api_response(body)
+    return entity.as_python_object
+
+
+def action_request(body):
+    action = SirenBuilder().from_api_response(body).actions[1]
+    values = dict(('field{0}'.format(i), 'value {0}'.format(i)) for i in range(len(action.fields)))
+    return lambda: action.as_request(**values)
+
+
+def action_request_defaults(body):
+    # most fields keep their default values, as with forms of many optional fields
+    action = SirenBuilder().from_api_response(body).actions[1]
+    return lambda: action.as_request(field0='value')
+
+
+def bind(href):
+    template = TemplatedString(href)
+    values = dict((name, 'value') for name in template.unbound_variables())
+    return lambda: template.bind(**values)
+
+
+def gzip_prepare(payload):
+    return lambda: GzipRequest('POST', documents.ROOT_URL + '/items', data=payload).prepare()
+
+
+def paginate(server):
+    session = create_session()
+
+    def traverse():
+        return sum(1 for _ in HypermediaClient.paginate(server.url + '/items', session=session))
+    return traverse
+
+
+def benchmarks(sizes, server):
+    """
+    :param dict sizes: sizes of the synthetic documents, see SIZES
+    :param StubServer server: server of the paged collection
+    :return: setup of each benchmark by name, returning the function to measure
+    :rtype: list[tuple]
+    """
+    wide = documents.wide(sizes['wide'])
+    deep = documents.deep(sizes['deep'])
+    actions = documents.action_document(sizes['actions'], sizes['fields'])
+    many_fields = documents.action_document(2, sizes['many_fields'], values=True)
+    href = '/'.join(['{0}/{{var{1}}}'.format(documents.ROOT_URL, i) for i in range(sizes['fields'])])
+    payload = json.dumps(json.loads(wide)['entities'][:sizes['fields']]).encode('utf-8')
+    return [
+        ('parse.wide', lambda: parse(wide)),
+        ('parse.wide_lazy', lambda: parse(wide, lazy=True)),
+        ('parse.deep', lambda: parse(deep)),
+        ('parse.actions', lambda: parse(actions)),
+        ('python_object.wide', lambda: python_object(wide)),
+        ('python_object.actions', lambda: python_object(actions)),
+        ('as_request.actions', lambda: action_request(actions)),
+        ('as_request.many_fields', lambda: action_request_defaults(many_fields)),
+        ('templated_string.bind', lambda: bind(href)),
+        ('gzip_request.prepare', lambda: gzip_prepare(payload)),
+        ('traversal.paginate', lambda: paginate(server)),
+    ]
+
+
+def measure(function, min_time, min_rounds):
+    """
+    :param function function: the operation to measure
+    :param float min_time: minimum number of seconds spent measuring
+    :param int min_rounds: minimum number of calls measured
+    :return: operations per second, latency percentiles in seconds and peak memory of a call in bytes
+    :rtype: dict
+    """
+    function()  # warm up caches such as the generated model classes
+
+    gc.collect()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = []
+    started = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time or len(latencies) < min_rounds:
+        start = time.perf_counter()
+        function()
+        end = time.perf_counter()
+        latencies.append(end - start)
+        elapsed = end - started
+    latencies.sort()
+    return dict(ops_per_sec=len(latencies) / sum(latencies), rounds=len(latencies), peak_bytes=peak,
+                percentiles=dict((str(p), percentile(latencies, p)) for p in PERCENTS))
+
+
+def report(results, baseline=None):
+    """
+    Prints the results as a table.
+
+    :param dict results: results by benchmark name
+    :param dict baseline: earlier results by benchmark name to compare against
+    """
+    header = '{0:<24} {1:>12} {2:>10} {3:>10} {4:>10} {5:>12}'.format(
+        'benchmark', 'ops/sec', 'p50 ms', 'p90 ms', 'p99 ms', 'peak KiB')
+    if baseline:
+        header += ' {0:>9}'.format('vs base')
+    print(header)
+    for name, result in sorted(results.items()):
+        percentiles = result['percentiles']
+        line = '{0:<24} {1:>12,.1f} {2:>10.3f} {3:>10.3f} {4:>10.3f} {5:>12,.1f}'.format(
+            name, result['ops_per_sec'], percentiles['50'] * 1000, percentiles['90'] * 1000,
+            percentiles['99'] * 1000, result['peak_bytes'] / 1024)
+        if baseline and name in baseline:
+            line += ' {0:>8.2f}x'.format(result['ops_per_sec'] / baseline[name]['ops_per_sec'])
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true', help='use small documents and a short measurement time')
+    parser.add_argument('--filter', default='', help='only run the benchmarks whose name contains this')
+    parser.add_argument('--min-time', type=float, default=None, help='seconds spent measuring each benchmark')
+    parser.add_argument('--min-rounds', type=int, default=5, help='calls measured for each benchmark at least')
+    parser.add_argument('--output', help='file the results are written to as json')
+    parser.add_argument('--compare', help='json results of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    sizes = SIZES['quick' if args.quick else 'default']
+    min_time = args.min_time if args.min_time is not None else (0.2 if args.quick else 2.0)
+
+    results = {}
+    with StubServer(lambda url: documents.pages(sizes['pages'], sizes['page_size'], base_url=url)) as server:
+        for name, setup in benchmarks(sizes, server):
+            if args.filter not in name:
+                continue
+            results[name] = measure(setup(), min_time, args.min_rounds)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(python=platform.python_version(), implementation=platform.python_implementation(),
+                           sizes=sizes, results=results), f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,48 @@
+"""
+Compares the memory retained by entity graphs built with SirenBuilder and CompactSirenBuilder.
+
+Usage: python benchmarks/memory.py [number of sub-entities]
+
+Requires Python 3.4+ (tracemalloc).
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import gc
+import sys
+import tracemalloc
+
+from documents import collection, links
+from pypermedia.siren import SirenBuilder, CompactSirenBuilder
+
+
+def retained(builder, body):
+    """
+    :param SirenBuilder builder: builder constructing the graph
+    :param unicode body: siren json
+    :return: bytes retained by the constructed graph
+    :rtype: int
+    """
+    gc.collect()
+    tracemalloc.start()
+    entity = builder.from_api_response(body)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entity
+    return size
+
+
+def main(size):
+    for name, body in (('collection', collection(size)), ('links', links(size))):
+        standard = retained(SirenBuilder(), body)
+        compact = retained(CompactSirenBuilder(), body)
+        print('{0} of {1}'.format(name, size))
+        print('  SirenBuilder:        {0:>12,} bytes'.format(standard))
+        print('  CompactSirenBuilder: {0:>12,} bytes ({1:.0%} of standard)'.format(compact, compact / standard))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
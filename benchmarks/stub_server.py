@@ -0,0 +1,93 @@
+"""
+Local http server serving canned siren documents so that traversals can be benchmarked end to end without network
+access.
+
+Requires Python 3.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubServer(object):
+    """
+    Serves documents by path on 127.0.0.1, from a background thread.
+
+    Usage::
+
+        with StubServer(lambda base_url: {'/': '{"class": ["root"]}'}) as server:
+            HypermediaClient.connect(server.url + '/')
+    """
+
+    def __init__(self, documents):
+        """
+        :param function documents: called with the base url of the server, returns the json body by path
+        """
+        self._documents_factory = documents
+        self.documents = {}
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        :return: base url of the server
+        :rtype: str
+        """
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self):
+        """Starts serving on a free port."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # headers and body are separate writes, avoid delayed acks
+
+            def do_GET(self):
+                server.requests += 1
+                body = server.documents.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/vnd.siren+json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.documents = self._documents_factory(self.url)
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,660 @@
+"""
+asyncio counterparts of the hypermedia client and the siren objects. The methods generated by
+``AsyncSirenEntity.as_python_object`` are coroutines so that a single event loop can drive many traversals
+concurrently.
+
+Requests are sent through a pluggable ``AsyncTransport``. ``AiohttpTransport`` is used when aiohttp is installed,
+otherwise ``ExecutorTransport`` runs a pooled requests session in the loop's executor. ``FakeTransport`` serves canned
+responses in-process for tests.
+
+Requires Python 3.6+.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import functools
+import json
+from collections import deque
+
+import requests
+import requests.exceptions
+import six
+from requests import Request, Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from pypermedia.client import APIError, ConnectError
+from pypermedia.metrics import measure, operation, SEND
+from pypermedia.session import create_session
+from pypermedia.siren import SirenBuilder, SirenEntity, SirenAction, SirenLink, DEFAULT_BULK_CONCURRENCY, \
+    DEFAULT_EXPAND_WORKERS, DEFAULT_PREFETCH_PAGES, DEFAULT_STREAM_CHUNK_SIZE, _requestor_name
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+# ==========
+# Transports
+# ==========
+
+def _build_response(request, status_code, headers, content, reason=None):
+    """
+    Creates a requests Response from the pieces of a response received by a transport so that the rest of the library
+    can treat it like any other response.
+
+    :param requests.PreparedRequest request: request the response answers
+    :param int status_code: http status code
+    :param dict headers: response headers
+    :param bytes content: raw (decompressed) response body
+    :param str|unicode reason: http reason phrase
+    :return: the response
+    :rtype: Response
+    """
+    response = Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = content
+    response.reason = reason
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class AsyncTransport(object):
+    """Sends prepared requests without blocking the event loop."""
+
+    async def send(self, request, verify=False):
+        """
+        Sends the request.
+
+        :param requests.PreparedRequest request: request to send
+        :param bool verify: whether ssl certificate validation should occur
+        :return: response from the server
+        :rtype: Response
+        :raises: requests.exceptions.ConnectionError
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """Releases any connections held by the transport."""
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class ExecutorTransport(AsyncTransport):
+    """Sends requests with a blocking requests session run in the event loop's executor."""
+
+    def __init__(self, session=None, executor=None):
+        """
+        :param requests.Session session: session used for the requests, a pooled session is created when not provided
+        :param concurrent.futures.Executor executor: executor running the requests, the loop's default when None
+        """
+        self.session = session or create_session()
+        self.executor = executor
+
+    async def send(self, request, verify=False):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self.session.send, request, verify=verify))
+
+    async def close(self):
+        self.session.close()
+
+
+class AiohttpTransport(AsyncTransport):
+    """Sends requests with aiohttp, reusing keep-alive connections across every request."""
+
+    def __init__(self, session=None, limit=100, limit_per_host=0):
+        """
+        :param aiohttp.ClientSession session: session used for the requests, created on first use when not provided
+        :param int limit: maximum number of simultaneous connections, ignored when a session is provided
+        :param int limit_per_host: maximum number of simultaneous connections per host (0 is unlimited), ignored when a
+            session is provided
+        :raises: ImportError
+        """
+        if aiohttp is None:
+            raise ImportError('aiohttp must be installed to use the AiohttpTransport.')
+        self._session = session
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def send(self, request, verify=False):
+        method = request.method
+        if isinstance(method, six.binary_type):  # GzipRequest uses a byte-based method
+            method = method.decode('utf-8')
+        headers = dict((k, six.text_type(v)) for k, v in request.headers.items())
+        try:
+            async with self._get_session().request(method, request.url, headers=headers, data=request.body,
+                                                   ssl=None if verify else False) as resp:
+                content = await resp.read()
+        except aiohttp.ClientConnectionError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        return _build_response(request, resp.status, resp.headers, content, reason=resp.reason)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class FakeTransport(AsyncTransport):
+    """In-process transport returning registered responses, intended for tests."""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+
+    def add_response(self, url, body, method='GET', status_code=200, headers=None):
+        """
+        Registers the response returned for a method and url.
+
+        :param str|unicode url: requested url, normalized the same way requests prepares it
+        :param body: response body
+        :type body: dict or str or unicode or bytes
+        :param str|unicode method: http method
+        :param int status_code: http status code
+        :param dict headers: response headers
+        """
+        if isinstance(body, dict):
+            body = json.dumps(body)
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        headers = headers or {'Content-Type': 'application/vnd.siren+json; charset=utf-8'}
+        url = Request(method, url).prepare().url
+        self.responses[(method, url)] = (status_code, headers, body)
+
+    async def send(self, request, verify=False):
+        self.requests.append(request)
+        await asyncio.sleep(0)  # behave like real io and yield to the loop
+        method = request.method
+        if isinstance(method, six.binary_type):
+            method = method.decode('utf-8')
+        try:
+            status_code, headers, body = self.responses[(method, request.url)]
+        except KeyError:
+            raise requests.exceptions.ConnectionError('No response registered for {0} {1}'.format(method, request.url),
+                                                      request=request)
+        return _build_response(request, status_code, headers, body)
+
+
+def default_transport():
+    """
+    Creates the default transport, aiohttp based when it is installed. The caller owns the transport and closes it.
+
+    :return: transport
+    :rtype: AsyncTransport
+    """
+    if aiohttp is not None:
+        return AiohttpTransport()
+    return ExecutorTransport()
+
+
+def _transport_of(requestor, _transport=None):
+    """
+    :param requestor: action or link sending a request
+    :type requestor: AsyncSirenAction or AsyncSirenLink
+    :param AsyncTransport _transport: transport to use in place of the one assigned to the requestor
+    :return: the transport the request is sent with
+    :rtype: AsyncTransport
+    :raises: ValueError when there is none, transports hold connections and are not created per request
+    """
+    transport = _transport or requestor.transport
+    if transport is None:
+        raise ValueError('No transport to send the request of "{0}" with, construct it with a transport or pass '
+                         '_transport.'.format(requestor.href))
+    return transport
+
+
+# =============
+# Siren objects
+# =============
+
+class AsyncSirenBuilder(SirenBuilder):
+    """Constructs siren hierarchy objects whose requests are sent through an AsyncTransport."""
+
+    def __init__(self, transport=None, **kwargs):
+        """
+        :param AsyncTransport transport: transport shared by every constructed object
+        :param kwargs: SirenBuilder arguments
+        """
+        super(AsyncSirenBuilder, self).__init__(**kwargs)
+        self.transport = transport
+
+    def from_api_response(self, response, expand_depth=0, **kwargs):
+        """
+        Creates an AsyncSirenEntity and related siren object graph. Expansion requires a coroutine and is performed
+        with ``AsyncSirenEntity.expand`` instead.
+
+        :raises: MalformedSirenError
+        :raises: TypeError
+        :raises: ValueError
+        """
+        if expand_depth:
+            raise ValueError('Expand the entity with "await entity.expand()" when using asyncio.')
+        return super(AsyncSirenBuilder, self).from_api_response(response, **kwargs)
+
+    def _create_entity(self, **kwargs):
+        return AsyncSirenEntity(context=self.context, transport=self.transport, **kwargs)
+
+    def _construct_action(self, action_dict):
+        return AsyncSirenAction(context=self.context, transport=self.transport, **action_dict)
+
+    def _construct_link(self, links_dict):
+        rel = links_dict['rel']
+        href = links_dict['href']
+        return AsyncSirenLink(rel=rel, href=href, context=self.context, transport=self.transport)
+
+
+class AsyncSirenEntity(SirenEntity):
+    """SirenEntity whose python object has coroutine methods."""
+
+    def __init__(self, classnames, links, transport=None, **kwargs):
+        """
+        :param AsyncTransport transport: transport used by the generated methods
+        """
+        super(AsyncSirenEntity, self).__init__(classnames, links, **kwargs)
+        self.transport = transport
+
+    def _create_builder(self):
+        return AsyncSirenBuilder(context=self.context, transport=self.transport)
+
+    def _create_method(self, kind, index):
+        async def _model_method(obj, **kwargs):
+            entity = obj._siren_entity
+            requestor = getattr(entity, kind)[index]
+            return await _call_requestor(requestor, entity._create_builder(), **kwargs)
+        return _model_method
+
+    async def expand(self, rels=None, depth=1, max_concurrency=DEFAULT_EXPAND_WORKERS):
+        """
+        Resolves the link style sub-entities of this entity graph in place, see SirenEntity.expand.
+
+        :param rels: relationships of the sub-entities to resolve, all link style sub-entities when None
+        :type rels: list[str] or str
+        :param int depth: number of levels to resolve
+        :param int max_concurrency: number of links retrieved concurrently
+        :return: this entity
+        :rtype: AsyncSirenEntity
+        """
+        if isinstance(rels, six.string_types):
+            rels = [rels]
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def retrieve(link):
+            async with semaphore:
+                return await link.retrieve()
+
+        linked_entities = {}
+        level = [self]
+        for _ in range(depth):
+            pending = SirenEntity._find_expandable_links(level, rels)
+            hrefs = list(set(link.href for _, _, link in pending if link.href not in linked_entities))
+            links = dict((link.href, link) for _, _, link in pending)
+            results = await asyncio.gather(*[retrieve(links[href]) for href in hrefs])
+            linked_entities.update(zip(hrefs, results))
+
+            level = SirenEntity._replace_expanded_links(level, pending, linked_entities)
+            if not level:
+                break
+        return self
+
+    async def iter_pages(self, rel='next', prefetch=DEFAULT_PREFETCH_PAGES, max_pages=None):
+        """
+        Yields this entity followed by each page reached by following the first link with a relationship, see
+        SirenEntity.iter_pages. The following pages are retrieved concurrently while the current one is consumed.
+
+        :param str rel: relationship of the link to the following page
+        :param int prefetch: number of pages retrieved ahead of the page being consumed
+        :param int max_pages: maximum number of pages yielded, including this one, all when None
+        :return: asynchronous generator of the pages
+        :rtype: async_generator
+        """
+        if max_pages is not None and max_pages < 1:
+            return
+
+        page = self
+        count = 0
+        pending = deque()
+        try:
+            while page is not None:
+                count += 1
+                # each page is retrieved from the link of the one before it, once that one is retrieved
+                while len(pending) < prefetch and (max_pages is None or count + len(pending) < max_pages):
+                    previous = pending[-1] if pending else page
+                    pending.append(asyncio.ensure_future(AsyncSirenEntity._retrieve_next_page(previous, rel)))
+                yield page
+
+                if max_pages is not None and count >= max_pages:
+                    break
+                if not pending:
+                    pending.append(asyncio.ensure_future(AsyncSirenEntity._retrieve_next_page(page, rel)))
+                page = await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_paged_entities(self, rel=None, next_rel='next', prefetch=DEFAULT_PREFETCH_PAGES, max_pages=None):
+        """
+        Yields the sub-entities of this entity and of each following page, see iter_pages.
+
+        :param str rel: relationship of the sub-entities to yield, all when None
+        :param str next_rel: relationship of the link to the following page
+        :param int prefetch: number of pages retrieved ahead of the page being consumed
+        :param int max_pages: maximum number of pages read, including this one, all when None
+        :return: asynchronous generator of the sub-entities
+        :rtype: async_generator
+        """
+        async for page in self.iter_pages(rel=next_rel, prefetch=prefetch, max_pages=max_pages):
+            for entity in (page.entities if rel is None else page.get_entities(rel) or []):
+                yield entity
+
+    @staticmethod
+    async def _retrieve_next_page(previous, rel):
+        """
+        Retrieves the page following another.
+
+        :param previous: the previous page, or the task retrieving it
+        :type previous: AsyncSirenEntity or asyncio.Future
+        :param str rel: relationship of the link to the following page
+        :return: the following page, None when there is none
+        :rtype: AsyncSirenEntity
+        """
+        if isinstance(previous, asyncio.Future):
+            previous = await previous
+        links = previous.get_links(rel) if previous is not None else None
+        return await links[0].retrieve() if links else None
+
+    def _create_get_entities_fn(self):
+        """
+        Creates the ``get_entities`` method of the python object, an asynchronous generator since link style
+        sub-entities must be retrieved.
+
+        :return: asynchronous generator method taking the relationship
+        :rtype: function
+        """
+        async def get_entity(obj, rel):
+            for x in obj._siren_entity.get_entities(rel) or []:
+                if isinstance(x, AsyncSirenLink):
+                    yield await x.as_python_object()
+                else:
+                    yield x.as_python_object()
+        return get_entity
+
+
+class AsyncSirenAction(SirenAction):
+    """SirenAction whose request is sent through an AsyncTransport."""
+
+    def __init__(self, name, href, transport=None, **kwargs):
+        """
+        :param AsyncTransport transport: transport used to send the request
+        """
+        super(AsyncSirenAction, self).__init__(name, href, **kwargs)
+        self.transport = transport
+
+    async def make_request(self, _transport=None, **kwfields):
+        """
+        Performs the request.
+
+        :param AsyncTransport _transport: transport to use in place of the one assigned to this action
+        :param kwfields: additional items to add to the underlying request object
+        :return: response from the server
+        :rtype: Response
+        :raises: ValueError when the action has no transport and none is given
+        """
+        return await _send(_transport_of(self, _transport), self.as_request(**kwfields), self.verify, self.metrics,
+                           _requestor_name(self))
+
+    def make_requests(self, kwfields_list, concurrency=DEFAULT_BULK_CONCURRENCY, _session=None):
+        """
+        Not supported, the requests of an asynchronous action are sent concurrently with
+        ``asyncio.gather(*[action.make_request(**kwfields) for kwfields in kwfields_list])``.
+
+        :raises: TypeError
+        """
+        raise TypeError('make_requests is not supported by asynchronous actions, gather their make_request '
+                        'coroutines instead.')
+
+
+class AsyncSirenLink(SirenLink, AsyncSirenBuilder):
+    """SirenLink whose retrieval is sent through an AsyncTransport."""
+
+    def __init__(self, rel, href, transport=None, **kwargs):
+        """
+        :param AsyncTransport transport: transport used to retrieve the link and by the entities it retrieves
+        """
+        super(AsyncSirenLink, self).__init__(rel, href, transport=transport, **kwargs)
+
+    async def as_python_object(self, _transport=None, **kwargs):
+        """
+        Retrieves the link and constructs the corresponding python object.
+
+        :param AsyncTransport _transport: transport to use in place of the one assigned to this link
+        :return: python object for the retrieved entity, None when it was not found
+        :rtype: object
+        """
+        siren_entity = await self.retrieve(_transport=_transport)
+        if not siren_entity:
+            return None
+        return siren_entity.as_python_object()
+
+    async def retrieve(self, _transport=None):
+        """
+        Retrieves the entity this link refers to.
+
+        :param AsyncTransport _transport: transport to use in place of the one assigned to this link
+        :return: The AsyncSirenEntity constructed from the response, None when it was not found
+        :rtype: AsyncSirenEntity
+        """
+        resp = await self.make_request(_transport=_transport)
+        return self.from_api_response(resp)
+
+    async def make_request(self, _transport=None, **kwfields):
+        """
+        Performs retrieval of the link from the external server.
+
+        :param AsyncTransport _transport: transport to use in place of the one assigned to this link
+        :return: response from the server
+        :rtype: Response
+        :raises: ValueError when the link has no transport and none is given
+        """
+        return await _send(_transport_of(self, _transport), self.as_request(**kwfields), self.verify, self.metrics,
+                           _requestor_name(self))
+
+    def stream(self, _session=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Not supported, transports read whole responses: retrieve the link with ``await link.retrieve()``.
+
+        :raises: TypeError
+        """
+        raise TypeError('stream is not supported by asynchronous links, use "await link.retrieve()" instead.')
+
+
+async def _send(transport, prepared_request, verify, metrics=None, name=None):
+    """
+    Sends a request through a transport, measuring it. The request is named explicitly since the operation naming of
+    Metrics is per thread and coroutines of many traversals share the thread of the loop.
+
+    :param AsyncTransport transport: transport to send the request with
+    :param requests.PreparedRequest prepared_request: the request
+    :param bool verify: whether to verify ssl certificates from the server
+    :param pypermedia.metrics.Metrics metrics: receives the measurement of the request
+    :param str name: relationship or action name of the request
+    :return: response from the server
+    :rtype: Response
+    """
+    with measure(metrics, SEND, name, method=prepared_request.method, url=prepared_request.url) as measurement:
+        response = await transport.send(prepared_request, verify=verify)
+        if measurement.active:
+            measurement.update(status_code=response.status_code, bytes_in=len(response.content))
+    return response
+
+
+def _create_async_action_fn(action, siren_builder):
+    """
+    Creates a coroutine method which will make a web request, retrieve content, and create a python object.
+
+    :param action: action object capable of making a request
+    :type action: AsyncSirenAction or AsyncSirenLink
+    :param AsyncSirenBuilder siren_builder: builder for the response, its transport is used to send the request
+    :return: coroutine function requesting data from the server and creating a new proxy object
+    :rtype: function
+    """
+    async def _action_fn(self, **kwargs):
+        return await _call_requestor(action, siren_builder, **kwargs)
+
+    return _action_fn
+
+
+async def _call_requestor(action, siren_builder, **kwargs):
+    """
+    Makes the request of an action or link, retrieves content, and creates a python object.
+
+    :param action: action object capable of making a request
+    :type action: AsyncSirenAction or AsyncSirenLink
+    :param AsyncSirenBuilder siren_builder: builder for the response, its transport is used to send the request
+    :param kwargs: fields of the request
+    :return: proxy object for the response, None when it was not found
+    :rtype: object
+    """
+    response = await action.make_request(_transport=siren_builder.transport, **kwargs)
+    # no awaiting from here on, the processing of the response can be named per thread
+    with operation(siren_builder.metrics, _requestor_name(action)):
+        siren = siren_builder.from_api_response(response=response)
+        if not siren:
+            return None
+        return siren.as_python_object()
+
+
+# ======
+# Client
+# ======
+
+class AsyncHypermediaClient(object):
+    """asyncio counterpart of HypermediaClient, the generated python objects have coroutine methods."""
+
+    @staticmethod
+    async def connect(root_url, transport=None, verify=False, request_factory=Request, builder=AsyncSirenBuilder,
+                      codec=None, metrics=None):
+        """
+        Creates a client by connecting to the root api url.
+
+        :param str|unicode root_url: root api url
+        :param AsyncTransport transport: transport shared by the client and every object generated from it, the
+            default transport is created when this is not provided and is then closed with ``close``, see also
+            ``open``
+        :param bool verify: whether to verify ssl certificates from the server or ignore them
+        :param type|function request_factory: constructor of request objects
+        :param builder: The object to build the hypermedia object
+        :param codec: json codec, or its name, shared by every generated object, see pypermedia.codec.get_codec
+        :type codec: pypermedia.codec.JsonCodec or str
+        :param pypermedia.metrics.Metrics metrics: receives the measurements of the requests
+        :return: client generated from root url
+        :rtype: object
+        :raises: ConnectError
+        """
+        request = request_factory('GET', root_url)
+        p = request.prepare()
+        return await AsyncHypermediaClient.send_and_construct(p, transport=transport, verify=verify,
+                                                              request_factory=request_factory, builder=builder,
+                                                              codec=codec, metrics=metrics)
+
+    @staticmethod
+    async def send_and_construct(prepared_request, transport=None, verify=False, request_factory=Request,
+                                 builder=AsyncSirenBuilder, codec=None, metrics=None):
+        """
+        Sends a PreparedRequest and constructs the python object from the response.
+
+        :param requests.PreparedRequest prepared_request: The initial request to send.
+        :param AsyncTransport transport: transport shared by every object generated from the response, the default
+            transport is created when this is not provided and is then closed with ``close``
+        :param bool verify: whether to verify ssl certificates from the server or ignore them
+        :param type|function request_factory: constructor of request object
+        :param builder: The object to build the hypermedia object
+        :param codec: json codec, or its name, shared by every generated object
+        :type codec: pypermedia.codec.JsonCodec or str
+        :param pypermedia.metrics.Metrics metrics: receives the measurements of the requests
+        :return: The object representing the siren object returned from the server.
+        :rtype: object
+        :raises: ConnectError
+        :raises: APIError when the resource is not found
+        :raises: UnexpectedStatusError
+        :raises: MalformedSirenError
+        """
+        owned = transport is None
+        transport = transport or default_transport()
+        try:
+            try:
+                response = await _send(transport, prepared_request, verify, metrics)
+            except requests.exceptions.ConnectionError as e:
+                raise ConnectError('Unable to connect to server! Unable to construct client. root_url="{0}" '
+                                   'verify="{1}"'.format(prepared_request.url, verify), e)
+
+            builder = builder(verify=verify, request_factory=request_factory, transport=transport, codec=codec,
+                              metrics=metrics)
+            obj = builder.from_api_response(response)
+            if obj is None:
+                raise APIError('Resource not found! Unable to construct client. root_url="{0}"'.format(
+                    prepared_request.url))
+            return obj.as_python_object()
+        except BaseException:
+            if owned:  # nothing else holds the transport
+                await transport.close()
+            raise
+
+    @staticmethod
+    async def close(client):
+        """
+        Closes the transport shared by a client and the objects generated from it.
+
+        :param object client: python object returned by connect or send_and_construct
+        """
+        await client._siren_entity.transport.close()
+
+    @staticmethod
+    def open(root_url, **kwargs):
+        """
+        Connects to the root api url for the duration of an ``async with`` block, closing the transport when the block
+        exits::
+
+            async with AsyncHypermediaClient.open('http://myapp.io/api/') as client:
+                item = await client.add_item(quantity=2)
+
+        :param str|unicode root_url: root api url
+        :param kwargs: connect arguments, the transport is closed on exit even when it is given
+        :return: asynchronous context manager of the client
+        :rtype: _ClientConnection
+        """
+        return _ClientConnection(root_url, kwargs)
+
+
+class _ClientConnection(object):
+    """Asynchronous context manager of a client, see AsyncHypermediaClient.open."""
+
+    def __init__(self, root_url, kwargs):
+        self.root_url = root_url
+        self.kwargs = kwargs
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = await AsyncHypermediaClient.connect(self.root_url, **self.kwargs)
+        return self.client
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await AsyncHypermediaClient.close(self.client)
@@ -0,0 +1,372 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from email.utils import parsedate_tz, mktime_tz
+
+import copy
+import threading
+import time
+
+from pypermedia.metrics import CACHE
+from pypermedia.policy import request_method
+
+#: methods which do not change the resource, the others invalidate the responses cached for their url when they succeed
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'TRACE'])
+
+
+def _parse_cache_control(value):
+    """
+    Parses a Cache-Control header into its directives.
+
+    :param str|unicode value: header value
+    :return: directive names (lower-cased) mapped to their value, None for directives without a value
+    :rtype: dict[str, str]
+    """
+    directives = {}
+    for directive in (value or '').split(','):
+        name, _, arg = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def expiration_time(headers, now, default_ttl=0):
+    """
+    Determines until when a response is fresh from its Cache-Control and Expires headers.
+
+    :param dict headers: headers of the response
+    :param float now: current time in seconds since the epoch
+    :param float default_ttl: freshness lifetime of responses which state none
+    :return: expiration time, None when the response must not be stored
+    :rtype: float
+    """
+    directives = _parse_cache_control(headers.get('Cache-Control'))
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return now
+
+    max_age = directives.get('max-age')
+    if max_age is not None:
+        try:
+            return now + max(int(max_age), 0)
+        except ValueError:
+            return now
+
+    expires = headers.get('Expires')
+    if expires:
+        parsed = parsedate_tz(expires)
+        return mktime_tz(parsed) if parsed else now
+    return now + default_ttl
+
+
+def vary_headers(headers):
+    """
+    :param dict headers: headers of a response
+    :return: sorted lower-cased names of the request headers the response varies on, per its Vary header, None when
+        it varies on anything (``Vary: *``) and cannot be reused
+    :rtype: tuple
+    """
+    names = set(name.strip().lower() for name in (headers.get('Vary') or '').split(','))
+    names.discard('')
+    return None if '*' in names else tuple(sorted(names))
+
+
+def request_variant(names, request_headers):
+    """
+    :param tuple names: names of the request headers a response varies on, see vary_headers
+    :param dict request_headers: headers of a request, case insensitive
+    :return: values of the named headers in the request, None for the missing ones
+    :rtype: tuple
+    """
+    return tuple(request_headers.get(name) for name in names)
+
+
+def invalidates(prepared_request, response):
+    """
+    :param requests.PreparedRequest prepared_request: a request
+    :param requests.Response response: its response
+    :return: whether the request changed the resource at its url: an unsafe method which did not fail (RFC 7234 4.4)
+    :rtype: bool
+    """
+    return request_method(prepared_request) not in SAFE_METHODS and response.status_code < 400
+
+
+class CacheEntry(object):
+    """A parsed entity graph cached with the validators of the response it was constructed from."""
+
+    def __init__(self, url, entity, size, etag=None, last_modified=None, expires=0):
+        """
+        :param str|unicode url: url of the cached resource
+        :param SirenEntity entity: entity constructed from the response
+        :param int size: size of the response body in bytes
+        :param str|unicode etag: ETag validator of the response
+        :param str|unicode last_modified: Last-Modified validator of the response
+        :param float expires: time until which the entity may be used without revalidation
+        """
+        self.url = url
+        self.entity = entity
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+    def conditional_headers(self):
+        """
+        Headers revalidating the entry with the server.
+
+        :return: If-None-Match/If-Modified-Since headers for the validators of this entry
+        :rtype: dict[str, str]
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """
+    In-memory cache of the siren entities constructed from GET responses, keyed by method, url and the values of the
+    request headers named by the Vary header of the response. Fresh entries (per max-age or Expires) are returned
+    without contacting the server, stale entries with validators are revalidated with a conditional request and reused
+    without re-parsing when the server answers 304 Not Modified. The entries of a url are removed once a request with
+    an unsafe method (POST, PUT, DELETE...) to it succeeds. Entries are evicted least recently used first when either
+    the entry count or the total response bytes exceed their bounds.
+
+    The cached entities are never handed out: fetch returns a copy (see BaseSirenEntity.__deepcopy__) which the caller
+    may modify, expand for instance. Copying costs about as much as constructing the entity, except for entities
+    constructed lazily whose copies share the deferred siren dictionaries. The entities of the entries returned by
+    get are shared and must not be modified.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, clock=time.time):
+        """
+        :param int max_entries: maximum number of cached entities
+        :param int max_bytes: maximum total size of the responses the cached entities were constructed from
+        :param function clock: returns the current time in seconds since the epoch
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.total_bytes = 0
+        self.stats = dict(hits=0, misses=0, revalidations=0, evictions=0)
+        self._entries = OrderedDict()  # by (method, url, variant), least recently used first
+        self._vary = {}  # names of the request headers the responses of each url vary on, see vary_headers
+        self._keys = {}  # keys of the entries of each url
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return url in self._keys
+
+    def get(self, url, request_headers=None, method='GET'):
+        """
+        Gets the entry for a request, marking it as the most recently used.
+
+        :param str|unicode url: url of the resource
+        :param dict request_headers: headers of the request, they select the entry when the responses of the url
+            vary on them
+        :param str method: method of the request
+        :return: cached entry, None when the request is not cached
+        :rtype: CacheEntry
+        """
+        with self._lock:
+            names = self._vary.get(url)
+            if names is None:
+                return None
+            key = (method, url, request_variant(names, request_headers or {}))
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+
+    def is_fresh(self, entry):
+        """
+        :param CacheEntry entry: cached entry
+        :return: True if the entry may be used without revalidation
+        :rtype: bool
+        """
+        return entry.expires > self.clock()
+
+    def invalidate(self, url):
+        """
+        Removes the entries for a url.
+
+        :param str|unicode url: url of the resource
+        """
+        with self._lock:
+            for key in list(self._keys.get(url, ())):
+                self._remove(key)
+
+    def _remove(self, key):
+        """
+        Removes an entry.
+
+        :param tuple key: key of the entry
+        :return: the removed entry, None when there was none
+        :rtype: CacheEntry
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            self._forget(key)
+        return entry
+
+    def _forget(self, key):
+        """
+        Drops the key of a removed entry from the keys of its url.
+
+        :param tuple key: key of the entry
+        """
+        url = key[1]
+        keys = self._keys[url]
+        keys.discard(key)
+        if not keys:
+            del self._keys[url]
+            del self._vary[url]
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+            self._keys.clear()
+            self.total_bytes = 0
+
+    def _expires(self, response):
+        """
+        Determines until when the entity constructed from a response is fresh.
+
+        :param requests.Response response: the response
+        :return: expiration time, None when the response must not be stored
+        :rtype: float
+        """
+        return expiration_time(response.headers, self.clock())
+
+    def store(self, url, response, entity, request_headers=None, method='GET'):
+        """
+        Stores the entity constructed from a response. Responses which are neither fresh nor carry validators are
+        not stored since they could never be reused, nor are responses which vary on anything.
+
+        :param str|unicode url: url of the resource
+        :param requests.Response response: response the entity was constructed from
+        :param SirenEntity entity: the entity
+        :param dict request_headers: headers of the request, the entry is kept for the values of those the response
+            varies on
+        :param str method: method of the request
+        :return: the new entry, None if the response was not stored
+        :rtype: CacheEntry
+        """
+        expires = self._expires(response)
+        names = vary_headers(response.headers)
+        if expires is None or names is None:
+            self.invalidate(url)
+            return None
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if expires <= self.clock() and not etag and not last_modified:
+            self.invalidate(url)
+            return None
+
+        size = len(response.content or b'')
+        if size > self.max_bytes:
+            self.invalidate(url)
+            return None
+
+        entry = CacheEntry(url, entity, size, etag=etag, last_modified=last_modified, expires=expires)
+        key = (method, url, request_variant(names, request_headers or {}))
+        with self._lock:
+            if self._vary.get(url, names) != names:  # the other entries are keyed by headers it no longer varies on
+                self.invalidate(url)
+            else:
+                self._remove(key)
+            self._entries[key] = entry
+            self._vary[url] = names
+            self._keys.setdefault(url, set()).add(key)
+            self.total_bytes += size
+            self._evict()
+        return entry
+
+    def _evict(self):
+        """Evicts least recently used entries until the bounds are respected."""
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            self._forget(key)
+            self.stats['evictions'] += 1
+
+    def _refresh(self, entry, response):
+        """
+        Updates an entry from a 304 Not Modified response.
+
+        :param CacheEntry entry: revalidated entry
+        :param requests.Response response: the 304 response
+        """
+        expires = self._expires(response)
+        with self._lock:
+            entry.expires = expires if expires is not None else self.clock()
+            entry.etag = response.headers.get('ETag', entry.etag)
+            entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+
+    def _count(self, name):
+        """
+        :param str name: statistic incremented
+        """
+        with self._lock:
+            self.stats[name] += 1
+
+    def fetch(self, prepared_request, send, build, metrics=None):
+        """
+        Obtains the entity for a request, from the cache when possible.
+
+        :param requests.PreparedRequest prepared_request: the request, only GET requests are cached and successful
+            requests with unsafe methods invalidate the entries of their url
+        :param function send: sends a prepared request and returns the response
+        :param function build: constructs the entity from a response
+        :param pypermedia.metrics.Metrics metrics: receives the result of the lookup
+        :return: the entity, a copy of the cached one
+        :rtype: SirenEntity
+        """
+        url = prepared_request.url
+        if request_method(prepared_request) != 'GET':
+            response = send(prepared_request)
+            if invalidates(prepared_request, response):
+                self.invalidate(url)
+            return build(response)
+
+        request_headers = prepared_request.headers
+        entry = self.get(url, request_headers)
+        if entry is not None:
+            if self.is_fresh(entry):
+                self._count('hits')
+                if metrics is not None:
+                    metrics.emit(CACHE, url=url, result='hit')
+                return copy.deepcopy(entry.entity)
+            prepared_request = prepared_request.copy()
+            prepared_request.headers.update(entry.conditional_headers())
+
+        response = send(prepared_request)
+        if entry is not None and response.status_code == 304:
+            self._count('revalidations')
+            if metrics is not None:
+                metrics.emit(CACHE, url=url, result='revalidated')
+            self._refresh(entry, response)
+            return copy.deepcopy(entry.entity)
+
+        self._count('misses')
+        if metrics is not None:
+            metrics.emit(CACHE, url=url, result='miss')
+        entity = build(response)
+        if entity is not None:
+            self.store(url, response, copy.deepcopy(entity), request_headers)
+        else:
+            self.invalidate(url)
+        return entity
@@ -3,10 +3,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import functools
+
 import requests
 import requests.exceptions
 
-from pypermedia.siren import SirenBuilder
+from pypermedia.policy import start_deadline
+from pypermedia.session import create_session, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from pypermedia.siren import SirenBuilder, DEFAULT_PREFETCH_PAGES, within_deadline
 
 
 class HypermediaClient(object):
@@ -16,15 +20,24 @@ class HypermediaClient(object):
     """
 
     @staticmethod
-    def connect(root_url, session=None, verify=False, request_factory=requests.Request, builder=SirenBuilder):
+    def connect(root_url, session=None, verify=False, request_factory=requests.Request, builder=SirenBuilder,
+                **settings):
         """
         Creates a client by connecting to the root api url. Pointing to other urls is possible so long as their
         responses correspond to standard siren-json.
 
         :param str|unicode root_url: root api url
+        :param requests.Session session: session shared by the client and every object generated from it, a pooled
+            session is created when this is not provided
         :param bool verify: whether to verify ssl certificates from the server or ignore them (should be false for
             local dev)
         :param type|function request_factory: constructor of request objects
+        :param builder: The object to build the hypermedia object
+        :param settings: ``pool_connections`` and ``pool_maxsize`` of the pooled session, and the other request
+            settings of the client and every object generated from it: ``cache`` (a pypermedia.disk_cache.DiskCache
+            keeps the responses across restarts), ``codec``, ``metrics``, ``policy``, ``deadline`` (seconds available
+            to the connection and to each call or traversal of the generated objects, or a started Deadline shared by
+            all of them), ``coalescer`` and ``scheduler``, see pypermedia.siren.RequestContext
         :return: codex client generated from root url
         :rtype: object
         """
@@ -34,37 +47,128 @@ class HypermediaClient(object):
         request = request_factory('GET', root_url)
         p = request.prepare()
         return HypermediaClient.send_and_construct(p, session=session, verify=verify,
-                                                   request_factory=request_factory, builder=builder)
+                                                   request_factory=request_factory, builder=builder, **settings)
 
     @staticmethod
     def send_and_construct(prepared_request, session=None, verify=False, request_factory=requests.Request,
-                           builder=SirenBuilder):
+                           builder=SirenBuilder, **settings):
         """
         Takes a PreparedRequest object and sends it and then constructs the SirenObject from the response.
 
         :param requests.PreparedRequest prepared_request: The initial request to send.
-        :param requests.Session session : Existing session to use for requests.
+        :param requests.Session session : Existing session to use for requests. It is shared by every object
+            generated from the response.
         :param bool verify: whether to verify ssl certificates from the server or ignore them (should be false for
             local dev)
         :param type|function request_factory: constructor of request object
         :param builder:  The object to build the hypermedia object
+        :param settings: size of the pooled session and other request settings, see connect, the initial request is
+            answered from the ``cache`` when possible
         :return: The object representing the siren object returned from the server.
         :rtype: object
         :raises: ConnectError
+        :raises: APIError when the resource is not found
+        """
+        siren_builder = HypermediaClient._create_builder(builder, session=session, verify=verify,
+                                                         request_factory=request_factory, **settings)
+        obj = HypermediaClient._send_and_build(prepared_request, siren_builder, settings.get('cache'))
+        if obj is None:
+            raise APIError('Resource not found! Unable to construct client. root_url="{0}"'.format(
+                prepared_request.url))
+        return obj.as_python_object()
+
+    @staticmethod
+    def paginate(url, rel=None, next_rel='next', prefetch=DEFAULT_PREFETCH_PAGES, max_pages=None, session=None,
+                 verify=False, request_factory=requests.Request, builder=SirenBuilder, **settings):
+        """
+        Yields the sub-entities of a paged collection as python objects, following the link to the next page until
+        there is none. The following pages are retrieved in the background while the current one is consumed, see
+        SirenEntity.iter_pages.
+
+        :param str|unicode url: url of the first page
+        :param str rel: relationship of the sub-entities to yield, all when None
+        :param str next_rel: relationship of the link to the next page
+        :param int prefetch: number of pages retrieved ahead of the page being consumed
+        :param int max_pages: maximum number of pages read, all when None
+        :param requests.Session session: session shared by every request and generated object, a pooled session is
+            created when this is not provided
+        :param bool verify: whether to verify ssl certificates from the server
+        :param type|function request_factory: constructor of request objects
+        :param builder: The object to build the hypermedia object
+        :param settings: size of the pooled session and other request settings, see connect, the ``deadline`` is
+            available to the whole pagination
+        :return: generator of the sub-entities as python objects
+        :rtype: generator
+        :raises: ConnectError
+        """
+        prepared_request = request_factory('GET', url).prepare()
+        siren_builder = HypermediaClient._create_builder(builder, session=session, verify=verify,
+                                                         request_factory=request_factory, **settings)
+        started = start_deadline(settings.get('deadline'))
+        send_and_build = within_deadline(started, HypermediaClient._send_and_build)  # the pagination shares it
+        first_page = send_and_build(prepared_request, siren_builder, settings.get('cache'))
+        if first_page is None:
+            return
+        for entity in first_page.iter_paged_entities(rel=rel, next_rel=next_rel, prefetch=prefetch,
+                                                     max_pages=max_pages, _deadline=started):
+            yield entity.as_python_object()
+
+    @staticmethod
+    def _create_builder(builder, session=None, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                        pool_maxsize=DEFAULT_POOL_MAXSIZE, **settings):
+        """
+        Creates the builder of the initial response, holding the request settings shared by every generated object.
+
+        :param builder: class of the builder
+        :param requests.Session session: session shared by every request, a pooled session is created when this is
+            not provided
+        :param int pool_connections: maximum number of hosts for which connection pools are kept, ignored when a
+            session is provided
+        :param int pool_maxsize: maximum number of connections kept per host, ignored when a session is provided
+        :param settings: the other request settings, see pypermedia.siren.RequestContext
+        :return: the builder
+        :rtype: pypermedia.siren.SirenBuilder
+        """
+        session = session or create_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        return builder(session=session, **settings)
+
+    @staticmethod
+    def _send_and_build(prepared_request, builder, cache=None):
+        """
+        Sends the initial request and constructs the SirenEntity from the response, see send_and_construct.
+
+        :param requests.PreparedRequest prepared_request: The initial request to send.
+        :param pypermedia.siren.SirenBuilder builder: builder of the response, holding the request settings
+        :param pypermedia.cache.ResponseCache cache: cache answering the initial request when possible
+        :return: the siren entity, None when it was not found
+        :rtype: pypermedia.siren.SirenEntity
+        :raises: ConnectError
         """
-        session = session or requests.Session()
+        send = functools.partial(HypermediaClient._send, builder=builder)
+        if cache is None:
+            return builder.from_api_response(send(prepared_request))
+        return cache.fetch(prepared_request, send, builder.from_api_response, metrics=builder.metrics)
+
+    @staticmethod
+    def _send(prepared_request, builder):
+        """
+        Sends the initial request with the settings of the builder, see RequestMixin.send.
+
+        :param requests.PreparedRequest prepared_request: The initial request to send.
+        :param pypermedia.siren.SirenBuilder builder: builder of the response, holding the request settings
+        :return: response from the server
+        :rtype: requests.Response
+        :raises: ConnectError
+        """
+        verify = builder.verify
         try:
-            response = session.send(prepared_request, verify=verify)
+            return builder.send(prepared_request)
         except requests.exceptions.ConnectionError as e:
             # this is the deprecated form but it preserves the stack trace so let's use this
             # it's not like this is going to be a big problem when porting to Python 3 in the future
             raise ConnectError('Unable to connect to server! Unable to construct client. root_url="{0}" verify="{1}"'.
                                format(prepared_request.url, verify), e)
 
-        builder = builder(verify=verify, request_factory=request_factory)
-        obj = builder.from_api_response(response)
-        return obj.as_python_object()
-
 
 class ConnectError(Exception):
     """Standard error for an inability to connect to the server."""
@@ -0,0 +1,102 @@
+"""
+Coalescing of concurrent identical GET requests made by the links and actions generated by the client. Requests are
+identical when they have the same url and the same headers, header names compared case-insensitively: the first one
+is sent while the others wait for it and receive a copy of the entity constructed from its response, or its error.
+Nothing is kept once the request completes, a ``ResponseCache`` keeps entities across requests.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import copy
+import threading
+
+from pypermedia.policy import request_method
+
+
+class _Call(object):
+    """An in-flight request and, once it completes, its outcome."""
+
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class RequestCoalescer(object):
+    """
+    Coalesces concurrent identical GET requests: while a request for a url and set of headers is in flight, threads
+    retrieving the same url and headers wait for it and receive copies of the entity it constructs instead of sending
+    their own request, so that each caller may modify its entity. Requests are only shared while in flight, completed
+    results are not kept (see ResponseCache for that).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = dict(requests=0, coalesced=0)
+
+    @staticmethod
+    def key(prepared_request):
+        """
+        :param requests.PreparedRequest prepared_request: the request
+        :return: key identifying identical requests
+        :rtype: tuple
+        """
+        headers = tuple(sorted((name.lower(), value) for name, value in prepared_request.headers.items()))
+        return prepared_request.url, headers
+
+    def fetch(self, prepared_request, retrieve):
+        """
+        Obtains the entity for a request, sharing the in-flight retrieval of an identical request when there is one.
+        Requests other than GET are always retrieved.
+
+        :param requests.PreparedRequest prepared_request: the request
+        :param function retrieve: sends the request and constructs its entity
+        :return: the entity, each coalesced caller receives its own copy
+        :rtype: SirenEntity
+        """
+        if request_method(prepared_request) != 'GET':
+            return retrieve()
+
+        key = self.key(prepared_request)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['requests'] += 1
+            else:
+                call.followers += 1
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = retrieve()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        if call.followers:  # they copy the result meanwhile, it is not modified
+            return copy.deepcopy(call.result)
+        return call.result
+
+    def in_flight(self):
+        """
+        :return: number of requests in flight
+        :rtype: int
+        """
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,133 @@
+"""
+Pluggable json codecs used to parse responses and serialize siren objects and payload fields. The standard library
+codec is the default; orjson and ujson are faster but only used when selected by name, since they change the output
+(no whitespace, unescaped non-ascii characters) and do not handle integers beyond 64 bits.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import sys
+
+import six
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JsonCodec(object):
+    """Interface of the json codecs."""
+
+    #: name used to select the codec with get_codec
+    name = None
+
+    def loads(self, data):
+        """
+        Decodes json.
+
+        :param data: utf-8 encoded json, or json text
+        :type data: bytes or unicode
+        :return: the decoded value
+        :raises: ValueError
+        """
+        raise NotImplementedError
+
+    def dumps(self, value):
+        """
+        Encodes a value as json.
+
+        :param value: value to encode
+        :return: the json text
+        :rtype: unicode
+        :raises: TypeError
+        """
+        raise NotImplementedError
+
+
+class StdlibJsonCodec(JsonCodec):
+    """Codec backed by the standard library json module."""
+
+    name = 'json'
+
+    def loads(self, data):
+        if isinstance(data, six.binary_type) and sys.version_info < (3, 6):  # pragma: no cover
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def dumps(self, value):
+        return json.dumps(value)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson, its output has no whitespace between tokens."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('orjson is not installed.')
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, value):
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+
+class UjsonCodec(JsonCodec):
+    """Codec backed by ujson."""
+
+    name = 'ujson'
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError('ujson is not installed.')
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+    def dumps(self, value):
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+
+#: codecs by name
+CODECS = (('orjson', OrjsonCodec), ('ujson', UjsonCodec), ('json', StdlibJsonCodec))
+
+#: name of the codec used when none is selected
+DEFAULT_CODEC = 'json'
+
+_codecs = {}
+
+
+def get_codec(codec=None):
+    """
+    Gets a json codec.
+
+    :param codec: a codec, the name of one (see CODECS) or None for the standard library codec
+    :type codec: JsonCodec or str
+    :return: the codec, codecs selected by name are shared
+    :rtype: JsonCodec
+    :raises: ValueError when the named codec is unknown
+    :raises: ImportError when the named codec is not installed
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec is None:
+        codec = DEFAULT_CODEC
+
+    instance = _codecs.get(codec)
+    if instance is None:
+        codec_class = dict(CODECS).get(codec)
+        if codec_class is None:
+            raise ValueError('Unknown json codec "{0}", expected one of {1}.'.format(codec, [n for n, _ in CODECS]))
+        instance = _codecs[codec] = codec_class()
+    return instance
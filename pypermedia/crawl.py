@@ -0,0 +1,175 @@
+"""
+Breadth-first traversal of a hypermedia graph. A ``Crawler`` retrieves a root url and follows the links and link
+style sub-entities of every entity it retrieves, each url once, on a bounded thread pool with a limit on the requests
+in flight to any one host. Entities are yielded as their responses arrive.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import itertools
+import six
+from six.moves.urllib.parse import urldefrag, urljoin
+
+from pypermedia.schedule import url_host
+from pypermedia.session import create_session
+from pypermedia.siren import BaseSirenEntity, BaseSirenLink, SirenBuilder, traversal_deadline, within_deadline
+
+#: number of urls retrieved concurrently
+DEFAULT_CRAWL_WORKERS = 8
+
+#: number of urls of the same host retrieved concurrently
+DEFAULT_MAX_PER_HOST = 4
+
+#: relationship of the link to the root url, under which its request is measured
+ROOT_REL = 'root'
+
+
+class Crawler(object):
+    """
+    Walks a hypermedia graph breadth-first from a root url. The links of each retrieved entity, of its embedded
+    sub-entities and its link style sub-entities are followed when one of their relationships is allowed by ``rels``
+    and none is denied by ``exclude_rels``. Relative hrefs are resolved against the url of the entity they belong to
+    and fragments dropped, each resulting url is retrieved once, at most ``max_workers`` at a time and at most
+    ``max_per_host`` at a time from any one host; urls further than ``max_depth`` links from the root, and any once
+    ``max_pages`` urls were retrieved, are not followed.
+
+    Requests are made with the settings of the builder (session, cache, policy, coalescer, metrics), its session
+    should pool at least ``max_workers`` connections. Its deadline bounds each crawl as a whole.
+    """
+
+    def __init__(self, builder=None, rels=None, exclude_rels=None, max_depth=None, max_pages=None,
+                 max_workers=DEFAULT_CRAWL_WORKERS, max_per_host=DEFAULT_MAX_PER_HOST, ignore_errors=False):
+        """
+        :param SirenBuilder builder: builder of the retrieved entities, one with a session pooling max_workers
+            connections when None
+        :param rels: relationships of the links to follow, all when None
+        :type rels: list[str] or str
+        :param exclude_rels: relationships of the links never to follow
+        :type exclude_rels: list[str] or str
+        :param int max_depth: number of links followed from the root, unbounded when None
+        :param int max_pages: maximum number of urls retrieved, including the root, unbounded when None
+        :param int max_workers: number of urls retrieved concurrently
+        :param int max_per_host: number of urls of the same host retrieved concurrently
+        :param bool ignore_errors: whether urls which fail to be retrieved are recorded in ``errors`` and skipped
+            rather than raised
+        """
+        if isinstance(rels, six.string_types):
+            rels = [rels]
+        if isinstance(exclude_rels, six.string_types):
+            exclude_rels = [exclude_rels]
+        if builder is None:
+            builder = SirenBuilder(session=create_session(pool_maxsize=max_workers))
+        self.builder = builder
+        self.rels = frozenset(rels) if rels is not None else None
+        self.exclude_rels = frozenset(exclude_rels or ())
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.ignore_errors = ignore_errors
+        self.visited = set()
+        self.errors = {}
+
+    def follows(self, link):
+        """
+        :param BaseSirenLink link: link of a retrieved entity
+        :return: whether the link is followed per the relationship filters
+        :rtype: bool
+        """
+        rel = link.rel or ()
+        if self.exclude_rels and any(r in self.exclude_rels for r in rel):
+            return False
+        return self.rels is None or any(r in self.rels for r in rel)
+
+    def _links(self, entity):
+        """
+        :param BaseSirenEntity entity: retrieved entity
+        :return: generator of the links of the entity and of its embedded sub-entities, link style sub-entities
+            included
+        :rtype: generator
+        """
+        pending = [entity]
+        while pending:
+            current = pending.pop()
+            for link in current.links:
+                yield link
+            for sub_entity in current.entities:
+                if isinstance(sub_entity, BaseSirenLink):
+                    yield sub_entity
+                elif isinstance(sub_entity, BaseSirenEntity):
+                    pending.append(sub_entity)
+
+    def crawl(self, url):
+        """
+        Yields the entities of the graph reachable from a url as they are retrieved. Urls which are not found are
+        skipped. Closing the generator cancels the urls not yet sent. ``visited`` and ``errors`` hold the urls of
+        the latest crawl.
+
+        :param str|unicode url: root url
+        :return: generator of the retrieved entities
+        :rtype: generator
+        :raises: the error of the first url which fails to be retrieved unless ignore_errors
+        """
+        self.visited = set()
+        self.errors = {}
+        frontier = defaultdict(deque)  # urls to retrieve by host, each with its position in breadth-first order
+        in_flight = {}
+        per_host = defaultdict(int)
+        counter = itertools.count()
+        sent = 0
+        retrieve = within_deadline(traversal_deadline(self.builder), lambda link: link.retrieve())
+
+        def enqueue(link, depth, base=None):
+            href = urldefrag(urljoin(base, link.href) if base else link.href)[0]
+            if href not in self.visited:
+                self.visited.add(href)
+                if href != link.href:
+                    link = self.builder.construct_link(list(link.rel), href)
+                frontier[url_host(href)].append((next(counter), link, depth))
+
+        def next_host():
+            # the host of the oldest url whose host has room
+            hosts = [h for h, queue in frontier.items() if queue and per_host[h] < self.max_per_host]
+            return min(hosts, key=lambda h: frontier[h][0][0]) if hosts else None
+
+        enqueue(self.builder.construct_link([ROOT_REL], url), 0)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while True:
+                    while len(in_flight) < self.max_workers and (self.max_pages is None or sent < self.max_pages):
+                        host = next_host()
+                        if host is None:
+                            break
+                        _, link, depth = frontier[host].popleft()
+                        per_host[host] += 1
+                        sent += 1
+                        in_flight[executor.submit(retrieve, link)] = (link, depth, host)
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        link, depth, host = in_flight.pop(future)
+                        per_host[host] -= 1
+                        try:
+                            entity = future.result()
+                        except Exception as e:
+                            if not self.ignore_errors:
+                                raise
+                            self.errors[link.href] = e
+                            continue
+                        if entity is None:
+                            continue
+                        if self.max_depth is None or depth < self.max_depth:
+                            for child in self._links(entity):
+                                if self.follows(child):
+                                    enqueue(child, depth + 1, base=link.href)
+                        yield entity
+            finally:
+                for future in in_flight:
+                    future.cancel()
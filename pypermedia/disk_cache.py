@@ -0,0 +1,502 @@
+"""
+Persistent cache of GET responses kept in a single file, so that a restarted process traverses unchanged resources
+without contacting the server. The file is an append-only log of records (stored responses, refreshed validators and
+removals) read through a memory map; it is compacted, evicting the least recently used responses, whenever it grows
+past its size bound. One process writes the file while any number of worker processes open it with ``readonly=True``
+and pick up the records written since they last looked.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from pypermedia.cache import CacheEntry, expiration_time, invalidates, request_variant, vary_headers
+from pypermedia.gzip_requests import decompress_chunks, undecoded_encodings
+from pypermedia.metrics import CACHE
+
+#: marks the start of every record of the file
+MAGIC = b'PSC1'
+
+#: record header: magic, length of the json metadata and length of the body
+_HEADER = struct.Struct(str('>4sII'))
+
+#: kinds of records
+_STORE = 'store'
+_REFRESH = 'refresh'
+_DELETE = 'delete'
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+class DiskCacheEntry(CacheEntry):
+    """A response stored in the cache file, its body is read from the file when the entry is used."""
+
+    def __init__(self, url, offset, size, status_code, headers, stored, etag=None, last_modified=None, expires=0,
+                 variant=None):
+        """
+        :param str|unicode url: url of the cached resource
+        :param int offset: position of the body in the cache file
+        :param int size: size of the body in bytes
+        :param int status_code: status code of the response
+        :param dict headers: headers of the response
+        :param float stored: time at which the response was stored
+        :param str|unicode etag: ETag validator of the response
+        :param str|unicode last_modified: Last-Modified validator of the response
+        :param float expires: time until which the response may be used without revalidation
+        :param dict variant: values of the request headers the response varies on, by lower-cased name
+        """
+        super(DiskCacheEntry, self).__init__(url, None, size, etag=etag, last_modified=last_modified, expires=expires)
+        self.offset = offset
+        self.status_code = status_code
+        self.headers = headers
+        self.stored = stored
+        self.variant = variant or {}
+
+    def matches(self, request_headers):
+        """
+        :param dict request_headers: headers of a request, case insensitive
+        :return: whether the request has the header values the response varies on
+        :rtype: bool
+        """
+        return all(request_headers.get(name) == value for name, value in self.variant.items())
+
+
+class DiskCache(object):
+    """
+    Cache of GET responses persisted in a single file, a drop-in for ResponseCache (``cache=DiskCache(path)``).
+    Responses are stored with their validators: fresh ones (per max-age or Expires, ``default_ttl`` when they state
+    neither) are answered from the file, stale ones are revalidated with a conditional request and answered from the
+    file when the server replies 304 Not Modified. Unlike ResponseCache the entities are constructed again from the
+    stored body on every hit. Responses older than ``max_age`` are never used. The file is compacted, least recently
+    used responses first, once it exceeds ``max_bytes``. A single response is kept per url: one which varies on request
+    headers (Vary) only answers requests with the same values for them, and is replaced by the response to a request
+    with other values. The response of a url is removed once a request with an unsafe method to it succeeds.
+
+    A cache opened with ``readonly=True`` never writes the file, it is meant for worker processes sharing the file of
+    a writing process: records appended or a compaction made by the writer are picked up on the next lookup.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, default_ttl=0, max_age=None, readonly=False,
+                 clock=time.time):
+        """
+        :param str|unicode path: path of the cache file, created when missing unless readonly
+        :param int max_bytes: size of the file past which it is compacted
+        :param float default_ttl: freshness lifetime, in seconds, of responses which state none
+        :param float max_age: age in seconds past which stored responses are discarded, None to keep them until
+            evicted
+        :param bool readonly: open the file for reading only, the cache is then neither stored to nor compacted
+        :param function clock: returns the current time in seconds since the epoch
+        :raises: IOError when a readonly cache file does not exist
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.max_age = max_age
+        self.readonly = readonly
+        self.clock = clock
+        self.total_bytes = 0
+        self.stats = dict(hits=0, misses=0, revalidations=0, evictions=0)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._file = None
+        self._map = None
+        self._inode = None
+        self._scanned = 0
+        with self._lock:
+            self._open()
+            if not readonly:
+                with self._file_lock():
+                    self._truncate_partial_record()
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return len(self._entries)
+
+    def __contains__(self, url):
+        with self._lock:
+            self._sync()
+            return url in self._entries
+
+    def close(self):
+        """Closes the cache file."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # file handling
+
+    def _open(self):
+        """(Re)opens the cache file and reads its records."""
+        self.close()
+        self._file = open(self.path, 'rb' if self.readonly else 'a+b')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._entries.clear()
+        self.total_bytes = 0
+        self._scanned = 0
+        self._scan()
+
+    def _sync(self):
+        """Reads the records appended since the last scan, reopens the file when it was replaced by a compaction."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return  # a compaction is replacing the file, keep the current one
+        if stat.st_ino != self._inode:
+            self._open()
+        elif stat.st_size > self._scanned:
+            self._scan()
+
+    def _scan(self):
+        """Applies the complete records following the last scanned one."""
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+
+        offset = self._scanned
+        while offset + _HEADER.size <= size:
+            magic, meta_size, body_size = _HEADER.unpack_from(self._map, offset)
+            if magic != MAGIC:
+                break
+            body_offset = offset + _HEADER.size + meta_size
+            end = body_offset + body_size
+            if end > size:
+                break  # being written
+            meta = json.loads(self._map[offset + _HEADER.size:body_offset].decode('utf-8'))
+            self._apply(meta, body_offset, body_size)
+            offset = end
+        self._scanned = offset
+
+    def _apply(self, meta, offset, size):
+        """
+        Applies a record to the entries.
+
+        :param dict meta: metadata of the record
+        :param int offset: position of its body in the file
+        :param int size: size of its body
+        """
+        url = meta['url']
+        if meta['kind'] == _STORE:
+            self._remove(url)
+            self._entries[url] = DiskCacheEntry(url, offset, size, meta['status_code'], meta['headers'],
+                                                meta['stored'], etag=meta.get('etag'),
+                                                last_modified=meta.get('last_modified'), expires=meta['expires'],
+                                                variant=meta.get('variant'))
+            self.total_bytes += size
+        elif meta['kind'] == _REFRESH:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry.expires = meta['expires']
+                entry.etag = meta.get('etag')
+                entry.last_modified = meta.get('last_modified')
+        elif meta['kind'] == _DELETE:
+            self._remove(url)
+
+    def _remove(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    @contextmanager
+    def _file_lock(self):
+        """Holds the exclusive lock of the cache file between writing processes, on the current file."""
+        while True:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == self._inode:
+                    self._sync()
+                    yield
+                    return
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._open()  # compacted by another process while waiting for the lock
+
+    def _truncate_partial_record(self):
+        """Removes a record left incomplete by a process which stopped while writing it."""
+        if os.fstat(self._file.fileno()).st_size > self._scanned:
+            self._file.truncate(self._scanned)
+            self._scan()
+
+    def _append(self, meta, body=b''):
+        """
+        Writes a record to the end of the file.
+
+        :param dict meta: metadata of the record
+        :param bytes body: body of the record
+        """
+        data = json.dumps(meta).encode('utf-8')
+        with self._file_lock():
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(_HEADER.pack(MAGIC, len(data), len(body)) + data + body)
+            self._file.flush()
+            self._scan()
+
+    def _compact(self):
+        """Rewrites the file with the most recently used responses, evicting the others."""
+        target = self.max_bytes * 3 // 4
+        with self._file_lock():
+            now = self.clock()
+            kept = []
+            total = 0
+            for entry in reversed(list(self._entries.values())):
+                if self._expired(entry, now):
+                    continue
+                meta = json.dumps(self._metadata(_STORE, entry)).encode('utf-8')
+                size = _HEADER.size + len(meta) + entry.size
+                if kept and total + size > target:
+                    break
+                kept.append((meta, entry))
+                total += size
+
+            self.stats['evictions'] += len(self._entries) - len(kept)
+            self._rewrite(reversed(kept))
+        self._open()
+
+    def _rewrite(self, records):
+        """
+        Replaces the file with one holding the given records. The file is replaced rather than truncated since other
+        processes may be reading it through a memory map.
+
+        :param records: metadata and entry of the records to keep, least recently used first
+        """
+        temporary = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        with open(temporary, 'wb') as f:
+            for meta, entry in records:
+                f.write(_HEADER.pack(MAGIC, len(meta), entry.size) + meta + self._body(entry))
+        _replace(temporary, self.path)
+
+    @staticmethod
+    def _metadata(kind, entry):
+        return dict(kind=kind, url=entry.url, status_code=entry.status_code, headers=entry.headers,
+                    stored=entry.stored, etag=entry.etag, last_modified=entry.last_modified, expires=entry.expires,
+                    variant=entry.variant)
+
+    def _body(self, entry):
+        """
+        :param DiskCacheEntry entry: an entry of the current file
+        :return: the body of the entry, copied from the memory map
+        :rtype: bytes
+        """
+        return self._map[entry.offset:entry.offset + entry.size] if entry.size else b''
+
+    # cache interface
+
+    def _expired(self, entry, now):
+        return self.max_age is not None and entry.stored + self.max_age <= now
+
+    def lookup(self, url, request_headers=None):
+        """
+        Gets the entry for a url along with its body, marking it as the most recently used.
+
+        :param str|unicode url: url of the resource
+        :param dict request_headers: headers of the request, the entry only answers requests with the values of
+            those its response varies on
+        :return: cached entry and body, (None, None) when the url is not cached
+        :rtype: (DiskCacheEntry, bytes)
+        """
+        with self._lock:
+            self._sync()
+            entry = self._entries.pop(url, None)
+            if entry is None:
+                return None, None
+            self._entries[url] = entry
+            if self._expired(entry, self.clock()) or not entry.matches(request_headers or {}):
+                return None, None
+            return entry, self._body(entry)
+
+    def get(self, url, request_headers=None):
+        """
+        :param str|unicode url: url of the resource
+        :param dict request_headers: headers of the request, see lookup
+        :return: cached entry, None when the url is not cached
+        :rtype: DiskCacheEntry
+        """
+        return self.lookup(url, request_headers)[0]
+
+    def is_fresh(self, entry):
+        """
+        :param CacheEntry entry: cached entry
+        :return: True if the entry may be used without revalidation
+        :rtype: bool
+        """
+        return entry.expires > self.clock()
+
+    def invalidate(self, url):
+        """
+        Removes the entry for a url.
+
+        :param str|unicode url: url of the resource
+        """
+        with self._lock:
+            if self.readonly:
+                self._remove(url)
+            elif url in self._entries:
+                self._append(dict(kind=_DELETE, url=url))
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            if self.readonly:
+                self._entries.clear()
+                self.total_bytes = 0
+                return
+            with self._file_lock():
+                self._rewrite([])
+            self._open()
+
+    def store(self, url, response, request_headers=None):
+        """
+        Stores a response. Responses which are neither fresh nor carry validators are not stored since they could
+        never be reused, nor are responses which vary on anything or are larger than max_bytes.
+
+        :param str|unicode url: url of the resource
+        :param requests.Response response: the response
+        :param dict request_headers: headers of the request, the values of those the response varies on are stored
+        :return: the new entry, None if the response was not stored
+        :rtype: DiskCacheEntry
+        """
+        if self.readonly:
+            return None
+        now = self.clock()
+        expires = expiration_time(response.headers, now, self.default_ttl)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        names = vary_headers(response.headers)
+        if expires is None or names is None or (expires <= now and not etag and not last_modified):
+            self.invalidate(url)
+            return None
+
+        body = response.content or b''
+        encodings = undecoded_encodings(response)
+        if encodings:
+            body = b''.join(decompress_chunks([body], encodings))
+        if len(body) > self.max_bytes:
+            self.invalidate(url)
+            return None
+
+        headers = dict((name, value) for name, value in response.headers.items()
+                       if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding'))
+        with self._lock:
+            self._append(dict(kind=_STORE, url=url, status_code=response.status_code, headers=headers, stored=now,
+                              etag=etag, last_modified=last_modified, expires=expires,
+                              variant=dict(zip(names, request_variant(names, request_headers or {})))), body)
+            if os.fstat(self._file.fileno()).st_size > self.max_bytes:
+                self._compact()
+            return self._entries.get(url)
+
+    def _refresh(self, entry, response):
+        """
+        Updates an entry from a 304 Not Modified response.
+
+        :param DiskCacheEntry entry: revalidated entry
+        :param requests.Response response: the 304 response
+        """
+        now = self.clock()
+        expires = expiration_time(response.headers, now, self.default_ttl)
+        with self._lock:
+            entry.expires = expires if expires is not None else now
+            entry.etag = response.headers.get('ETag', entry.etag)
+            entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+            if not self.readonly and self._entries.get(entry.url) is entry:
+                self._append(dict(kind=_REFRESH, url=entry.url, etag=entry.etag, last_modified=entry.last_modified,
+                                  expires=entry.expires))
+
+    @staticmethod
+    def _response(entry, body, prepared_request):
+        """
+        :param DiskCacheEntry entry: cached entry
+        :param bytes body: its body
+        :param requests.PreparedRequest prepared_request: request answered by the entry
+        :return: the stored response
+        :rtype: requests.Response
+        """
+        response = Response()
+        response.status_code = entry.status_code
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = body
+        response._content_consumed = True
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry.url
+        response.request = prepared_request
+        return response
+
+    def _count(self, name):
+        """
+        :param str name: statistic incremented
+        """
+        with self._lock:
+            self.stats[name] += 1
+
+    def fetch(self, prepared_request, send, build, metrics=None):
+        """
+        Obtains the entity for a request, from the stored response when possible.
+
+        :param requests.PreparedRequest prepared_request: the request, only GET requests are cached and successful
+            requests with unsafe methods remove the response of their url
+        :param function send: sends a prepared request and returns the response
+        :param function build: constructs the entity from a response
+        :param pypermedia.metrics.Metrics metrics: receives the result of the lookup
+        :return: the entity
+        :rtype: SirenEntity
+        """
+        url = prepared_request.url
+        if prepared_request.method not in ('GET', b'GET'):
+            response = send(prepared_request)
+            if invalidates(prepared_request, response):
+                self.invalidate(url)
+            return build(response)
+
+        request_headers = prepared_request.headers
+        entry, body = self.lookup(url, request_headers)
+        if entry is not None:
+            if self.is_fresh(entry):
+                self._count('hits')
+                if metrics is not None:
+                    metrics.emit(CACHE, url=url, result='hit')
+                return build(self._response(entry, body, prepared_request))
+            prepared_request = prepared_request.copy()
+            prepared_request.headers.update(entry.conditional_headers())
+
+        response = send(prepared_request)
+        if entry is not None and response.status_code == 304:
+            self._count('revalidations')
+            if metrics is not None:
+                metrics.emit(CACHE, url=url, result='revalidated')
+            self._refresh(entry, response)
+            return build(self._response(entry, body, prepared_request))
+
+        self._count('misses')
+        if metrics is not None:
+            metrics.emit(CACHE, url=url, result='miss')
+        entity = build(response)
+        if entity is not None:
+            self.store(url, response, request_headers)
+        else:
+            self.invalidate(url)
+        return entity
@@ -4,22 +4,306 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from requests import Request
+from requests.utils import super_len
+from urllib3.response import HTTPResponse
+import six
 import zlib
 
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+#: bodies smaller than this number of bytes are sent uncompressed by default
+DEFAULT_MIN_SIZE = 1024
+
+#: number of bytes of a streamed body read and compressed at a time
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+#: methods whose body is compressed
+COMPRESSED_METHODS = frozenset(['POST', 'PUT', 'PATCH'])
+
+
+class _ZlibCompressor(object):
+    """gzip and deflate compression."""
+
+    def __init__(self, level, wbits):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor(object):
+    """brotli compression, requires the brotli package."""
+
+    def __init__(self, level):
+        if brotli is None:
+            raise ImportError('brotli is not installed.')
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+class _ZstdCompressor(object):
+    """zstd compression, requires the zstandard package."""
+
+    def __init__(self, level):
+        if zstandard is None:
+            raise ImportError('zstandard is not installed.')
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+#: compressor constructors taking the level and the default level, by Content-Encoding
+COMPRESSORS = {
+    'gzip': (lambda level: _ZlibCompressor(level, zlib.MAX_WBITS | 16), 6),
+    'deflate': (lambda level: _ZlibCompressor(level, zlib.MAX_WBITS), 6),
+    'br': (_BrotliCompressor, 4),
+    'zstd': (_ZstdCompressor, 3),
+}
+
+
+class _ZlibDecompressor(object):
+    """gzip and deflate decompression, deflate bodies may be zlib wrapped or raw."""
+
+    def __init__(self, wbits):
+        self._wbits = wbits
+        self._decompressor = None
+
+    def decompress(self, data):
+        if self._decompressor is None:
+            if self._wbits == zlib.MAX_WBITS and data and (six.indexbytes(data, 0) & 0x0f) != zlib.DEFLATED:
+                self._wbits = -zlib.MAX_WBITS  # raw deflate, without the zlib header
+            self._decompressor = zlib.decompressobj(self._wbits)
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return self._decompressor.flush() if self._decompressor is not None else b''
+
+
+class _BrotliDecompressor(object):
+    """brotli decompression, requires the brotli package."""
+
+    def __init__(self):
+        if brotli is None:
+            raise ImportError('brotli is not installed.')
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self._decompressor.process(data)
+
+    def flush(self):
+        return b''
+
+
+class _ZstdDecompressor(object):
+    """zstd decompression, requires the zstandard package."""
+
+    def __init__(self):
+        if zstandard is None:
+            raise ImportError('zstandard is not installed.')
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return b''
+
+
+#: decompressor constructors by Content-Encoding
+DECOMPRESSORS = {
+    'gzip': lambda: _ZlibDecompressor(zlib.MAX_WBITS | 16),
+    'x-gzip': lambda: _ZlibDecompressor(zlib.MAX_WBITS | 16),
+    'deflate': lambda: _ZlibDecompressor(zlib.MAX_WBITS),
+    'br': _BrotliDecompressor,
+    'zstd': _ZstdDecompressor,
+}
+
+
+def available_encodings():
+    """
+    :return: the content encodings whose compressor is installed
+    :rtype: list[str]
+    """
+    encodings = ['gzip', 'deflate']
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+
+
+def accept_encoding():
+    """
+    :return: Accept-Encoding header listing every content encoding which can be decoded, either by urllib3 while the
+        response is read or afterwards by the siren read path (see undecoded_encodings)
+    :rtype: str
+    """
+    encodings = [e for e in HTTPResponse.CONTENT_DECODERS if e != 'x-gzip']
+    encodings.extend(e for e in available_encodings() if e not in encodings)
+    return ', '.join(encodings)
+
+
+def undecoded_encodings(response):
+    """
+    Content encodings of a response left for the client to decode, those urllib3 does not decode.
+
+    :param requests.Response response: the response
+    :return: the encodings in the order they were applied, empty when the body is decoded
+    :rtype: list[str]
+    """
+    if not isinstance(response.raw, HTTPResponse):
+        return []  # responses built from decoded bodies, such as those of the asyncio transports
+    decoders = response.raw.CONTENT_DECODERS
+    encodings = [e.strip().lower() for e in response.headers.get('Content-Encoding', '').split(',')]
+    encodings = [e for e in encodings if e and e != 'identity']
+    if any(e in decoders for e in encodings):
+        return []
+    return encodings
+
+
+def create_decompressor(encoding):
+    """
+    :param str encoding: content encoding, see DECOMPRESSORS
+    :return: decompressor with ``decompress(data)`` and ``flush()`` methods
+    :raises: ValueError when the encoding is unknown
+    :raises: ImportError when its decompressor is not installed
+    """
+    if encoding not in DECOMPRESSORS:
+        raise ValueError('Unknown content encoding "{0}", expected one of {1}.'.format(encoding, sorted(DECOMPRESSORS)))
+    return DECOMPRESSORS[encoding]()
+
+
+def decompress_chunks(chunks, encodings):
+    """
+    Decompresses a stream of chunks as they arrive.
+
+    :param chunks: iterable of compressed byte chunks
+    :param list[str] encodings: content encodings in the order they were applied
+    :return: generator of the decompressed chunks
+    :rtype: generator
+    """
+    for encoding in reversed(encodings):
+        chunks = _decompress_chunks(chunks, create_decompressor(encoding))
+    return chunks
+
+
+def _decompress_chunks(chunks, decompressor):
+    for chunk in chunks:
+        decompressed = decompressor.decompress(chunk)
+        if decompressed:
+            yield decompressed
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def create_compressor(encoding='gzip', level=None):
+    """
+    :param str encoding: content encoding, see COMPRESSORS
+    :param int level: compression level, the default of the encoding when None
+    :return: compressor with ``compress(data)`` and ``flush()`` methods
+    :raises: ValueError when the encoding is unknown
+    :raises: ImportError when its compressor is not installed
+    """
+    if encoding not in COMPRESSORS:
+        raise ValueError('Unknown content encoding "{0}", expected one of {1}.'.format(encoding, sorted(COMPRESSORS)))
+    factory, default_level = COMPRESSORS[encoding]
+    return factory(default_level if level is None else level)
+
+
+def _read_chunks(body, chunk_size):
+    """
+    :param body: file-like object or iterable of chunks
+    :param int chunk_size: number of bytes read at a time from files
+    :return: generator of the byte chunks of the body
+    :rtype: generator
+    """
+    if hasattr(body, 'read'):
+        for chunk in iter(lambda: body.read(chunk_size), b''):
+            if not chunk:
+                break
+            yield chunk.encode('utf-8') if isinstance(chunk, six.text_type) else chunk
+    else:
+        for chunk in body:
+            yield chunk.encode('utf-8') if isinstance(chunk, six.text_type) else chunk
+
+
+def compress_chunks(chunks, compressor):
+    """
+    Compresses a stream of chunks without holding more than a chunk in memory.
+
+    :param chunks: iterable of byte chunks
+    :param compressor: compressor, see create_compressor
+    :return: generator of the compressed chunks
+    :rtype: generator
+    """
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    tail = compressor.flush()
+    if tail:
+        yield tail
+
 
 class GzipRequest(Request):
-    """Encapsulates gzip requests. Currently just adds a header but may be extended in the future to do more."""
+    """
+    Request accepting compressed responses and compressing its payload. Bodies of at least ``min_size`` bytes are
+    compressed with the ``content_encoding`` (gzip, deflate, br or zstd) at ``level``, files and generators are
+    compressed as they are sent so that large uploads are never held in memory. Configure it per client with
+    ``request_factory=functools.partial(GzipRequest, level=1)``.
+    """
+
+    #: content encoding of the payload
+    content_encoding = 'gzip'
+
+    #: compression level, the default of the encoding when None
+    level = None
+
+    #: bodies smaller than this number of bytes are sent uncompressed
+    min_size = DEFAULT_MIN_SIZE
+
+    #: number of bytes of a streamed body read and compressed at a time
+    chunk_size = DEFAULT_CHUNK_SIZE
+
     def __init__(self, *args, **kwargs):
         """
         Constructor.
 
         :param args: all of request's normal positional arguments, unused by GzipRequest itself
+        :param str content_encoding: content encoding of the payload, see COMPRESSORS
+        :param int level: compression level
+        :param int min_size: bodies smaller than this number of bytes are sent uncompressed
+        :param int chunk_size: number of bytes of a streamed body read and compressed at a time
         :param kwargs: all of request's normal kwargs, unused by GzipRequest itself
         """
+        for name in ('content_encoding', 'level', 'min_size', 'chunk_size'):
+            if name in kwargs:
+                setattr(self, name, kwargs.pop(name))
         super(GzipRequest, self).__init__(*args, **kwargs)  # delegate up
 
-        # add acceptance of gzip
-        self.headers['Accept-Encoding'] = 'gzip, deflate'  # always specify this since the requests library implicitly understands compression we might as well always request/use it
+        # add acceptance of every encoding that can be decoded
+        self.headers['Accept-Encoding'] = accept_encoding()  # always specify this since the requests library implicitly understands compression we might as well always request/use it
 
     def prepare(self):
         """
@@ -30,24 +314,43 @@ class GzipRequest(Request):
         p = super(GzipRequest, self).prepare()  # delegate up
 
         # modify payload when present
-        if p.body and (self.method == 'POST' or self.method == 'PUT' or self.method == 'PATCH'):
-            p.method = p.method.encode('utf-8')  # we have a byte-based message-body so we need bytes in the message header, harmless if already encoded properly
+        if p.body and self.method.upper() in COMPRESSED_METHODS:
+            streamed = not isinstance(p.body, (six.binary_type, six.text_type))
+            if not streamed:
+                size = len(p.body)
+            elif hasattr(p.body, 'read'):
+                size = super_len(p.body) or None  # pipes and sockets have no known size
+            else:
+                size = None  # generators are always compressed
+            if size is not None and size < self.min_size:
+                return p
+
+            if six.PY2:
+                p.method = p.method.encode('utf-8')  # we have a byte-based message-body so we need bytes in the message header, harmless if already encoded properly
 
             # modify body and update headers
-            p.body = self.gzip_compress(p.body)
-            p.headers['Content-Length'] = len(p.body)
-            p.headers['Content-Encoding'] = 'gzip'
+            compressor = create_compressor(self.content_encoding, self.level)
+            if streamed:
+                p.body = compress_chunks(_read_chunks(p.body, self.chunk_size), compressor)
+                p.headers.pop('Content-Length', None)
+                p.headers['Transfer-Encoding'] = 'chunked'
+            else:
+                body = p.body.encode('utf-8') if isinstance(p.body, six.text_type) else p.body
+                p.body = b''.join(compress_chunks([body], compressor))
+                p.headers['Content-Length'] = str(len(p.body))
+            p.headers['Content-Encoding'] = self.content_encoding
         return p
 
     @staticmethod
-    def gzip_compress(data):
+    def gzip_compress(data, level=9):
         """
         Gzip compresses the data.
 
         :param data: data to compress
-        :type data: str
+        :type data: bytes
+        :param int level: compression level
         :return: compressed data
-        :rtype: str
+        :rtype: bytes
         """
-        gzip_compress = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS | 16)
-        return gzip_compress.compress(data) + gzip_compress.flush()
+        compressor = create_compressor('gzip', level)
+        return compressor.compress(data) + compressor.flush()
@@ -0,0 +1,352 @@
+"""
+Instrumentation of the requests made by the client and the objects it generates. A ``Metrics`` instance given to
+``HypermediaClient.connect`` is shared by every generated object and emits a ``MetricEvent`` to its listeners for
+each phase of a traversal: sending the request, decoding the json, constructing the entity graph and creating the
+python object, along with cache lookups, retries and scheduler waits. ``MetricsAggregator`` is a listener keeping
+percentiles per phase and link relationship or action name.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+
+#: the http request, attributes: method, url, status_code, bytes_out, bytes_in (not for streamed responses)
+SEND = 'send'
+
+#: decompressing a response body which the transport left encoded (e.g. zstd, br), attributes: content_encoding,
+#: bytes_wire (compressed), bytes_in (decompressed)
+DECOMPRESS = 'decompress'
+
+#: decoding the json of a response, attributes: bytes_in, charset (None when utf-8 is assumed)
+DECODE = 'decode'
+
+#: constructing the entity graph from the decoded json
+CONSTRUCT = 'construct'
+
+#: creating the python object of an entity, named by the primary classname of the entity
+PYTHON_OBJECT = 'python_object'
+
+#: a response cache lookup, no duration, attributes: url, result ('hit', 'miss' or 'revalidated')
+CACHE = 'cache'
+
+#: a request about to be retried, no duration, attributes: url, attempt, reason
+RETRY = 'retry'
+
+#: waiting for the scheduler to admit a request, the duration is the wait, attributes: url
+QUEUE = 'queue'
+
+#: default number of durations kept per phase and name by MetricsAggregator
+DEFAULT_MAX_SAMPLES = 10000
+
+log = logging.getLogger(__name__)
+
+
+class MetricEvent(object):
+    """A measurement of one phase."""
+
+    __slots__ = ('phase', 'name', 'duration', 'error', 'attributes')
+
+    def __init__(self, phase, name=None, duration=None, error=None, attributes=None):
+        """
+        :param str phase: the phase, see the module constants
+        :param str name: relationship of the link or name of the action the phase belongs to, None for requests made
+            outside of them such as the root request
+        :param float duration: seconds spent in the phase, None for events without a duration
+        :param Exception error: error raised by the phase
+        :param dict attributes: phase specific values
+        """
+        self.phase = phase
+        self.name = name
+        self.duration = duration
+        self.error = error
+        self.attributes = attributes or {}
+
+    def __repr__(self):
+        return 'MetricEvent({0!r}, name={1!r}, duration={2!r}, attributes={3!r})'.format(
+            self.phase, self.name, self.duration, self.attributes)
+
+
+class Metrics(object):
+    """Dispatches metric events to listeners, a listener is called with each MetricEvent."""
+
+    def __init__(self, listeners=None, clock=time.time):
+        """
+        :param list[function] listeners: initial listeners
+        :param function clock: returns the current time in seconds
+        """
+        self.listeners = list(listeners or [])
+        self.clock = clock
+        self._local = threading.local()
+
+    def add_listener(self, listener):
+        """
+        :param function listener: called with each MetricEvent
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        :param function listener: a listener previously added
+        """
+        self.listeners.remove(listener)
+
+    @property
+    def current_name(self):
+        """
+        :return: name of the operation in progress on this thread, see operation
+        :rtype: str
+        """
+        return getattr(self._local, 'name', None)
+
+    def operation(self, name):
+        """
+        Names the events emitted on this thread while the returned context manager is active, for the phases
+        which do not know the link or action they belong to.
+
+        :param str name: relationship of a link or name of an action
+        :return: context manager
+        """
+        return _Operation(self, name)
+
+    def emit(self, phase, name=None, duration=None, error=None, **attributes):
+        """
+        Emits an event to every listener, errors raised by listeners are logged and ignored.
+
+        :param str phase: the phase, see the module constants
+        :param str name: relationship or action name, the current operation name when None
+        :param float duration: seconds spent in the phase
+        :param Exception error: error raised by the phase
+        :param attributes: phase specific values
+        """
+        if not self.listeners:
+            return
+        event = MetricEvent(phase, name if name is not None else self.current_name, duration, error, attributes)
+        for listener in list(self.listeners):
+            try:
+                listener(event)
+            except Exception:
+                log.exception('Metrics listener %r failed on %r', listener, event)
+
+    def measure(self, phase, name=None, **attributes):
+        """
+        Measures the duration of a phase, the event is emitted when the returned context manager exits.
+
+        :param str phase: the phase, see the module constants
+        :param str name: relationship or action name, the current operation name when None
+        :param attributes: phase specific values, more can be added with ``update`` on the context manager
+        :return: context manager
+        :rtype: Measurement
+        """
+        if not self.listeners:
+            return _NULL_MEASUREMENT
+        return Measurement(self, phase, name, attributes)
+
+
+class Measurement(object):
+    """Context manager timing a phase, see Metrics.measure."""
+
+    #: whether the measurement is emitted, attributes which are costly to compute are only added when it is
+    active = True
+
+    def __init__(self, metrics, phase, name, attributes):
+        self.metrics = metrics
+        self.phase = phase
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+
+    def update(self, **attributes):
+        """
+        :param attributes: phase specific values to add to the event
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = self.metrics.clock()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.emit(self.phase, self.name, self.metrics.clock() - self.start, exc_val, **self.attributes)
+
+
+class _NullMeasurement(object):
+    """Measurement of metrics without listeners."""
+
+    active = False
+
+    def update(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_MEASUREMENT = _NullMeasurement()
+
+
+class _Operation(object):
+    """Context manager naming the events of the current thread, see Metrics.operation."""
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.previous = None
+
+    def __enter__(self):
+        local = self.metrics._local
+        self.previous = getattr(local, 'name', None)
+        local.name = self.name
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics._local.name = self.previous
+
+
+def measure(metrics, phase, name=None, **attributes):
+    """
+    Metrics.measure for optional metrics.
+
+    :param Metrics metrics: metrics, nothing is measured when None
+    :return: context manager
+    """
+    if metrics is None:
+        return _NULL_MEASUREMENT
+    return metrics.measure(phase, name, **attributes)
+
+
+def operation(metrics, name):
+    """
+    Metrics.operation for optional metrics.
+
+    :param Metrics metrics: metrics, nothing is named when None
+    :param str name: relationship of a link or name of an action
+    :return: context manager
+    """
+    if metrics is None:
+        return _NULL_MEASUREMENT
+    return metrics.operation(name)
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile.
+
+    :param list[float] sorted_values: values in ascending order
+    :param float percent: percentile between 0 and 100
+    :return: the percentile, None when there are no values
+    :rtype: float
+    """
+    if not sorted_values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values))) - 1
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+class _Series(object):
+    """Measurements of one phase and name."""
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status_codes = Counter()
+        self.results = Counter()
+        self.durations = deque(maxlen=max_samples)
+
+    def add(self, event):
+        self.count += 1
+        if event.error is not None:
+            self.errors += 1
+        if event.duration is not None:
+            self.durations.append(event.duration)
+        attributes = event.attributes
+        self.bytes_in += attributes.get('bytes_in') or 0
+        self.bytes_out += attributes.get('bytes_out') or 0
+        if attributes.get('status_code') is not None:
+            self.status_codes[attributes['status_code']] += 1
+        if attributes.get('result') is not None:
+            self.results[attributes['result']] += 1
+
+
+class MetricsAggregator(object):
+    """
+    In-memory listener aggregating the events per phase and name: counts, errors, bytes, status codes, cache results
+    and duration percentiles over the latest samples.
+
+    Usage::
+
+        aggregator = MetricsAggregator()
+        client = HypermediaClient.connect(url, metrics=Metrics([aggregator]))
+        ...
+        aggregator.percentiles('send', 'next')
+    """
+
+    def __init__(self, max_samples=DEFAULT_MAX_SAMPLES):
+        """
+        :param int max_samples: number of durations kept per phase and name for the percentiles
+        """
+        self.max_samples = max_samples
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        key = (event.phase, event.name)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.max_samples)
+            series.add(event)
+
+    def keys(self):
+        """
+        :return: the (phase, name) pairs measured so far
+        :rtype: list[tuple]
+        """
+        with self._lock:
+            return list(self._series)
+
+    def percentiles(self, phase, name=None, percents=(50, 90, 99)):
+        """
+        :param str phase: the phase
+        :param str name: relationship or action name
+        :param tuple percents: percentiles to compute
+        :return: duration in seconds by percentile, empty when nothing was measured
+        :rtype: dict[float, float]
+        """
+        with self._lock:
+            series = self._series.get((phase, name))
+            durations = sorted(series.durations) if series is not None else []
+        if not durations:
+            return {}
+        return dict((p, percentile(durations, p)) for p in percents)
+
+    def summary(self, percents=(50, 90, 99)):
+        """
+        :param tuple percents: percentiles to compute
+        :return: statistics by (phase, name)
+        :rtype: dict[tuple, dict]
+        """
+        with self._lock:
+            items = [(key, series, sorted(series.durations)) for key, series in self._series.items()]
+        result = {}
+        for key, series, durations in items:
+            result[key] = dict(count=series.count, errors=series.errors, bytes_in=series.bytes_in,
+                               bytes_out=series.bytes_out, status_codes=dict(series.status_codes),
+                               results=dict(series.results),
+                               percentiles=dict((p, percentile(durations, p)) for p in percents) if durations else {})
+        return result
+
+    def reset(self):
+        """Discards every measurement."""
+        with self._lock:
+            self._series.clear()
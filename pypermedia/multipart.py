@@ -0,0 +1,188 @@
+"""
+Streaming multipart/form-data bodies (RFC 7578) of actions. A ``MultipartBody`` is an iterable of the encoded parts
+of its fields, the files of file fields are read a chunk at a time as the request is sent rather than held in memory.
+Its length is sent as Content-Length, unless a file cannot tell its size in which case the body is sent chunked.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import mimetypes
+import os
+import uuid
+
+import six
+
+#: number of bytes read at a time from the files of a body
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+#: media type of multipart bodies
+MULTIPART_TYPE = 'multipart/form-data'
+
+_CRLF = b'\r\n'
+
+
+def _quote(value):
+    """
+    :param unicode value: name or filename of a field
+    :return: the value as a quoted-string parameter, its quotes and line breaks percent-encoded the way browsers do
+    :rtype: bytes
+    """
+    value = value.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+    return b'"' + value.encode('utf-8') + b'"'
+
+
+def _disposition(name, filename=None):
+    """
+    :param unicode name: name of the field
+    :param unicode filename: name of the file of a file field
+    :return: the Content-Disposition header line of the part of the field
+    :rtype: bytes
+    """
+    header = b'Content-Disposition: form-data; name=' + _quote(name)
+    if filename is not None:
+        header += b'; filename=' + _quote(filename)
+    return header + _CRLF
+
+
+def _extent(fileobj):
+    """
+    :param fileobj: file-like object
+    :return: the position of the file and its number of bytes from there, both None when it cannot seek or is read
+        as text
+    :rtype: tuple
+    """
+    if isinstance(fileobj, io.TextIOBase):
+        return None, None
+    try:
+        start = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        end = fileobj.tell()
+        fileobj.seek(start)
+    except (AttributeError, IOError, OSError, ValueError):
+        return None, None
+    return start, end - start
+
+
+def is_file(value):
+    """
+    :param value: value of a field
+    :return: whether the value is a file-like object or a (filename, file) or (filename, file, content type) tuple
+    :rtype: bool
+    """
+    if isinstance(value, tuple):
+        return len(value) in (2, 3) and hasattr(value[1], 'read')
+    return hasattr(value, 'read')
+
+
+def encode_part(name, value):
+    """
+    :param unicode name: name of a field which is not a file
+    :param value: serialized value of the field
+    :type value: bytes or unicode
+    :return: the headers and content of the part of the field
+    :rtype: bytes
+    """
+    if isinstance(value, six.text_type):
+        value = value.encode('utf-8')
+    return _disposition(name) + _CRLF + value
+
+
+class FilePart(object):
+    """Part of a file field, its file is read when the body is sent."""
+
+    def __init__(self, name, value):
+        """
+        :param unicode name: name of the field
+        :param value: file-like object, or a (filename, file) or (filename, file, content type) tuple, the filename
+            defaulting to the name of the file and the content type being guessed from the filename
+        """
+        content_type = None
+        if isinstance(value, tuple):
+            filename, fileobj = value[0], value[1]
+            if len(value) > 2:
+                content_type = value[2]
+        else:
+            fileobj = value
+            filename = getattr(fileobj, 'name', None)
+            filename = os.path.basename(filename) if isinstance(filename, six.string_types) else None
+        filename = filename or name
+        content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.headers = _disposition(name, filename) + b'Content-Type: ' + content_type.encode('ascii') + _CRLF + _CRLF
+        self.fileobj = fileobj
+        self.start, self.size = _extent(fileobj)
+
+    def chunks(self, chunk_size):
+        """
+        :param int chunk_size: number of bytes read at a time
+        :return: generator of the content of the file from its original position
+        :rtype: generator
+        """
+        if self.start is not None:
+            self.fileobj.seek(self.start)  # a body sent again, when a request is retried, sends the file again
+        for chunk in iter(lambda: self.fileobj.read(chunk_size), b''):
+            if not chunk:
+                break
+            yield chunk.encode('utf-8') if isinstance(chunk, six.text_type) else chunk
+
+
+class MultipartBody(object):
+    """
+    Iterable multipart/form-data body. Requests reads ``len`` for the Content-Length of the body, and sends it
+    chunked when it is None.
+    """
+
+    def __init__(self, parts, boundary=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param parts: encoded parts of the fields (see encode_part) and parts of the file fields
+        :type parts: list[bytes or FilePart]
+        :param str boundary: delimiter of the parts, a random one when None
+        :param int chunk_size: number of bytes read at a time from files
+        """
+        self.parts = parts
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+
+    @property
+    def content_type(self):
+        """
+        :return: the Content-Type header of the body
+        :rtype: str
+        """
+        return '{0}; boundary={1}'.format(MULTIPART_TYPE, self.boundary)
+
+    @property
+    def len(self):
+        """
+        :return: number of bytes of the body, None when a file cannot tell its size
+        :rtype: int
+        """
+        delimiter = len(self.boundary) + 6  # dashes and line breaks around each part
+        total = len(self.boundary) + 6  # closing delimiter
+        for part in self.parts:
+            if isinstance(part, FilePart):
+                if part.size is None:
+                    return None
+                total += delimiter + len(part.headers) + part.size
+            else:
+                total += delimiter + len(part)
+        return total
+
+    def __iter__(self):
+        boundary = self.boundary.encode('ascii')
+        buffered = []  # parts of the fields are sent together, with the headers of the next file
+        for part in self.parts:
+            buffered.append(b'--' + boundary + _CRLF)
+            if isinstance(part, FilePart):
+                buffered.append(part.headers)
+                yield b''.join(buffered)
+                buffered = []
+                for chunk in part.chunks(self.chunk_size):
+                    yield chunk
+            else:
+                buffered.append(part)
+            buffered.append(_CRLF)
+        buffered.append(b'--' + boundary + b'--' + _CRLF)
+        yield b''.join(buffered)
@@ -0,0 +1,295 @@
+"""
+Timeout, retry and deadline policies of the requests made by the client and the objects it generates. A
+``RequestPolicy`` sets the connect/read timeouts and retries idempotent requests with exponential backoff and jitter,
+honoring Retry-After on 429/503 responses. Requests whose body cannot be sent again, such as a generator, are never
+retried. Policies for particular link relationships or action names are given with
+``overrides``. A ``Deadline`` is a total time budget of a call or traversal, the timeouts are shortened and retries
+given up so that no request outlives it. A deadline given in seconds is started anew for each call or traversal, a
+started ``Deadline`` is shared by every request made with it.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from email.utils import parsedate_tz, mktime_tz
+
+import random
+import time
+
+import requests.exceptions
+import six
+
+from pypermedia.metrics import RETRY
+
+#: methods which may be sent again without changing the outcome
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+
+#: statuses of responses which are retried
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+#: statuses of responses whose Retry-After header is honored
+RETRY_AFTER_STATUSES = frozenset([429, 503])
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The deadline of a traversal expired before its request could be sent."""
+    pass
+
+
+class Deadline(object):
+    """Total time budget of the requests of a traversal, started when it is created."""
+
+    def __init__(self, budget, clock=time.time):
+        """
+        :param float budget: seconds available to the traversal
+        :param function clock: returns the current time in seconds
+        """
+        self.budget = budget
+        self.clock = clock
+        self.expires = clock() + budget
+
+    def remaining(self):
+        """
+        :return: seconds left, 0 once expired
+        :rtype: float
+        """
+        return max(self.expires - self.clock(), 0)
+
+    @property
+    def expired(self):
+        """
+        :return: whether no time is left
+        :rtype: bool
+        """
+        return self.remaining() <= 0
+
+    def check(self, prepared_request):
+        """
+        :param requests.PreparedRequest prepared_request: request about to be sent
+        :raises: DeadlineExceeded
+        """
+        if self.expired:
+            raise DeadlineExceeded('Deadline of {0}s exceeded before sending {1} {2}'.format(
+                self.budget, prepared_request.method, prepared_request.url))
+
+
+def start_deadline(deadline):
+    """
+    :param deadline: seconds available, or a started Deadline
+    :type deadline: Deadline or float
+    :return: a Deadline started now for seconds, the given Deadline when started already, None when unlimited
+    :rtype: Deadline
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
+
+
+def request_method(prepared_request):
+    """
+    :param requests.PreparedRequest prepared_request: the request
+    :return: the upper-cased method name, GzipRequest encodes it
+    :rtype: str
+    """
+    method = prepared_request.method or 'GET'
+    if isinstance(method, bytes):
+        method = method.decode('ascii')
+    return method.upper()
+
+
+def _rewinder(body):
+    """
+    :param body: body of a prepared request
+    :return: function readying the body to be sent again, None when it cannot be: iterators such as generators, which
+        are exhausted once sent, and files which cannot seek back
+    :rtype: function
+    """
+    if body is None or isinstance(body, (six.binary_type, six.text_type)):
+        return lambda: None
+    if hasattr(body, 'read'):
+        try:
+            if hasattr(body, 'seekable') and not body.seekable():
+                return None
+            position = body.tell()
+        except (AttributeError, IOError, OSError, ValueError):
+            return None
+        return lambda: body.seek(position)
+    try:
+        if iter(body) is body:
+            return None
+    except TypeError:
+        return None
+    return lambda: None  # iterated anew on each send, as MultipartBody is
+
+
+def parse_retry_after(value, clock=time.time):
+    """
+    Parses a Retry-After header.
+
+    :param str|unicode value: delay in seconds or http date
+    :param function clock: returns the current time in seconds since the epoch
+    :return: seconds to wait, None when the header is missing or invalid
+    :rtype: float
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(mktime_tz(parsed) - clock(), 0)
+
+
+class RequestPolicy(object):
+    """
+    Timeouts and retries of requests.
+
+    Usage::
+
+        policy = RequestPolicy(connect_timeout=3.05, read_timeout=30, retries=3,
+                               overrides={'search': RequestPolicy(read_timeout=120)})
+        client = HypermediaClient.connect(url, policy=policy, deadline=60)
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None, retries=0, backoff_factor=0.1, max_backoff=30.0,
+                 jitter=True, retry_methods=IDEMPOTENT_METHODS, retry_statuses=RETRY_STATUSES,
+                 respect_retry_after=True, max_retry_after=120.0, overrides=None, sleep=time.sleep,
+                 random=random.random):
+        """
+        :param float connect_timeout: seconds to wait for a connection, forever when None
+        :param float read_timeout: seconds to wait between bytes of the response, forever when None
+        :param int retries: number of times a failed request is sent again
+        :param float backoff_factor: delay before the first retry, doubled for each following one
+        :param float max_backoff: maximum delay between retries
+        :param bool jitter: whether the delay is drawn uniformly between 0 and the backoff so that clients retrying
+            the same failure spread out
+        :param retry_methods: methods which are retried after a failure, other methods are only retried when
+            connecting timed out (ConnectTimeout): other connection errors, such as a reset connection, may be
+            raised once the request was sent and are not retried. Requests whose body cannot be sent again are
+            never retried
+        :param retry_statuses: statuses of the responses which are retried
+        :param bool respect_retry_after: whether the Retry-After header of 429 and 503 responses sets the delay
+        :param float max_retry_after: longest Retry-After honored, longer ones are not retried
+        :param dict[str, RequestPolicy] overrides: policies by link relationship or action name
+        :param function sleep: waits a number of seconds
+        :param function random: returns a random float in [0, 1)
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_methods = frozenset(m.upper() for m in retry_methods)
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.overrides = dict(overrides or {})
+        self.sleep = sleep
+        self.random = random
+
+    def for_name(self, name):
+        """
+        :param str name: link relationship or action name
+        :return: the policy of the link or action
+        :rtype: RequestPolicy
+        """
+        return self.overrides.get(name, self) if name is not None else self
+
+    def timeout(self, deadline=None):
+        """
+        :param Deadline deadline: budget the timeouts are shortened to
+        :return: (connect, read) timeout for requests, None to wait forever
+        :rtype: tuple
+        """
+        connect, read = self.connect_timeout, self.read_timeout
+        if deadline is not None:
+            remaining = deadline.remaining()
+            connect = remaining if connect is None else min(connect, remaining)
+            read = remaining if read is None else min(read, remaining)
+        if connect is None and read is None:
+            return None
+        return connect, read
+
+    def backoff(self, attempt):
+        """
+        :param int attempt: number of retries made so far
+        :return: seconds to wait before the next retry
+        :rtype: float
+        """
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return delay * self.random() if self.jitter else delay
+
+    def _retry_error_delay(self, method, error, attempt):
+        """
+        :return: seconds to wait before retrying a request which raised, None when it is not retried
+        :rtype: float
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout) or method in self.retry_methods:
+            return self.backoff(attempt)
+        return None
+
+    def _retry_response_delay(self, method, response, attempt):
+        """
+        :return: seconds to wait before retrying a request whose response failed, None when it is not retried
+        :rtype: float
+        """
+        if method not in self.retry_methods or response.status_code not in self.retry_statuses:
+            return None
+        if self.respect_retry_after and response.status_code in RETRY_AFTER_STATUSES:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        return self.backoff(attempt)
+
+    def send(self, prepared_request, send, deadline=None, metrics=None, name=None):
+        """
+        Sends a request, retrying it per this policy.
+
+        :param requests.PreparedRequest prepared_request: the request
+        :param function send: sends a prepared request with a timeout, returns the response
+        :param Deadline deadline: budget of the traversal the request belongs to
+        :param pypermedia.metrics.Metrics metrics: receives the retries
+        :param str name: link relationship or action name of the request
+        :return: the response, the last one when the retries are exhausted
+        :rtype: requests.Response
+        :raises: DeadlineExceeded
+        :raises: requests.exceptions.RequestException
+        """
+        method = request_method(prepared_request)
+        rewind = _rewinder(prepared_request.body)
+        retries = self.retries if rewind is not None else 0
+        attempt = 0
+        while True:
+            if deadline is not None:
+                deadline.check(prepared_request)
+            try:
+                response = send(prepared_request, self.timeout(deadline))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = self._retry_error_delay(method, e, attempt) if attempt < retries else None
+                if not self._may_wait(delay, deadline):
+                    raise
+                reason = type(e).__name__
+            else:
+                delay = self._retry_response_delay(method, response, attempt) if attempt < retries else None
+                if not self._may_wait(delay, deadline):
+                    return response
+                reason = response.status_code
+                response.close()
+
+            attempt += 1
+            if metrics is not None:
+                metrics.emit(RETRY, name, url=prepared_request.url, attempt=attempt, reason=reason, delay=delay)
+            self.sleep(delay)
+            rewind()
+
+    @staticmethod
+    def _may_wait(delay, deadline):
+        """
+        :return: whether a retry after the delay is possible within the deadline
+        :rtype: bool
+        """
+        return delay is not None and (deadline is None or delay < deadline.remaining())
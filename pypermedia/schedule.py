@@ -0,0 +1,260 @@
+"""
+Per-host rate limiting and concurrency control of the requests made by the client and the objects it generates. A
+``RequestScheduler`` admits each request once its host has a token in its token bucket (``rate`` requests per second,
+``burst`` at once) and fewer than ``max_in_flight`` requests in flight. Excess requests wait their turn in the order
+they arrived rather than failing; the wait is reported as a ``queue`` metric. Limits for particular link
+relationships or action names are given with ``overrides``, each override schedules its requests separately.
+
+The request of a streamed response keeps its slot until the response is closed, as its body is read after it is
+sent: close streamed responses (``SirenStream`` does once consumed) so that the requests after them are admitted.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import deque
+from contextlib import contextmanager
+
+import threading
+import time
+
+from six.moves.urllib.parse import urlsplit
+
+from pypermedia.metrics import QUEUE
+
+#: number of hosts tracked before the idle ones are first evicted
+_MIN_SWEEP = 64
+
+
+def url_host(url):
+    """
+    :param str|unicode url: absolute url
+    :return: scheme and network location of the url, lower-cased
+    :rtype: str
+    """
+    parts = urlsplit(url)
+    return '{0}://{1}'.format(parts.scheme.lower(), parts.netloc.lower())
+
+
+class _HostState(object):
+    """Token bucket, requests in flight and waiting requests of one host."""
+
+    __slots__ = ('tokens', 'updated', 'in_flight', 'waiting')
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+        self.in_flight = 0
+        self.waiting = deque()
+
+
+class _Admission(object):
+    """Admission of a request by RequestScheduler.slot."""
+
+    __slots__ = ('scheduler', 'request', 'held', 'released')
+
+    def __init__(self, scheduler, request):
+        self.scheduler = scheduler
+        self.request = request
+        self.held = False
+        self.released = False
+
+    def release(self):
+        """Marks the request as completed, once."""
+        if not self.released:
+            self.released = True
+            self.scheduler.release(self.request)
+
+    def release_on_close(self, response):
+        """
+        Keeps the admission past the slot until the response is closed, for streamed responses whose body is read
+        after they are returned.
+
+        :param requests.Response response: response of the request
+        """
+        close = response.close
+
+        def release_and_close():
+            try:
+                close()
+            finally:
+                self.release()
+        response.close = release_and_close
+        self.held = True
+
+
+class RequestScheduler(object):
+    """
+    Admits requests per host within a rate and a number of requests in flight, requests beyond them wait first in,
+    first out. The limits apply to each host separately; a limit of None is not enforced.
+
+    Usage::
+
+        scheduler = RequestScheduler(rate=10, burst=5, max_in_flight=4,
+                                     overrides={'export': RequestScheduler(rate=0.5, max_in_flight=1)})
+        client = HypermediaClient.connect(url, scheduler=scheduler)
+    """
+
+    def __init__(self, rate=None, burst=1, max_in_flight=None, overrides=None, clock=time.time):
+        """
+        :param float rate: requests per second sent to each host, unlimited when None
+        :param int burst: requests which may be sent at once to a host which was idle, the size of its token bucket
+        :param int max_in_flight: requests in flight to each host, unlimited when None
+        :param dict[str, RequestScheduler] overrides: schedulers by link relationship or action name
+        :param function clock: returns the current time in seconds
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_in_flight = max_in_flight
+        self.overrides = dict(overrides or {})
+        self.clock = clock
+        self.stats = dict(requests=0, queued=0, wait=0.0)  # admitted, admitted after waiting, seconds waited
+        self._hosts = {}
+        self._sweep_at = _MIN_SWEEP
+        self._condition = threading.Condition(threading.Lock())
+
+    def for_name(self, name):
+        """
+        :param str name: link relationship or action name
+        :return: the scheduler of the link or action
+        :rtype: RequestScheduler
+        """
+        return self.overrides.get(name, self) if name is not None else self
+
+    def in_flight(self, url=None):
+        """
+        :param str|unicode url: url of the host, every host when None
+        :return: number of requests in flight
+        :rtype: int
+        """
+        with self._condition:
+            if url is not None:
+                state = self._hosts.get(url_host(url))
+                return state.in_flight if state is not None else 0
+            return sum(state.in_flight for state in self._hosts.values())
+
+    def _delay(self, state, now):
+        """
+        :param _HostState state: state of the host
+        :param float now: current time
+        :return: seconds until the host may be sent a request, 0 when it may now, None when it waits for a request
+            in flight to complete
+        :rtype: float
+        """
+        if self.max_in_flight is not None and state.in_flight >= self.max_in_flight:
+            return None
+        if self.rate is None:
+            return 0
+        state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+        state.updated = now
+        return 0 if state.tokens >= 1 else (1 - state.tokens) / self.rate
+
+    def _idle(self, state, now):
+        """
+        :param _HostState state: state of a host
+        :param float now: current time
+        :return: whether the host has nothing in flight nor waiting and a full token bucket, the state of a host which
+            was never sent a request
+        :rtype: bool
+        """
+        if state.in_flight or state.waiting:
+            return False
+        return self.rate is None or state.tokens + (now - state.updated) * self.rate >= self.burst
+
+    def _evict_idle(self, now):
+        """
+        Forgets the idle hosts so that the hosts tracked are bounded by the hosts in use, sweeping again once their
+        number doubled.
+
+        :param float now: current time
+        """
+        for host in [host for host, state in self._hosts.items() if self._idle(state, now)]:
+            del self._hosts[host]
+        self._sweep_at = max(2 * len(self._hosts), _MIN_SWEEP)
+
+    def acquire(self, prepared_request, deadline=None):
+        """
+        Waits until the request may be sent to its host, see release.
+
+        :param requests.PreparedRequest prepared_request: the request
+        :param pypermedia.policy.Deadline deadline: budget the wait is bounded by
+        :return: seconds waited
+        :rtype: float
+        :raises: pypermedia.policy.DeadlineExceeded
+        """
+        host = url_host(prepared_request.url)
+        start = self.clock()
+        ticket = object()
+        queued = False
+        with self._condition:
+            state = self._hosts.get(host)
+            if state is None:
+                if len(self._hosts) >= self._sweep_at:
+                    self._evict_idle(start)
+                state = self._hosts[host] = _HostState(self.burst, start)
+            state.waiting.append(ticket)
+            try:
+                while True:
+                    now = self.clock()
+                    delay = self._delay(state, now) if state.waiting[0] is ticket else None
+                    if delay == 0:
+                        break
+                    if deadline is not None:
+                        deadline.check(prepared_request)
+                        delay = deadline.remaining() if delay is None else min(delay, deadline.remaining())
+                    queued = True
+                    self._condition.wait(delay)
+            except BaseException:
+                state.waiting.remove(ticket)
+                self._condition.notify_all()
+                raise
+
+            state.waiting.popleft()
+            state.in_flight += 1
+            if self.rate is not None:
+                state.tokens -= 1
+            waited = self.clock() - start if queued else 0
+            self.stats['requests'] += 1
+            if queued:
+                self.stats['queued'] += 1
+                self.stats['wait'] += waited
+            self._condition.notify_all()  # the next request of the host may be admitted as well
+        return waited
+
+    def release(self, prepared_request):
+        """
+        Marks a request admitted by acquire as completed.
+
+        :param requests.PreparedRequest prepared_request: the request
+        """
+        host = url_host(prepared_request.url)
+        with self._condition:
+            state = self._hosts[host]
+            state.in_flight -= 1
+            if self._idle(state, self.clock()):
+                del self._hosts[host]
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, prepared_request, deadline=None, metrics=None, name=None):
+        """
+        Holds the admission of a request while it is sent. The admission is released on exit unless it is kept until
+        the response is closed with its ``release_on_close``.
+
+        :param requests.PreparedRequest prepared_request: the request
+        :param pypermedia.policy.Deadline deadline: budget the wait is bounded by
+        :param pypermedia.metrics.Metrics metrics: receives the wait
+        :param str name: link relationship or action name of the request
+        :return: context manager yielding the admission
+        :raises: pypermedia.policy.DeadlineExceeded
+        """
+        waited = self.acquire(prepared_request, deadline=deadline)
+        if metrics is not None:
+            metrics.emit(QUEUE, name, duration=waited, url=prepared_request.url)
+        admission = _Admission(self, prepared_request)
+        try:
+            yield admission
+        finally:
+            if not admission.held:
+                admission.release()
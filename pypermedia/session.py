@@ -0,0 +1,34 @@
+"""
+Pooled requests sessions shared by the client, the objects it generates and the crawler, so that keep-alive
+connections are reused across their requests.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import requests
+import requests.adapters
+
+#: default number of hosts for which pooled connections are kept
+DEFAULT_POOL_CONNECTIONS = 10
+
+#: default number of keep-alive connections kept per host
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """
+    Creates a session with connection pooling configured for both http and https so that keep-alive connections are
+    reused across every request made by the client and the objects it generates.
+
+    :param int pool_connections: maximum number of hosts for which connection pools are kept
+    :param int pool_maxsize: maximum number of connections kept per host
+    :return: session with pooled adapters mounted
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    for prefix in ('http://', 'https://'):
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount(prefix, adapter)
+    return session
@@ -3,100 +3,893 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import json
+import copy
+import functools
 import logging
+import numbers
 import re
 import six
+import threading
+import weakref
+from collections import OrderedDict, deque
+from six.moves.urllib.parse import urlencode
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from requests import Response, Session, Request
 
+from pypermedia.codec import get_codec
+from pypermedia.gzip_requests import decompress_chunks, undecoded_encodings
+from pypermedia.metrics import measure, operation, SEND, DECOMPRESS, DECODE, CONSTRUCT, PYTHON_OBJECT
+from pypermedia.multipart import encode_part, is_file, FilePart, MultipartBody, MULTIPART_TYPE
+from pypermedia.policy import RequestPolicy, start_deadline
+from pypermedia.session import create_session
+from pypermedia.streaming import iter_root_members, ARRAY_START, ARRAY_ITEM, MEMBER
+from pypermedia.uri_template import compile_template
+
+#: default number of threads retrieving links concurrently when expanding an entity
+DEFAULT_EXPAND_WORKERS = 8
+
+#: default number of generated model classes kept by SirenEntity.as_python_object
+DEFAULT_MODEL_CLASS_CACHE_SIZE = 1024
+
+#: default number of documents sent to a worker process at a time by SirenBuilder.from_api_responses
+DEFAULT_BATCH_CHUNKSIZE = 16
+
+#: default number of pages retrieved ahead of the page being consumed when paginating
+DEFAULT_PREFETCH_PAGES = 1
+
+#: default number of bytes read at a time when streaming a response
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+#: default number of requests sent concurrently by SirenAction.make_requests
+DEFAULT_BULK_CONCURRENCY = 8
+
+#: media type of url encoded action payloads, the default
+FORM_TYPE = 'application/x-www-form-urlencoded'
+
+#: media type of json action payloads
+JSON_TYPE = 'application/json'
+
+#: headers of the requests whose fields are sent as an url encoded body
+FORM_HEADERS = {'Content-Type': FORM_TYPE}
+
+#: encodings of the fields of an action, see ActionRequestBuilder
+QUERY_ENCODING = 'query'
+FORM_ENCODING = 'form'
+JSON_ENCODING = 'json'
+MULTIPART_ENCODING = 'multipart'
+
+_TEMPLATE_PARAMETER = re.compile(r'\{[^}]+\}')
+_INVALID_METHOD_CHARACTERS = re.compile(r'[^a-zA-Z0-9_]')
+_METHOD_NAME_MATCHER = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')  # see https://docs.python.org/2/reference/lexical_analysis.html#grammar-token-identifier
+
+#: guards the installation of lazily constructed element lists, entities may be shared between threads
+_MATERIALIZE_LOCK = threading.Lock()
+
+#: guards the lists of the indexed lists holding each siren object, see _hold
+_HOLDERS_LOCK = threading.Lock()
+_REF = weakref.ref
+
 
 # =====================================
 # Siren element->object representations
 # =====================================
 
 
-def _check_and_decode_response(response):
+def _slot_names(cls):
     """
-    Checks if the response is valid.  If it is, it returns the response body.  Otherwise it raises an exception or
-    returns None if the status_code is 404.
+    :param type cls: a class
+    :return: the names of the slots declared by the class and its bases
+    :rtype: list[str]
+    """
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, six.string_types):
+            slots = (slots,)
+        names.extend(x for x in slots if x not in ('__dict__', '__weakref__'))
+    return names
+
+
+#: slot names of each class, see _shallow_copy
+_class_slot_names = {}
+
+
+def _shallow_copy(obj):
+    """
+    :param obj: a siren object
+    :return: a new object of the same class sharing the values of the slots and attributes of obj, other than the
+        lists holding it (see _hold)
+    """
+    cls = obj.__class__
+    names = _class_slot_names.get(cls)
+    if names is None:
+        names = _class_slot_names[cls] = [x for x in _slot_names(cls) if x != '_holders']
+    new = cls.__new__(cls)
+    for name in names:
+        if hasattr(obj, name):
+            setattr(new, name, getattr(obj, name))
+    new._holders = None
+    if hasattr(obj, '__dict__'):
+        new.__dict__.update(obj.__dict__)
+    return new
+
+
+def _copy_json(value):
+    """
+    :param value: json value such as properties or fields
+    :return: a copy of the dictionaries and lists of the value, their other values are shared
+    """
+    if value.__class__ is dict:
+        return dict((k, _copy_json(v)) for k, v in value.items())
+    if value.__class__ is list:
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _copy_keys(values):
+    """
+    :param values: relationships or classnames
+    :type values: list[str] or str
+    :return: a copy of the values as a _KeyList, strings and None as they are
+    :rtype: _KeyList
+    """
+    if values is None or isinstance(values, six.string_types):
+        return values
+    return _new_key_list(values)
+
+
+def _intern_all(values):
+    """
+    Interns the strings of a list so that equal values share a single object.
+
+    :param list values: values to intern
+    :return: list of the interned values, None when values is None
+    :rtype: list
+    """
+    if values is None:
+        return None
+    return _new_key_list(six.moves.intern(x) if isinstance(x, str) else x for x in values)
+
+
+def _notifying(name):
+    """
+    :param str name: name of a list method modifying the list
+    :return: the method, calling _mutated on the list once it modified it
+    :rtype: function
+    """
+    method = getattr(list, name)
+
+    def mutator(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._mutated()
+        return result
+    mutator.__name__ = str(name)
+    return mutator
+
+
+#: list methods modifying the list, __setslice__ and __delslice__ are used by Python 2 only
+_LIST_MUTATORS = [name for name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', '__setslice__',
+                                    '__delslice__', 'append', 'extend', 'insert', 'pop', 'remove', 'clear', 'sort',
+                                    'reverse') if hasattr(list, name)]
+
+
+class _KeyList(list):
+    """
+    Relationships or classnames of a siren object. Modifying them drops the lookup indexes of the lists holding the
+    object, see _IndexedList.
+    """
+
+    __slots__ = ('_holders',)
+
+    def _mutated(self):
+        _drop_indexes(self)
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    for _name in _LIST_MUTATORS:
+        locals()[_name] = _notifying(_name)
+    del _name
+
+
+def _key_list(values):
+    """
+    :param values: relationships or classnames
+    :type values: list[str] or str
+    :return: the values as a _KeyList, strings and None as they are
+    :rtype: _KeyList
+    """
+    if values is None or isinstance(values, (_KeyList, six.string_types)):
+        return values
+    return _new_key_list(values)
+
+
+def _new_key_list(values):
+    """
+    :param values: relationships or classnames
+    :type values: collections.Iterable
+    :return: a new _KeyList of the values, not held by any list yet
+    :rtype: _KeyList
+    """
+    keys = _KeyList(values)
+    keys._holders = None
+    return keys
+
+
+def _add_holder(obj, ref):
+    """
+    Records that a list indexes a siren object or one of its key lists. The holders of an object are kept as a single
+    weak reference, the common case, or as a list of them once a second list indexes the object. Called with
+    _HOLDERS_LOCK held.
+
+    :param obj: siren object or _KeyList
+    :param weakref.ref ref: reference to the _IndexedList
+    """
+    holders = getattr(obj, '_holders', None)
+    if holders is None:
+        try:
+            obj._holders = ref
+        except AttributeError:  # not a siren object
+            pass
+    elif holders is not ref:
+        if holders.__class__ is _REF:
+            holders = [holders]
+        elif holders.__class__ is not list:  # not a siren object either
+            return
+        holder = ref()
+        live = [r for r in holders if r() is not None]
+        if not any(r() is holder for r in live):
+            live.append(ref)
+        obj._holders = live[0] if len(live) == 1 else live
+
+
+def _hold(item, ref):
+    """
+    Records that a list indexes an item, so that changing the keys of the item drops the indexes of the list. Called
+    with _HOLDERS_LOCK held.
+
+    :param item: action, link or sub-entity
+    :param weakref.ref ref: reference to the _IndexedList
+    """
+    if getattr(item, '_holders', ref) is None:  # the common case, inlined
+        item._holders = ref
+    else:
+        _add_holder(item, ref)
+    for keys in (getattr(item, '_rel', None), getattr(item, '_classnames', None)):
+        if keys.__class__ is _KeyList:
+            if getattr(keys, '_holders', ref) is None:
+                keys._holders = ref
+            else:
+                _add_holder(keys, ref)
+
+
+def _drop_indexes(obj):
+    """
+    Drops the lookup indexes of the lists holding a siren object or key list whose keys changed.
+
+    :param obj: siren object or _KeyList
+    """
+    holders = getattr(obj, '_holders', None)
+    if holders.__class__ is _REF:
+        holders = (holders,)
+    elif holders.__class__ is not list:
+        return
+    for ref in holders:
+        holder = ref()
+        if holder is not None:
+            holder._indexes = None
+
+
+def _index_keys(name, item):
+    """
+    :param str name: 'links_by_rel', 'entities_by_rel', 'entities_by_class' or 'actions_by_name'
+    :param item: action, link or sub-entity
+    :return: the keys of the item in the index
+    :rtype: collections.Iterable
+    """
+    if name == 'actions_by_name':
+        return (item.name,)
+    if name == 'entities_by_class':
+        return item.classnames if isinstance(item, BaseSirenEntity) else ()
+    return item.rel or ()
+
+
+def _index_item(index, name, item):
+    """
+    Adds an item after the items of an index.
+
+    :param dict index: items by key
+    :param str name: index name, see _index_keys
+    :param item: action, link or sub-entity
+    """
+    for key in _index_keys(name, item):
+        matching = index.setdefault(key, [])
+        if not matching or matching[-1] is not item:  # an item repeating a key is only indexed once
+            matching.append(item)
+
+
+class _IndexedList(list):
+    """
+    Actions, links or sub-entities of an entity along with the lookup indexes of the items, which are built on first
+    lookup. Appending updates the indexes while the other modifications of the list drop them. The items, and their
+    relationship and classname lists, keep weak references to the lists which indexed them: changing a relationship,
+    classname or action name drops the indexes of those lists only.
+    """
+
+    __slots__ = ('_indexes', '__weakref__')
+
+    # the slot is left unset until the first lookup so that constructing the list stays as fast as copying a list
+
+    def _mutated(self):
+        self._indexes = None
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    for _name in _LIST_MUTATORS:
+        locals()[_name] = _notifying(_name)
+    del _name
+
+    def append(self, item):
+        list.append(self, item)
+        indexes = getattr(self, '_indexes', None)
+        if indexes is not None:
+            with _HOLDERS_LOCK:
+                _hold(item, weakref.ref(self))
+            for name, index in indexes.items():
+                _index_item(index, name, item)
+
+    def lookup(self, name, key):
+        """
+        :param str name: index name, see _index_keys
+        :param str key: value to look up
+        :return: the matching items in their original order
+        :rtype: list
+        """
+        indexes = getattr(self, '_indexes', None)
+        if indexes is None:
+            ref = weakref.ref(self)
+            with _HOLDERS_LOCK:
+                for item in self:  # before their keys are read, a change from then on drops the indexes
+                    _hold(item, ref)
+            indexes = self._indexes = {}
+        index = indexes.get(name)
+        if index is None:
+            index = indexes[name] = {}
+            for item in self:
+                _index_item(index, name, item)
+        return index.get(key, ())
+
+
+def _indexed(items):
+    """
+    :param list items: actions, links or sub-entities
+    :return: the items as an _IndexedList
+    :rtype: _IndexedList
+    """
+    return items if isinstance(items, _IndexedList) else _IndexedList(items)
+
+
+def _key_property(name):
+    """
+    Creates a property holding the relationships, classnames or action name of a siren object in a slot, assigning it
+    drops the lookup indexes of the lists holding the object.
+
+    :param str name: name of the slot
+    :return: the property
+    :rtype: property
+    """
+    def fget(self):
+        return getattr(self, name)
+
+    def fset(self, value):
+        setattr(self, name, _key_list(value))
+        _drop_indexes(self)
+    return property(fget, fset)
+
+
+def _prepare_payload(codec, params):
+    """
+    Prepares parameters for their serialized json representation, empty values are dropped.
+
+    :param pypermedia.codec.JsonCodec codec: codec serializing the values which are not strings
+    :param dict params: query/post parameters
+    :return: dictionary of prepared parameters
+    :rtype: dict[str, str]
+    """
+    result = {}
+    for k, v in params.items():
+        if not v:
+            continue
+
+        if not isinstance(v, six.string_types):
+            v = codec.dumps(v)
+
+        result[k] = v
+    return result
+
+
+def _declared_charset(response):
+    """
+    :param requests.Response response: the response
+    :return: the charset of the body when it is not utf-8, None for utf-8 which is assumed when no charset is
+        declared (json is utf-8, see RFC 8259) so that requests never detects it from the body
+    :rtype: str
+    """
+    encoding = response.encoding
+    if encoding and encoding.lower().replace('-', '') != 'utf8':
+        return encoding
+    return None
+
+
+def _read_body(response, metrics=None):
+    """
+    Gets the siren document of a response item.
+
+    :param response: response item containing siren construction information
+    :type response: str or unicode or bytes or dict or requests.Response
+    :param pypermedia.metrics.Metrics metrics: receives the measurement of the decompression
+    :return: the body of a Response, decompressed when the transport left it encoded and decoded straight from bytes
+        unless the server declared another charset than utf-8, None when it was not found, other response items as
+        they are
+    :raises: MalformedSirenError
+    :raises: UnexpectedStatusError
+    """
+    if not isinstance(response, Response):
+        return response
+    if not _check_response_status(response):
+        return None
+    charset = _declared_charset(response)
+    encodings = undecoded_encodings(response)
+    if encodings:
+        body = response.content
+        with measure(metrics, DECOMPRESS, content_encoding=', '.join(encodings), bytes_wire=len(body)) as measurement:
+            body = b''.join(decompress_chunks([body], encodings))
+            measurement.update(bytes_in=len(body))
+        if charset is not None:
+            body = body.decode(charset, 'replace')
+    elif charset is not None:
+        body = response.text
+    else:
+        body = response.content
+    if not body:
+        raise MalformedSirenError(message='Parameter "response" object had empty response content. Unable to construct siren objects.')
+    return body
+
+
+def _decode_document(codec, body):
+    """
+    Decodes a siren document.
+
+    :param pypermedia.codec.JsonCodec codec: the json codec
+    :param body: json document, other values are returned as they are
+    :return: the decoded document
+    :raises: MalformedSirenError
+    """
+    if not isinstance(body, (six.binary_type, six.text_type)):
+        return body
+    try:
+        return codec.loads(body)
+    except ValueError as e:
+        raise MalformedSirenError(
+            message='Parameter "response" must be valid json. Unable to construct siren objects.',
+            errors=e)
+
+
+def _decode_document_or_error(codec, body):
+    """
+    Decodes a siren document, see _decode_document. Runs in the worker processes of SirenBuilder.from_api_responses.
+
+    :return: the decoded document, or the MalformedSirenError raised decoding it
+    """
+    try:
+        return _decode_document(codec, body)
+    except MalformedSirenError as e:
+        return e
+
+
+def _body_size(body):
+    """
+    :param body: request or response body
+    :return: size of the body in bytes or characters, None when it is streamed
+    :rtype: int
+    """
+    if body is None:
+        return 0
+    if isinstance(body, (six.binary_type, six.text_type)):
+        return len(body)
+    return None
+
+
+def _check_response_status(response):
+    """
+    Checks if the status of the response allows constructing siren objects from it.
 
     :param Response response: The response to check
-    :return: The response body if appropriate.
-    :rtype: unicode
+    :return: False if the status_code is 404, True otherwise
+    :rtype: bool
+    :raises: UnexpectedStatusError
     """
     # not found is equivalent to none
     if response.status_code == 404:
-        return None
+        return False
 
     # return none when the code is errant, we should log this as well
     if response.status_code > 299 or response.status_code < 200:
         raise UnexpectedStatusError(message='Received an unexpected status code of "{0}"! Unable to construct siren objects.'.format(response.status_code))
+    return True
+
+
+def _check_and_decode_response(response):
+    """
+    Checks if the response is valid.  If it is, it returns the response body.  Otherwise it raises an exception or
+    returns None if the status_code is 404.
+
+    :param Response response: The response to check
+    :return: The response body if appropriate.
+    :rtype: unicode
+    """
+    if not _check_response_status(response):
+        return None
 
+    if response.encoding is None:
+        response.encoding = 'utf-8'  # json is utf-8, spares requests detecting the charset from the body
     response = response.text
     if not response:
         raise MalformedSirenError(message='Parameter "response" object had empty response content. Unable to construct siren objects.')
     return response
 
 
-class RequestMixin(object):
-    """Values for any request creating object."""
+class RequestContext(object):
+    """Request settings shared by every object of an entity graph instead of being copied onto each of them."""
+
+    __slots__ = ('request_factory', 'verify', 'session', 'cache', 'codec', 'metrics', 'policy', 'deadline',
+                 'coalescer', 'scheduler')
 
-    def __init__(self, request_factory=Request, verify=False):
+    def __init__(self, request_factory=Request, verify=False, session=None, cache=None, codec=None, metrics=None,
+                 policy=None, deadline=None, coalescer=None, scheduler=None):
         """
         :param type|function request_factory: constructor for request objects
         :param bool verify: whether ssl certificate validation should occur
+        :param requests.Session session: session shared by all requests so that pooled connections are reused, a new
+            session is created per request when this is not provided
+        :param pypermedia.cache.ResponseCache cache: cache of the entities retrieved through links and GET actions
+        :param codec: json codec or its name, the fastest installed codec when None, see pypermedia.codec.get_codec
+        :type codec: pypermedia.codec.JsonCodec or str
+        :param pypermedia.metrics.Metrics metrics: receives the measurements of the requests and their processing
+        :param pypermedia.policy.RequestPolicy policy: timeouts and retries of the requests
+        :param deadline: time budget of the requests made with this context, seconds are started anew for each call
+            or traversal (see traversal_deadline), a started Deadline is shared by all of them
+        :type deadline: pypermedia.policy.Deadline or float
+        :param pypermedia.coalesce.RequestCoalescer coalescer: shares concurrent identical GET requests of links and
+            actions
+        :param pypermedia.schedule.RequestScheduler scheduler: rate and concurrency limits of the requests per host
         """
         self.request_factory = request_factory
         self.verify = verify
+        self.session = session
+        self.cache = cache
+        self.codec = get_codec(codec)
+        self.metrics = metrics
+        self.policy = policy
+        self.deadline = deadline
+        self.coalescer = coalescer
+        self.scheduler = scheduler
+
+    def replace(self, **changes):
+        """
+        :param changes: settings to change
+        :return: a copy of this context with some settings changed
+        :rtype: RequestContext
+        """
+        settings = dict((name, getattr(self, name)) for name in self.__slots__)
+        settings.update(changes)
+        return RequestContext(**settings)
 
 
-class SirenBuilder(RequestMixin):
-    """Responsible for constructing Siren hierarchy objects."""
+def _context_property(name):
+    """
+    Creates a property exposing a setting of the request context. Assigning it gives the object its own copy of the
+    context so that the objects sharing the context are unaffected.
+
+    :param str name: name of the setting
+    :return: the property
+    :rtype: property
+    """
+    def fget(self):
+        return getattr(self.context, name)
 
-    def from_api_response(self, response):
+    def fset(self, value):
+        self.context = self.context.replace(**{name: value})
+    return property(fget, fset)
+
+
+#: started deadline of the traversal running on each thread, see within_deadline
+_traversal = threading.local()
+
+
+def traversal_deadline(requestor):
+    """
+    :param RequestMixin requestor: object about to send a request
+    :return: the deadline of the traversal the request belongs to, else the deadline of the requestor started now
+        when given in seconds, None when unlimited
+    :rtype: pypermedia.policy.Deadline
+    """
+    deadline = getattr(_traversal, 'deadline', None)
+    return deadline if deadline is not None else start_deadline(requestor.deadline)
+
+
+def within_deadline(deadline, fn):
+    """
+    :param pypermedia.policy.Deadline deadline: started deadline of a traversal, None when unlimited
+    :param function fn: function sending requests of the traversal, possibly on another thread
+    :return: function calling fn with the requests it sends bounded by the deadline
+    :rtype: function
+    """
+    if deadline is None:
+        return fn
+
+    def call(*args, **kwargs):
+        previous = getattr(_traversal, 'deadline', None)
+        _traversal.deadline = deadline
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _traversal.deadline = previous
+    return call
+
+
+class RequestMixin(object):
+    """Values for any request creating object."""
+
+    __slots__ = ('context',)
+
+    def __init__(self, request_factory=Request, verify=False, session=None, cache=None, codec=None, metrics=None,
+                 policy=None, deadline=None, coalescer=None, scheduler=None, context=None):
+        """
+        :param type|function request_factory: constructor for request objects
+        :param bool verify: whether ssl certificate validation should occur
+        :param requests.Session session: session shared by all requests so that pooled connections are reused, a new
+            session is created per request when this is not provided
+        :param pypermedia.cache.ResponseCache cache: cache of the entities retrieved through links and GET actions
+        :param codec: json codec or its name, see pypermedia.codec.get_codec
+        :type codec: pypermedia.codec.JsonCodec or str
+        :param pypermedia.metrics.Metrics metrics: receives the measurements of the requests and their processing
+        :param pypermedia.policy.RequestPolicy policy: timeouts and retries of the requests
+        :param deadline: time budget of each call or traversal of this object and the objects it creates, seconds or
+            a started Deadline shared by all of them
+        :type deadline: pypermedia.policy.Deadline or float
+        :param pypermedia.coalesce.RequestCoalescer coalescer: shares concurrent identical GET requests
+        :param pypermedia.schedule.RequestScheduler scheduler: rate and concurrency limits of the requests per host
+        :param RequestContext context: shared request settings, the other arguments are ignored when it is given
+        """
+        self.context = context or RequestContext(request_factory=request_factory, verify=verify, session=session,
+                                                 cache=cache, codec=codec, metrics=metrics, policy=policy,
+                                                 deadline=deadline, coalescer=coalescer, scheduler=scheduler)
+
+    request_factory = _context_property('request_factory')
+    verify = _context_property('verify')
+    session = _context_property('session')
+    cache = _context_property('cache')
+    codec = _context_property('codec')
+    metrics = _context_property('metrics')
+    policy = _context_property('policy')
+    deadline = _context_property('deadline')
+    coalescer = _context_property('coalescer')
+    scheduler = _context_property('scheduler')
+
+    def _request_settings(self):
+        """
+        Request settings shared with the objects created by this one.
+
+        :return: keyword arguments for the constructors of request creating objects
+        :rtype: dict
+        """
+        return dict(context=self.context)
+
+    def send(self, prepared_request, _session=None, stream=False):
+        """
+        Sends a request with the session of this object, retrying it per the policy of this object within the
+        deadline of this object (or of the traversal the request belongs to).
+
+        :param requests.PreparedRequest prepared_request: request to send
+        :param requests.Session _session: session to use in place of the one assigned to this object
+        :param bool stream: whether the body is read on demand instead of being downloaded immediately
+        :return: response from the server
+        :rtype: Response
+        :raises: pypermedia.policy.DeadlineExceeded
+        """
+        s = _session or self.session or Session()
+        deadline = traversal_deadline(self)
+        send = functools.partial(self._send_once, s, stream=stream, deadline=deadline)
+        if self.policy is None and deadline is None:
+            return send(prepared_request, None)
+        name = _requestor_name(self)
+        policy = (self.policy or RequestPolicy()).for_name(name)
+        return policy.send(prepared_request, send, deadline=deadline, metrics=self.metrics, name=name)
+
+    def _send_once(self, session, prepared_request, timeout, stream=False, deadline=None):
+        """
+        Sends a request once, once the scheduler of this object admits it.
+
+        :param requests.Session session: session to send the request with
+        :param requests.PreparedRequest prepared_request: request to send
+        :param tuple timeout: (connect, read) timeout, None to wait forever
+        :param bool stream: whether the body is read on demand instead of being downloaded immediately
+        :param pypermedia.policy.Deadline deadline: started deadline bounding the wait for the scheduler
+        :return: response from the server
+        :rtype: Response
+        :raises: pypermedia.policy.DeadlineExceeded
+        """
+        kwargs = {}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        if stream:
+            kwargs['stream'] = True
+        if self.scheduler is None:
+            return self._transmit(session, prepared_request, **kwargs)
+        name = _requestor_name(self)
+        with self.scheduler.for_name(name).slot(prepared_request, deadline=deadline, metrics=self.metrics,
+                                                name=name) as admission:
+            response = self._transmit(session, prepared_request, **kwargs)
+            if stream:  # the body is read after this returns, the request is in flight until the response is closed
+                admission.release_on_close(response)
+            return response
+
+    def _transmit(self, session, prepared_request, **kwargs):
+        """
+        Sends a request, measuring it.
+
+        :param requests.Session session: session to send the request with
+        :param requests.PreparedRequest prepared_request: request to send
+        :param kwargs: arguments of Session.send
+        :return: response from the server
+        :rtype: Response
+        """
+        stream = kwargs.get('stream', False)
+        with measure(self.metrics, SEND, method=prepared_request.method, url=prepared_request.url) as measurement:
+            response = session.send(prepared_request, verify=self.verify, **kwargs)
+            if measurement.active:
+                measurement.update(status_code=response.status_code, bytes_out=_body_size(prepared_request.body),
+                                   bytes_in=None if stream else len(response.content))
+        return response
+
+
+class BaseSirenBuilder(RequestMixin):
+    """Implementation of SirenBuilder, shared with the links which construct the entities they retrieve."""
+
+    __slots__ = ()
+
+    def from_api_response(self, response, expand_depth=0, expand_rels=None, expand_workers=DEFAULT_EXPAND_WORKERS,
+                          lazy=False):
         """
         Creates a SirenEntity and related siren object graph.
 
         :param response: response item containing siren construction information
         :type response: str or unicode or requests.Response
+        :param int expand_depth: number of levels of link style sub-entities to resolve, see SirenEntity.expand
+        :param list[str] expand_rels: relationships of the link style sub-entities to resolve, all when None
+        :param int expand_workers: number of links retrieved concurrently while expanding
+        :param bool lazy: whether the actions, links and sub-entities of each entity are only constructed when first
+            accessed, errors in them are then raised as MalformedSirenError on access
         :return: siren entity graph
         :rtype: SirenEntity
         :raises: MalformedSirenError
         :raises: TypeError
         """
-        # get string
-        if isinstance(response, Response):
-            response = _check_and_decode_response(response)
-            if response is None:
-                return None
-
-        # convert to dict
-        if isinstance(response, six.string_types):
+        body = _read_body(response, self.metrics)
+        if body is None:
+            return None
+        if isinstance(body, (six.binary_type, six.text_type)):
+            charset = _declared_charset(response) if isinstance(response, Response) else None
+            with measure(self.metrics, DECODE, bytes_in=len(body), charset=charset):
+                body = _decode_document(self.codec, body)
+        with measure(self.metrics, CONSTRUCT):
+            entity = self._build_entity(body, lazy=lazy)
+
+        if expand_depth:
+            entity.expand(rels=expand_rels, depth=expand_depth, max_workers=expand_workers)
+        return entity
+
+    def from_api_responses(self, responses, lazy=False, processes=0, chunksize=DEFAULT_BATCH_CHUNKSIZE):
+        """
+        Creates the entity graphs of many responses at once, with the request settings and codec of this builder.
+        A response which cannot be constructed does not fail the others, its error is returned in its place.
+
+        :param responses: response items containing siren construction information, see from_api_response
+        :type responses: collections.Iterable
+        :param bool lazy: whether the actions, links and sub-entities are constructed on first access
+        :param int processes: number of worker processes decoding the json documents, they are decoded in this
+            process when 0. The decoded documents are copied back to this process so this only pays off for large
+            batches of large documents.
+        :param int chunksize: number of documents sent to a worker process at a time
+        :return: per response and in the same order, its SirenEntity, None when it was not found, or the
+            MalformedSirenError, UnexpectedStatusError or TypeError raised for it
+        :rtype: list
+        """
+        results = []
+        documents = []  # (position, body) of the documents still to decode
+        for response in responses:
             try:
-                response = json.loads(response)
-            except ValueError as e:
-                raise MalformedSirenError(
-                    message='Parameter "response" must be valid json. Unable to construct siren objects.',
-                    errors=e)
+                body = _read_body(response, self.metrics)
+            except (MalformedSirenError, UnexpectedStatusError) as e:
+                body = e
+            if isinstance(body, (six.binary_type, six.text_type)):
+                documents.append((len(results), body))
+            results.append(body)
+
+        decode = functools.partial(_decode_document_or_error, self.codec)
+        bodies = [body for _, body in documents]
+        with measure(self.metrics, DECODE, bytes_in=sum(len(body) for body in bodies), documents=len(bodies)):
+            if processes and len(documents) > 1:
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    decoded = list(executor.map(decode, bodies, chunksize=chunksize))
+            else:
+                decoded = [decode(body) for body in bodies]
+        for (position, _), document in zip(documents, decoded):
+            results[position] = document
+
+        for position, result in enumerate(results):
+            if result is None or isinstance(result, Exception):
+                continue
+            try:
+                with measure(self.metrics, CONSTRUCT):
+                    results[position] = self._build_entity(result, lazy=lazy)
+            except (MalformedSirenError, TypeError) as e:
+                results[position] = e
+        return results
 
+    def _build_entity(self, document, lazy=False):
+        """
+        Constructs the entity graph of a decoded siren document.
+
+        :param dict document: decoded siren document
+        :param bool lazy: whether the actions, links and sub-entities are constructed on first access
+        :return: siren entity graph
+        :rtype: SirenEntity
+        :raises: MalformedSirenError
+        :raises: TypeError
+        """
         # check preferred dict type
-        if type(response) is not dict:
+        if type(document) is not dict:
             raise TypeError('Siren object construction requires a valid response, json, or dict object.')
 
         try:
-            return self._construct_entity(response)
+            return self._construct_entity(document, lazy=lazy)
         except Exception as e:
             raise MalformedSirenError(
                 message='Siren response is malformed and is missing one or more required values. '
                         'Unable to create python object representation.',
                 errors=e)
 
-    def _construct_entity(self, entity_dict):
+    def stream_api_response(self, response, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Incrementally constructs the sub-entities of a large siren response one at a time while the body is read, so
+        that neither the body nor the whole entity graph is held in memory. Send the request with ``stream=True`` for
+        the body to be downloaded on demand.
+
+        :param requests.Response response: response containing the siren entity
+        :param int chunk_size: number of bytes read at a time
+        :return: stream of the sub-entities, None when the entity was not found
+        :rtype: SirenStream
+        :raises: UnexpectedStatusError
+        """
+        if not _check_response_status(response):
+            response.close()
+            return None
+        chunks = response.iter_content(chunk_size)
+        encodings = undecoded_encodings(response)
+        if encodings:
+            chunks = decompress_chunks(chunks, encodings)
+        return SirenStream(self, chunks, encoding=response.encoding or 'utf-8', close=response.close)
+
+    def _construct_entity(self, entity_dict, lazy=False):
         """
         Constructs an entity from a dictionary. Used
         for both entities and embedded sub-entities.
 
         :param dict entity_dict:
+        :param bool lazy: whether the actions, links and sub-entities are constructed on first access
         :return: The SirenEntity representing the object
         :rtype: SirenEntity
         :raises KeyError
@@ -105,28 +898,96 @@ class SirenBuilder(RequestMixin):
         properties = entity_dict.get('properties', {})
         rel = entity_dict.get('rel', [])
 
+        if lazy:
+            siren_entity = self._create_entity(classnames=classname, properties=properties, links=None, rel=rel)
+            siren_entity._defer(self, actions=entity_dict.get('actions'), links=entity_dict.get('links'),
+                                entities=entity_dict.get('entities'))
+            return siren_entity
+
+        actions = self._construct_actions(entity_dict.get('actions', []))
+        links = self._construct_links(entity_dict.get('links', []))
+        entities = self._construct_sub_entities(entity_dict.get('entities', []))
+        siren_entity = self._create_entity(classnames=classname, properties=properties, actions=actions,
+                                           links=links, entities=entities, rel=rel)
+        return siren_entity
+
+    def _construct_actions(self, actions_dicts):
+        """
+        :param list[dict] actions_dicts: siren actions
+        :return: the SirenActions
+        :rtype: list[SirenAction]
+        """
         actions = []  # odd that multiple actions can have the same name, is this for overloading? it will break python!
-        for action_dict in entity_dict.get('actions', []):
-            siren_action = SirenAction(request_factory=self.request_factory, verify=self.verify, **action_dict)
+        for action_dict in actions_dicts:
+            siren_action = self._construct_action(action_dict)
             actions.append(siren_action)
+        return actions
 
+    def _construct_links(self, links_dicts):
+        """
+        :param list[dict] links_dicts: siren links
+        :return: the SirenLinks
+        :rtype: list[SirenLink]
+        """
         links = []  # odd that multiple links can have the same relationship & that because this is a list we could  have overloading?? this will break python!
-        for links_dict in entity_dict.get('links', []):
+        for links_dict in links_dicts:
             link = self._construct_link(links_dict)
             links.append(link)
+        return links
 
+    def _construct_sub_entities(self, entities_dicts, lazy=False):
+        """
+        :param list[dict] entities_dicts: siren sub-entities, either link style or full entities
+        :param bool lazy: whether the full sub-entities are constructed lazily
+        :return: the sub-entities
+        :rtype: list[SirenLink|SirenEntity]
+        """
         entities = []
-        for entities_dict in entity_dict.get('entities', []):
+        for entities_dict in entities_dicts:
             try:  # Try it as a link style subentity
                 entity = self._construct_link(entities_dict)
             except KeyError:  # otherwise assume it is a full subentity
-                entity = self._construct_entity(entities_dict)
+                entity = self._construct_entity(entities_dict, lazy=lazy)
             entities.append(entity)
+        return entities
 
-        siren_entity = SirenEntity(classnames=classname, properties=properties, actions=actions,
-                                   links=links, entities=entities, rel=rel, verify=self.verify,
-                                   request_factory=self.request_factory)
-        return siren_entity
+    def _create_entity(self, **kwargs):
+        """
+        Creates the entity object once its elements have been constructed. Subclasses override this to produce
+        their own entity type.
+
+        :param kwargs: SirenEntity constructor arguments
+        :return: The SirenEntity
+        :rtype: SirenEntity
+        """
+        kwargs.update(self._request_settings())
+        return SirenEntity(**kwargs)
+
+    def _construct_action(self, action_dict):
+        """
+        Constructs an action from the action dictionary.
+
+        :param dict action_dict: A dictionary including at least {name: unicode, href: unicode}
+        :return: A SirenAction representing the action
+        :rtype: SirenAction
+        :raises: TypeError
+        """
+        kwargs = dict(action_dict)
+        kwargs.update(self._request_settings())
+        return SirenAction(**kwargs)
+
+    def construct_link(self, rel, href):
+        """
+        Constructs a link sharing the request settings of the builder, as the links of the entities it constructs do.
+
+        :param rel: relationship or list of relationships of the link
+        :type rel: list[str] or str
+        :param str|unicode href: url of the link
+        :return: the link, of the class of the links the builder constructs
+        :rtype: SirenLink
+        :raises: ValueError
+        """
+        return self._construct_link(dict(rel=rel, href=href))
 
     def _construct_link(self, links_dict):
         """
@@ -139,15 +1000,18 @@ class SirenBuilder(RequestMixin):
         """
         rel = links_dict['rel']
         href = links_dict['href']
-        link = SirenLink(rel=rel, href=href, verify=self.verify, request_factory=self.request_factory)
+        link = SirenLink(rel=rel, href=href, **self._request_settings())
         return link
 
 
-class SirenEntity(RequestMixin):
-    """
-    Represents a siren-entity object. This is the highest-level/root item used by Siren. These represent
-    instances/classes.
-    """
+class SirenBuilder(BaseSirenBuilder):
+    """Responsible for constructing Siren hierarchy objects."""
+
+
+class BaseSirenEntity(RequestMixin):
+    """Implementation of SirenEntity shared with CompactSirenEntity, it declares its attributes as slots."""
+
+    __slots__ = ('_classnames', '_rel', 'properties', '_actions', '_links', '_entities', '_deferred', '_holders')
 
     log = logging.getLogger(__name__)
 
@@ -166,48 +1030,380 @@ class SirenEntity(RequestMixin):
         :type actions:
         :raises: ValueError
         """
-        super(SirenEntity, self).__init__(**kwargs)
+        super(BaseSirenEntity, self).__init__(**kwargs)
         if not classnames or len(classnames) == 0:
             raise ValueError('Parameter "classnames" must have at least one element.')
-        self.classnames = classnames
-        self.rel = rel
+        self._classnames = classnames if classnames.__class__ is _KeyList else _key_list(classnames)
+        self._rel = rel if rel is None or rel.__class__ is _KeyList else _key_list(rel)
 
         self.properties = properties if properties else {}
-        self.actions = actions if actions else []
+        self._deferred = None
+        self._holders = None
+        # the lists are assigned to their slots directly (rather than through the properties) as this is a hot path
+        self._actions = _IndexedList(actions) if actions else _IndexedList()
+
+        # links are supposed to be of size 0 or more because they should contain at least a link to self
+        # this is not the case for error messages currently so I'm removing this check
+        #if not links or len(links) == 0:
+        #    raise ValueError('Parameter "links" must have at least one element.')
+        self._links = _IndexedList(links) if links else _IndexedList()  # indexed by rel on lookup, see _lookup
+        self._entities = _IndexedList(entities) if entities else _IndexedList()
+
+    def _defer(self, siren_builder, actions=None, links=None, entities=None):
+        """
+        Defers the construction of the actions, links and sub-entities of this entity until they are first accessed.
+
+        :param SirenBuilder siren_builder: builder constructing the elements
+        :param list[dict] actions: siren actions
+        :param list[dict] links: siren links
+        :param list[dict] entities: siren sub-entities, full sub-entities are constructed lazily as well
+        """
+        self._deferred = dict(builder=siren_builder)
+        for name, dicts in (('actions', actions), ('links', links), ('entities', entities)):
+            if dicts:
+                self._deferred[name] = dicts
+
+    def _materialize(self, name):
+        """
+        Constructs a deferred element list, dropping its dictionaries once constructed. Threads accessing the list
+        concurrently may each construct it, only the first constructed list is kept.
+
+        :param str name: 'actions', 'links' or 'entities'
+        :raises: MalformedSirenError
+        """
+        deferred = self._deferred
+        dicts = deferred.get(name) if deferred else None
+        if dicts is None:
+            return
+        siren_builder = deferred['builder']
+        try:
+            if name == 'actions':
+                value = siren_builder._construct_actions(dicts)
+            elif name == 'links':
+                value = siren_builder._construct_links(dicts)
+            else:
+                value = siren_builder._construct_sub_entities(dicts, lazy=True)
+        except Exception as e:
+            raise MalformedSirenError(
+                message='Siren {0} are malformed and are missing one or more required values. '
+                        'Unable to create python object representation.'.format(name),
+                errors=e)
+        value = _indexed(value)
+        with _MATERIALIZE_LOCK:
+            if name in deferred:  # not installed by another thread or replaced by a setter meanwhile
+                setattr(self, '_' + name, value)
+                del deferred[name]  # after the list is set, as readers only check the deferred dictionary
+            if len(deferred) == 1 and self._deferred is deferred:
+                self._deferred = None
+
+    def __copy__(self):
+        with _MATERIALIZE_LOCK:  # the lists and the deferred dictionaries are taken together
+            new = _shallow_copy(self)
+            deferred = self._deferred
+            if deferred:  # each copy constructs its own deferred elements
+                new._deferred = dict(deferred)
+        return new
+
+    def __deepcopy__(self, memo):
+        """
+        Copies the entity graph: properties, relationships, classnames, actions, links and sub-entities. The request
+        context and the dictionaries of the deferred elements are shared.
+        """
+        new = memo[id(self)] = copy.copy(self)
+        new._classnames = _copy_keys(new._classnames)
+        new._rel = _copy_keys(new._rel)
+        new.properties = _copy_json(new.properties)
+        for name in ('_actions', '_links', '_entities'):
+            setattr(new, name, _IndexedList([copy.deepcopy(x, memo) for x in getattr(new, name)]))
+        return new
+
+    classnames = _key_property('_classnames')
+    rel = _key_property('_rel')
+
+    @property
+    def actions(self):
+        if self._deferred is not None:
+            self._materialize('actions')
+        return self._actions
+
+    @actions.setter
+    def actions(self, value):
+        value = _indexed(value)
+        with _MATERIALIZE_LOCK:
+            if self._deferred:
+                self._deferred.pop('actions', None)
+            self._actions = value
+
+    @property
+    def links(self):
+        if self._deferred is not None:
+            self._materialize('links')
+        return self._links
+
+    @links.setter
+    def links(self, value):
+        value = _indexed(value)
+        with _MATERIALIZE_LOCK:
+            if self._deferred:
+                self._deferred.pop('links', None)
+            self._links = value
+
+    @property
+    def entities(self):
+        if self._deferred is not None:
+            self._materialize('entities')
+        return self._entities
+
+    @entities.setter
+    def entities(self, value):
+        value = _indexed(value)
+        with _MATERIALIZE_LOCK:
+            if self._deferred:
+                self._deferred.pop('entities', None)
+            self._entities = value
+
+    def get_links(self, rel):
+        """
+        Obtains a link based upon relationship value.
+
+        :param rel: relationship between this entity and the linked resource
+        :type rel: str
+        :return: link to the resource with the specified relationship
+        :rtype: SirenEntity
+        """
+        if not self.links:
+            return None
+
+        return list(self._lookup('links_by_rel', rel))
+
+    def get_entities(self, rel):
+        """
+        Obtains an entity based upon the relationship value.
+
+        :param rel: relationship between this entity and the linked resource
+        :type rel: str
+        :return: link to the resource with the specified relationship
+        :rtype: list
+        """
+        if not self.entities:
+            return []
+        return list(self._lookup('entities_by_rel', rel))
+
+    def get_entities_by_class(self, classname):
+        """
+        Obtains the full sub-entities with a classname.
+
+        :param str classname: classname of the sub-entities
+        :return: the sub-entities with the classname
+        :rtype: list[SirenEntity]
+        """
+        return list(self._lookup('entities_by_class', classname))
+
+    def get_action(self, name):
+        """
+        Obtains an action based upon its name.
+
+        :param str name: name of the action
+        :return: the first action with the name, None when there is none
+        :rtype: SirenAction
+        """
+        actions = self._lookup('actions_by_name', name)
+        return actions[0] if actions else None
+
+    def add_action(self, action):
+        """
+        :param SirenAction action: action to add to this entity
+        """
+        self.actions.append(action)
+
+    def add_link(self, link):
+        """
+        :param SirenLink link: link to add to this entity
+        """
+        self.links.append(link)
+
+    def add_entity(self, entity):
+        """
+        :param entity: sub-entity to add to this entity
+        :type entity: SirenEntity or SirenLink
+        """
+        self.entities.append(entity)
+
+    def _lookup(self, name, key):
+        """
+        Looks up items in an index of this entity, see _IndexedList.
+
+        :param str name: 'links_by_rel', 'entities_by_rel', 'entities_by_class' or 'actions_by_name'
+        :param str key: value to look up
+        :return: the matching items in their original order
+        :rtype: list
+        """
+        if name == 'links_by_rel':
+            items = self.links
+        elif name == 'actions_by_name':
+            items = self.actions
+        else:
+            items = self.entities
+        return items.lookup(name, key)
+
+    def expand(self, rels=None, depth=1, max_workers=DEFAULT_EXPAND_WORKERS):
+        """
+        Resolves the link style sub-entities of this entity graph in place, replacing each with the entity it links
+        to. Links are retrieved concurrently on a bounded thread pool and identical hrefs are only retrieved once.
+        Each level of the graph is resolved before the next so that ``depth`` bounds how far the expansion reaches,
+        the sub-entities of both embedded and retrieved entities form the next level. Links which are not found are
+        left in place. The deadline of this entity bounds the whole expansion.
+
+        :param rels: relationships of the sub-entities to resolve, all link style sub-entities when None
+        :type rels: list[str] or str
+        :param int depth: number of levels to resolve
+        :param int max_workers: number of links retrieved concurrently, the session's pool should be at least as large
+        :return: this entity
+        :rtype: SirenEntity
+        """
+        if isinstance(rels, six.string_types):
+            rels = [rels]
+
+        futures = {}
+        deadline = traversal_deadline(self)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            level = [self]
+            for _ in range(depth):
+                # submit every link of this level before waiting on any of them
+                pending = BaseSirenEntity._find_expandable_links(level, rels)
+                for _, _, link in pending:
+                    if link.href not in futures:
+                        futures[link.href] = executor.submit(within_deadline(deadline, link.retrieve))
+
+                level = BaseSirenEntity._replace_expanded_links(level, pending,
+                                                            dict((href, f.result()) for href, f in futures.items()))
+                if not level:
+                    break
+        return self
+
+    @staticmethod
+    def _find_expandable_links(level, rels):
+        """
+        Finds the link style sub-entities of one level of an entity graph which should be expanded.
 
-        # links are supposed to be of size 0 or more because they should contain at least a link to self
-        # this is not the case for error messages currently so I'm removing this check
-        #if not links or len(links) == 0:
-        #    raise ValueError('Parameter "links" must have at least one element.')
-        self.links = links or [] # store this as a dictionary of rel->siren, also ensure that rels are not duplicated
-        self.entities = entities or []
+        :param list[SirenEntity] level: entities of the level
+        :param list[str] rels: relationships of the links to expand, all when None
+        :return: the parent entity, index in its sub-entities and link for each link to expand
+        :rtype: list[tuple]
+        """
+        pending = []
+        for entity in level:
+            for index, sub_entity in enumerate(entity.entities):
+                if not isinstance(sub_entity, BaseSirenLink):
+                    continue
+                if rels is not None and not any(rel in sub_entity.rel for rel in rels):
+                    continue
+                pending.append((entity, index, sub_entity))
+        return pending
 
-    def get_links(self, rel):
+    @staticmethod
+    def _replace_expanded_links(level, pending, linked_entities):
         """
-        Obtains a link based upon relationship value.
+        Replaces the expanded links of one level with the entities they link to.
 
-        :param rel: relationship between this entity and the linked resource
-        :type rel: str
-        :return: link to the resource with the specified relationship
-        :rtype: SirenEntity
+        :param list[SirenEntity] level: entities of the level
+        :param list[tuple] pending: links as returned by _find_expandable_links
+        :param dict linked_entities: linked entity (None when not found) by href
+        :return: the entities of the next level
+        :rtype: list[SirenEntity]
         """
-        if not self.links:
-            return None
+        next_level = []
+        for entity in level:
+            next_level.extend(x for x in entity.entities if isinstance(x, BaseSirenEntity))
 
-        return [x for x in self.links if rel in x.rel]  # should change this so that links are added to an internal dictionary? this seems like a flaw in siren
+        resolved = set()
+        for entity, index, link in pending:
+            linked = linked_entities[link.href]
+            if linked is None:
+                continue
+            # the linked entity may be shared by several links, the copy carries the rel of each of them and shares
+            # the sub-entities (constructed first when deferred) so that expanding the next level expands every copy
+            linked_entities_list = linked.entities
+            linked_copy = copy.copy(linked)
+            linked_copy.entities = linked_entities_list
+            linked_copy.rel = list(link.rel)
+            entity.entities[index] = linked_copy
+            if id(linked) not in resolved:
+                resolved.add(id(linked))
+                next_level.append(linked)
+        return next_level
+
+    def iter_pages(self, rel='next', prefetch=DEFAULT_PREFETCH_PAGES, max_pages=None, _deadline=None):
+        """
+        Yields this entity followed by each page reached by following the first link with a relationship. The
+        following pages are retrieved in the background while the current one is consumed. The deadline of this
+        entity bounds the whole pagination.
+
+        :param str rel: relationship of the link to the following page
+        :param int prefetch: number of pages retrieved ahead of the page being consumed
+        :param int max_pages: maximum number of pages yielded, including this one, all when None
+        :param pypermedia.policy.Deadline _deadline: started deadline to use in place of the one of this entity
+        :return: generator of the pages
+        :rtype: generator
+        """
+        if max_pages is not None and max_pages < 1:
+            return
+
+        retrieve_next_page = within_deadline(_deadline or traversal_deadline(self), BaseSirenEntity._retrieve_next_page)
+        page = self
+        count = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            try:
+                while page is not None:
+                    count += 1
+                    # each page is retrieved from the link of the one before it, the single worker keeps them in order
+                    while len(pending) < prefetch and (max_pages is None or count + len(pending) < max_pages):
+                        previous = pending[-1] if pending else page
+                        pending.append(executor.submit(retrieve_next_page, previous, rel))
+                    yield page
+
+                    if max_pages is not None and count >= max_pages:
+                        break
+                    if not pending:
+                        pending.append(executor.submit(retrieve_next_page, page, rel))
+                    page = pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_paged_entities(self, rel=None, next_rel='next', prefetch=DEFAULT_PREFETCH_PAGES, max_pages=None,
+                            _deadline=None):
+        """
+        Yields the sub-entities of this entity and of each following page, see iter_pages.
+
+        :param str rel: relationship of the sub-entities to yield, all when None
+        :param str next_rel: relationship of the link to the following page
+        :param int prefetch: number of pages retrieved ahead of the page being consumed
+        :param int max_pages: maximum number of pages read, including this one, all when None
+        :param pypermedia.policy.Deadline _deadline: started deadline to use in place of the one of this entity
+        :return: generator of the sub-entities
+        :rtype: generator
+        """
+        for page in self.iter_pages(rel=next_rel, prefetch=prefetch, max_pages=max_pages, _deadline=_deadline):
+            for entity in (page.entities if rel is None else page.get_entities(rel) or []):
+                yield entity
 
-    def get_entities(self, rel):
+    @staticmethod
+    def _retrieve_next_page(previous, rel):
         """
-        Obtains an entity based upon the relationship value.
+        Retrieves the page following another.
 
-        :param rel: relationship between this entity and the linked resource
-        :type rel: str
-        :return: link to the resource with the specified relationship
-        :rtype: list
+        :param previous: the previous page, or the future retrieving it
+        :type previous: SirenEntity or Future
+        :param str rel: relationship of the link to the following page
+        :return: the following page, None when there is none
+        :rtype: SirenEntity
         """
-        if not self.entities:
-            return []
-        return [x for x in self.entities if rel in x.rel]
+        if isinstance(previous, Future):
+            previous = previous.result()
+        links = previous.get_links(rel) if previous is not None else None
+        return links[0].retrieve() if links else None
 
     def get_primary_classname(self):
         """
@@ -250,42 +1446,102 @@ class SirenEntity(RequestMixin):
         :rtype: str
         """
         new_dict = self.as_siren()
-        return json.dumps(new_dict)
+        return self.codec.dumps(new_dict)
 
     def as_python_object(self):
         """
-        Programmatically create a python object for this siren entity.
+        Programmatically create a python object for this siren entity. The class of the object is generated once per
+        shape (classnames, action names and link relationships) and cached in ``model_classes``, the object is bound
+        to this entity which its methods use to make their requests.
 
         :return: dynamically created object based upon the siren response, type is based upon the classname(s) of this
         siren entity
         :rtype: object
         """
-        ModelClass = type(str(self.get_primary_classname()), (), self.properties)
+        with measure(self.metrics, PYTHON_OBJECT, self.get_primary_classname()):
+            key = (type(self), tuple(self.classnames), tuple(action.name for action in self.actions),
+                   tuple(tuple(link.rel) for link in self.links))
+            ModelClass = model_classes.get_or_create(key, self._create_model_class)
+
+            obj = ModelClass()
+            properties = self.properties
+            if not ModelClass._siren_method_names.isdisjoint(properties):
+                # methods take precedence over properties with the same name
+                properties = dict((k, v) for k, v in properties.items() if k not in ModelClass._siren_method_names)
+            obj.__dict__.update(properties)
+            obj._siren_entity = self
+        return obj
+
+    def _create_model_class(self):
+        """
+        Creates the python class for entities shaped like this one.
+
+        :return: class whose methods call the actions and links of the entity bound to each instance
+        :rtype: type
+        """
+        ModelClass = type(str(self.get_primary_classname()), (), {})
 
         # NOTE: there is no checking to ensure that over-writing of methods will not occur
-        siren_builder = SirenBuilder(verify=self.verify, request_factory=self.request_factory)
+        method_names = set()
         # add actions as methods
-        for action in self.actions:
-            method_name = SirenEntity._create_python_method_name(action.name)
-            method_def = _create_action_fn(action, siren_builder)
+        for index, action in enumerate(self.actions):
+            method_name = BaseSirenEntity._create_python_method_name(action.name)
+            method_def = self._create_method('actions', index)
             setattr(ModelClass, method_name, method_def)
+            method_names.add(method_name)
 
         # add links as methods
-        for link in self.links:
+        for index, link in enumerate(self.links):
             for rel in link.rel:
-                method_name = SirenEntity._create_python_method_name(rel)
-                siren_builder = SirenBuilder(verify=self.verify, request_factory=self.request_factory)
-                method_def = _create_action_fn(link, siren_builder)
+                method_name = BaseSirenEntity._create_python_method_name(rel)
+                method_def = self._create_method('links', index)
 
                 setattr(ModelClass, method_name, method_def)
+                method_names.add(method_name)
 
+        setattr(ModelClass, 'get_entities', self._create_get_entities_fn())
+        method_names.add('get_entities')
+        ModelClass._siren_method_names = frozenset(method_names)
+
+        return ModelClass
+
+    def _create_builder(self):
+        """
+        Creates the builder used by the generated methods to interpret responses.
+
+        :return: builder sharing the request settings of this entity
+        :rtype: SirenBuilder
+        """
+        return SirenBuilder(**self._request_settings())
+
+    def _create_method(self, kind, index):
+        """
+        Creates the python method for an action or link of entities shaped like this one.
+
+        :param str kind: 'actions' or 'links', the list holding the action or link called by the method
+        :param int index: position of the action or link in that list
+        :return: method making the request and returning a new proxy object
+        :rtype: function
+        """
+        def _model_method(obj, **kwargs):
+            entity = obj._siren_entity
+            requestor = getattr(entity, kind)[index]
+            return _call_requestor(requestor, entity._create_builder(), **kwargs)
+        return _model_method
+
+    def _create_get_entities_fn(self):
+        """
+        Creates the ``get_entities`` method of the python object which yields the sub-entities with a relationship as
+        python objects.
+
+        :return: generator method taking the relationship
+        :rtype: function
+        """
         def get_entity(obj, rel):
-            matching_entities = self.get_entities(rel) or []
+            matching_entities = obj._siren_entity.get_entities(rel) or []
             for x in matching_entities:
                 yield x.as_python_object()
-        setattr(ModelClass, 'get_entities', get_entity)
-
-        return ModelClass()
+        return get_entity
 
     @staticmethod
     def _create_python_method_name(base_name):
@@ -301,21 +1557,30 @@ class SirenEntity(RequestMixin):
 
         # normalize value
         name = name.lower()
-        name = re.sub(r'-', '_', name)
-        name = re.sub(r'[^a-zA-Z0-9_]', '', name)
+        name = name.replace('-', '_')
+        name = _INVALID_METHOD_CHARACTERS.sub('', name)
 
         # confirm the name is valid
-        matcher = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')  # see https://docs.python.org/2/reference/lexical_analysis.html#grammar-token-identifier
-        if matcher.match(name):
+        if _METHOD_NAME_MATCHER.match(name):
             return name
 
         raise ValueError('Unable to create normalized python method name! Base method name="{}". Attempted normalized name="{}"'.format(base_name, name))
 
 
-class SirenAction(RequestMixin):
-    """Representation of a Siren Action element. Actions are operations on a hypermedia instance or class level."""
+class SirenEntity(BaseSirenEntity):
+    """
+    Represents a siren-entity object. This is the highest-level/root item used by Siren. These represent
+    instances/classes.
+    """
+
 
-    def __init__(self, name, href, type='application/json', fields=None, title=None, method='GET', verify=False, request_factory=Request, **kwargs):
+class BaseSirenAction(RequestMixin):
+    """Implementation of SirenAction shared with CompactSirenAction, it declares its attributes as slots."""
+
+    __slots__ = ('_name', 'title', 'method', 'href', 'type', 'fields', '_compiled_request', '_holders')
+
+    def __init__(self, name, href, type=FORM_TYPE, fields=None, title=None, method='GET', verify=False,
+                 request_factory=Request, session=None, **kwargs):
         """
         Constructor.
 
@@ -323,7 +1588,7 @@ class SirenAction(RequestMixin):
         :type name: str|unicode
         :param href: url associated with the method
         :type href: str|unicode
-        :param type: content-type of the payload
+        :param type: content-type of the payload, form encoded when not declared as per the siren spec
         :type type: str|unicode
         :param fields: list of fields to send with this action/request (parameters, either post or query)
         :type fields: list[dict]
@@ -333,15 +1598,26 @@ class SirenAction(RequestMixin):
         :type method: str|unicode
         :param request_factory: constructor for request objects
         :type type or function
+        :param requests.Session session: session shared by requests made by this action
         :param dict kwargs:  Extra stuff to ignore for now.
         """
-        self.name = name
+        self._name = name
         self.title = title
         self.method = method
         self.href = href
         self.type = type
         self.fields = fields if fields else []
-        super(SirenAction, self).__init__(request_factory=request_factory, verify=verify, **kwargs)
+        self._compiled_request = None
+        self._holders = None
+        super(BaseSirenAction, self).__init__(request_factory=request_factory, verify=verify, session=session, **kwargs)
+
+    name = _key_property('_name')
+
+    def __deepcopy__(self, memo):
+        """Copies the action and its fields, the request context is shared."""
+        new = memo[id(self)] = _shallow_copy(self)
+        new.fields = _copy_json(self.fields)
+        return new
 
     @staticmethod
     def create_field(name, type=None, value=None):
@@ -385,27 +1661,33 @@ class SirenAction(RequestMixin):
             fields_dict[f['name']] = f.get('value', None)
         return fields_dict
 
-    def _get_bound_href(self, template_class, **kwfields):
+    def _get_bound_href(self, template_class=None, **kwfields):
         """
         Gets the bound href and the
         remaining variables
 
+        :param type template_class: template class such as TemplatedString parsing the href on each call, the href
+            is compiled once as a uri template (RFC 6570) with compile_template when None
         :param dict kwargs:
         :return: The templated string representing
             the href and the remaining variables
             to place in the query or request body.
         :rtype: str|unicode, dict
+        :raises: ValueError
         """
         # bind template variables
         # bind and remove these the fields so that they do not get passed on
+        if template_class is None:
+            return _bind_template(compile_template(self.href), self.href, kwfields)
+
         templated_href = template_class(self.href)
         url_params = dict(kwfields)
         bound_href = templated_href.bind(**url_params)
         if bound_href.has_unbound_variables():
             raise ValueError('Unbound template parameters in url detected! All variables must be specified! Unbound variables: {}'.format(bound_href.unbound_variables()))
         bound_href = bound_href.as_string()
-
         url_variables = templated_href.unbound_variables()
+
         request_fields = {}
         for k, v in kwfields.items():
             if k not in url_variables:  # remove template variables
@@ -431,7 +1713,7 @@ class SirenAction(RequestMixin):
         :rtype: str
         """
         new_dict = self.as_siren()
-        return json.dumps(new_dict)
+        return self.codec.dumps(new_dict)
 
     def as_request(self, **kwfields):
         """
@@ -441,65 +1723,201 @@ class SirenAction(RequestMixin):
         :return: Request object representation of this action
         :rtype: Request
         """
-        bound_href, request_fields = self._get_bound_href(TemplatedString, **kwfields)
+        return self._request_builder()(kwfields)
 
-        # update query/post parameters specified from sirenaction with remaining arg values
-        # (we ignore anything not specified for the action)
-        fields = self.get_fields_as_dict()
-        fields.update(request_fields)
-
-        # prepare the parameters for serialization
-        fields = self.prepare_payload_parameters(**fields)
-
-        # depending upon the method we need to use params or data for field transmission
-        if self.method == 'GET':
-            req = self.request_factory(self.method, bound_href, params=fields)
-        elif self.method in ['PUT', 'POST', 'PATCH']:
-            req = self.request_factory(self.method, bound_href, data=fields)
-        else:
-            req = self.request_factory(self.method, bound_href)
+    def _request_builder(self):
+        """
+        Gets the request builder of this action, compiling it on first use and again once the href, method, request
+        settings, or names or values of the fields changed.
 
-        return req.prepare()
+        :return: the request builder
+        :rtype: ActionRequestBuilder
+        """
+        compiled = self._compiled_request
+        if compiled is None or not compiled.is_current(self):
+            compiled = self._compiled_request = ActionRequestBuilder(self)
+        return compiled
 
     def make_request(self, _session=None, **kwfields):
         """
         Performs the request.
 
+        :param requests.Session _session: session to use in place of the one assigned to this action
         :param kwfields: additional items to add to the underlying request object
         :return: response from the server
         :rtype: Response
         """
-        s = _session or Session()
-        return s.send(self.as_request(**kwfields), verify=self.verify)
+        return self.send(self.as_request(**kwfields), _session=_session)
+
+    def make_requests(self, kwfields_list, concurrency=DEFAULT_BULK_CONCURRENCY, _session=None):
+        """
+        Performs the request of this action once per set of fields, ``concurrency`` requests at a time. The href is
+        compiled and the field values gathered once for every request, the requests share a pooled session and the
+        sets of fields are consumed as the requests complete so that large iterables are not held in memory.
+
+        :param kwfields_list: query/post parameters of each request
+        :type kwfields_list: collections.Iterable[dict]
+        :param int concurrency: number of requests in flight at a time, the session should pool as many connections
+        :param requests.Session _session: session to use in place of the one assigned to this action, a session
+            pooling ``concurrency`` connections is created when neither is set
+        :return: generator yielding per set of fields and in the same order, its SirenEntity, None when it was not
+            found, or the exception raised for it
+        :rtype: generator
+        """
+        session = _session or self.session or create_session(pool_maxsize=concurrency)
+        builder = SirenBuilder(**self._request_settings())
+        request_builder = self._request_builder()
+        name = _requestor_name(self)
+
+        def request(kwfields):
+            with operation(self.metrics, name):
+                return _retrieve_entity(self, builder, request_builder(kwfields), session)
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                for kwfields in kwfields_list:
+                    # keep the workers busy while the oldest result is consumed
+                    pending.append(executor.submit(request, kwfields))
+                    if len(pending) >= 2 * concurrency:
+                        yield _result_or_error(pending.popleft())
+                while pending:
+                    yield _result_or_error(pending.popleft())
+            finally:
+                for future in pending:
+                    future.cancel()
 
     @staticmethod
     def prepare_payload_parameters(**params):
         """
-        Prepares parameters for their serialized json representation.
+        Prepares parameters for their serialized json representation with the default codec, ``as_request`` uses the
+        codec of the action.
 
         :param params: query/post parameters
         :return: dictionary of prepared parameters
         :rtype: dict[str, str]
         """
-        result = {}
-        for k, v in params.items():
-            if not v:
-                continue
+        return _prepare_payload(get_codec(), params)
 
-            if not isinstance(v, six.string_types):
-                v = json.dumps(v)
 
-            result[k] = v
-        return result
+class SirenAction(BaseSirenAction):
+    """Representation of a Siren Action element. Actions are operations on a hypermedia instance or class level."""
 
 
-class SirenLink(SirenBuilder):
+class ActionRequestBuilder(object):
     """
-    Representation of a Link in Siren. Links are traversals to related objects that exist outside of normal entity
-    (parent-child) ownership.
+    Creates the requests of an action with the work which does not depend on the values of a request done once: the
+    href is compiled, the encoding of the fields is chosen and the default field values are serialized and encoded,
+    so that a request only encodes the values it is given. Builders are immutable and may be shared by threads.
+
+    GET requests send the fields as query parameters. PUT, POST and PATCH requests send them as their body, encoded
+    per the type of the action:
+
+    * ``application/json`` (and ``+json`` types): a json object serialized once, fields whose value is None are
+      omitted
+    * ``multipart/form-data``: a streamed multipart body, file-like values and (filename, file[, content type]) tuples
+      are sent as files read a chunk at a time, fields whose value is None are omitted
+    * ``application/x-www-form-urlencoded``, the default: url encoded fields, values which are not strings being
+      serialized as json, fields with empty values are omitted
+
+    The other methods send no fields.
     """
 
-    def __init__(self, rel, href, verify=False, request_factory=Request):
+    __slots__ = ('href', 'method', 'type', 'fields', 'field_state', 'context', 'template', 'encoding', 'defaults',
+                 'headers')
+
+    def __init__(self, action):
+        """
+        :param BaseSirenAction action: the action
+        :raises: ValueError
+        """
+        self.href = action.href
+        self.method = action.method
+        self.type = action.type
+        self.fields = action.fields
+        self.field_state = _field_state(action.fields)
+        self.context = action.context
+        self.template = compile_template(action.href)
+        self.encoding = _payload_encoding(action.method, action.type)
+        self.headers = None
+
+        # (we ignore anything not specified for the action)
+        defaults = action.get_fields_as_dict()
+        if self.encoding == JSON_ENCODING:
+            self.defaults = dict((k, v) for k, v in defaults.items() if v is not None)
+            self.headers = {'Content-Type': action.type}
+        elif self.encoding == MULTIPART_ENCODING:
+            self.defaults = dict((k, _multipart_part(action.codec, k, v)) for k, v in defaults.items()
+                                 if v is not None)
+        else:
+            defaults = _prepare_payload(action.codec, defaults)
+            self.defaults = dict((k, _encode_field(k, v)) for k, v in defaults.items())
+            if self.encoding == FORM_ENCODING:
+                self.headers = FORM_HEADERS
+
+    def is_current(self, action):
+        """
+        :param BaseSirenAction action: the action this builder was compiled from
+        :return: whether the action is unchanged since, see BaseSirenAction._request_builder
+        :rtype: bool
+        """
+        return (self.context is action.context and self.fields is action.fields and self.href == action.href and
+                self.method == action.method and self.type == action.type and self.field_state == action.fields)
+
+    def __call__(self, kwfields):
+        """
+        :param dict kwfields: query/post parameters to add to the request
+        :return: prepared request
+        :rtype: requests.PreparedRequest
+        :raises: ValueError
+        """
+        bound_href, request_fields = _bind_template(self.template, self.href, kwfields)
+        request_factory = self.context.request_factory
+        if self.encoding is None:
+            return request_factory(self.method, bound_href).prepare()
+
+        fields = self.defaults.copy()
+        codec = self.context.codec
+        if self.encoding == JSON_ENCODING:
+            for k, v in request_fields.items():
+                if v is None:
+                    fields.pop(k, None)
+                else:
+                    fields[k] = v
+            body = codec.dumps(fields).encode('utf-8')
+            return request_factory(self.method, bound_href, data=body, headers=self.headers).prepare()
+
+        if self.encoding == MULTIPART_ENCODING:
+            for k, v in request_fields.items():
+                if v is None:
+                    fields.pop(k, None)
+                else:
+                    fields[k] = _multipart_part(codec, k, v)
+            body = MultipartBody(list(fields.values()))
+            return request_factory(self.method, bound_href, data=body,
+                                   headers={'Content-Type': body.content_type}).prepare()
+
+        # update the encoded defaults with the remaining arg values, empty values are dropped
+        for k, v in request_fields.items():
+            if not v:
+                fields.pop(k, None)
+            else:
+                fields[k] = _encode_field(k, v if isinstance(v, six.string_types) else codec.dumps(v))
+        encoded = '&'.join(fields.values())
+
+        if self.encoding == QUERY_ENCODING:
+            return request_factory(self.method, bound_href, params=encoded).prepare()
+        if not encoded:
+            return request_factory(self.method, bound_href).prepare()
+        return request_factory(self.method, bound_href, data=encoded, headers=self.headers).prepare()
+
+
+class BaseSirenLink(BaseSirenBuilder):
+    """Implementation of SirenLink shared with CompactSirenLink, it declares its attributes as slots."""
+
+    __slots__ = ('_rel', 'href', '_holders')
+
+    def __init__(self, rel, href, verify=False, request_factory=Request, **kwargs):
         """
         Constructor.
 
@@ -509,6 +1927,7 @@ class SirenLink(SirenBuilder):
         :type href: str
         :param request_factory: constructor for request objects
         :type type or function
+        :param kwargs: remaining request settings (session, cache) shared with the entities it retrieves
         :raises: ValueError
         """
         if not rel:
@@ -516,14 +1935,22 @@ class SirenLink(SirenBuilder):
 
         if isinstance(rel, six.string_types):
             rel = [rel, ]
-        self.rel = list(rel)
+        self._rel = _new_key_list(rel)
 
         if not href or not isinstance(href, six.string_types):
             raise ValueError('Parameter "href" must be a string.')
         self.href = href
+        self._holders = None
 
-        self.verify = verify
-        self.request_factory = request_factory
+        super(BaseSirenLink, self).__init__(verify=verify, request_factory=request_factory, **kwargs)
+
+    rel = _key_property('_rel')
+
+    def __deepcopy__(self, memo):
+        """Copies the link and its relationships, the request context is shared."""
+        new = memo[id(self)] = _shallow_copy(self)
+        new._rel = _copy_keys(self._rel)
+        return new
 
     def add_rel(self, new_rel):
         """
@@ -562,7 +1989,7 @@ class SirenLink(SirenBuilder):
         :rtype: unicode
         """
         new_dict = self.as_siren()
-        return json.dumps(new_dict)
+        return self.codec.dumps(new_dict)
 
     def as_request(self, **kwfields):
         """
@@ -585,20 +2012,212 @@ class SirenLink(SirenBuilder):
         :return: The SirenEntity constructed from the respons from the api.
         :rtype: SirenEntity
         """
-        resp = self.make_request(_session=_session)
-        siren_entity = self.from_api_response(resp)
+        siren_entity = self.retrieve(_session=_session)
         return siren_entity.as_python_object()
 
+    def retrieve(self, _session=None):
+        """
+        Retrieves the entity this link refers to.
+
+        :param requests.Session _session: session to use in place of the one assigned to this link
+        :return: The SirenEntity constructed from the response, None when it was not found
+        :rtype: SirenEntity
+        """
+        with operation(self.metrics, _requestor_name(self)):
+            if self.coalescer is not None:
+                request = self.as_request()
+                return self.coalescer.fetch(request, functools.partial(_fetch_entity, self, self, request, _session))
+            if self.cache is None:
+                resp = self.make_request(_session=_session)
+                return self.from_api_response(resp)
+            return _fetch_entity(self, self, self.as_request(), _session)
+
     def make_request(self, _session=None, **kwfields):
         """
         Performs retrieval of the link from the external server.
 
+        :param requests.Session _session: session to use in place of the one assigned to this link
         :param kwfields: query/post parameters to add to the request, parameter type depends upon HTTP verb in use  # limitation of siren
         :return: Request object representation of this action
         :rtype: Request
         """
-        s = _session or Session()
-        return s.send(self.as_request(**kwfields), verify=self.verify)
+        return self.send(self.as_request(**kwfields), _session=_session)
+
+    def stream(self, _session=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Retrieves the entity this link refers to as a stream of its sub-entities, see
+        SirenBuilder.stream_api_response. The response cache is bypassed.
+
+        :param requests.Session _session: session to use in place of the one assigned to this link
+        :param int chunk_size: number of bytes read at a time
+        :return: stream of the sub-entities, None when the entity was not found
+        :rtype: SirenStream
+        """
+        resp = self.send(self.as_request(), _session=_session, stream=True)
+        return self.stream_api_response(resp, chunk_size=chunk_size)
+
+
+class SirenLink(BaseSirenLink, SirenBuilder):
+    """
+    Representation of a Link in Siren. Links are traversals to related objects that exist outside of normal entity
+    (parent-child) ownership.
+    """
+
+
+# =====================================
+# Compact representations
+# =====================================
+
+
+class CompactConstructionMixin(BaseSirenBuilder):
+    """
+    Constructs compact entities, actions and links: they have no instance dictionary, share the request context of
+    their builder and their classnames and relationships are interned so that repeated values are stored once.
+    """
+
+    __slots__ = ()
+
+    def _create_entity(self, **kwargs):
+        kwargs['classnames'] = _intern_all(kwargs['classnames'])
+        kwargs['rel'] = _intern_all(kwargs.get('rel'))
+        kwargs.update(self._request_settings())
+        return CompactSirenEntity(**kwargs)
+
+    def _construct_action(self, action_dict):
+        kwargs = dict(action_dict)
+        kwargs.update(self._request_settings())
+        return CompactSirenAction(**kwargs)
+
+    def _construct_link(self, links_dict):
+        rel = links_dict['rel']
+        href = links_dict['href']
+        return CompactSirenLink(rel=_intern_all([rel] if isinstance(rel, six.string_types) else rel), href=href,
+                                **self._request_settings())
+
+
+class CompactSirenBuilder(CompactConstructionMixin, SirenBuilder):
+    """
+    Builder of compact siren objects for graphs held in memory in large numbers. Compact objects behave like the
+    standard ones but only accept their declared attributes and are not instances of SirenEntity, SirenAction and
+    SirenLink, use BaseSirenEntity, BaseSirenAction and BaseSirenLink for type checks.
+    """
+
+
+class CompactSirenEntity(BaseSirenEntity):
+    """SirenEntity without an instance dictionary, see CompactSirenBuilder."""
+
+    __slots__ = ()
+
+    def _create_builder(self):
+        return CompactSirenBuilder(**self._request_settings())
+
+
+class CompactSirenAction(BaseSirenAction):
+    """SirenAction without an instance dictionary, see CompactSirenBuilder."""
+
+    __slots__ = ()
+
+
+class CompactSirenLink(CompactConstructionMixin, BaseSirenLink):
+    """SirenLink without an instance dictionary, the entities it retrieves are compact as well."""
+
+    __slots__ = ()
+
+
+class SirenStream(object):
+    """
+    Sub-entities of a siren entity constructed one at a time while its json is parsed. Iterating yields each
+    sub-entity once, as an entity or a link for link style sub-entities. The root entity is available through ``root``
+    without its sub-entities; its members placed before the sub-entities in the document are available immediately,
+    the others once iteration completes.
+    """
+
+    def __init__(self, siren_builder, chunks, encoding='utf-8', close=None):
+        """
+        :param SirenBuilder siren_builder: builder constructing the entities
+        :param chunks: the json document as an iterable of byte chunks
+        :param str encoding: encoding of the chunks
+        :param function close: called once the document is consumed or the stream is closed
+        """
+        self._builder = siren_builder
+        self._events = iter_root_members(chunks, 'entities', encoding=encoding, loads=siren_builder.codec.loads)
+        self._close = close
+        self._root_dict = {}
+        self._root = None
+        self._started = False
+        self._finished = False
+
+    @property
+    def root(self):
+        """
+        :return: the root entity constructed from the members parsed so far, without its sub-entities
+        :rtype: SirenEntity
+        :raises: MalformedSirenError
+        """
+        while not self._started and not self._finished:
+            self._next_event()
+        if self._root is None:
+            try:
+                self._root = self._builder._construct_entity(self._root_dict)
+            except Exception as e:
+                raise MalformedSirenError(
+                    message='Siren response is malformed and is missing one or more required values. '
+                            'Unable to create python object representation.',
+                    errors=e)
+        return self._root
+
+    def __iter__(self):
+        while not self._finished:
+            event = self._next_event()
+            if event is None or event[0] != ARRAY_ITEM:
+                continue
+            try:
+                yield self._builder._construct_sub_entities([event[2]])[0]
+            except Exception as e:
+                self.close()
+                raise MalformedSirenError(
+                    message='Siren sub-entity is malformed and is missing one or more required values. '
+                            'Unable to create python object representation.',
+                    errors=e)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Stops parsing and releases the underlying response."""
+        self._finished = True
+        if self._close is not None:
+            close, self._close = self._close, None
+            close()
+
+    def _next_event(self):
+        """
+        Parses the next member of the root entity or sub-entity.
+
+        :return: the parsed (event, member name, value), None when the document is consumed
+        :rtype: tuple
+        :raises: MalformedSirenError
+        """
+        try:
+            event = next(self._events)
+        except StopIteration:
+            self.close()
+            return None
+        except ValueError as e:
+            self.close()
+            raise MalformedSirenError(
+                message='Parameter "response" must be valid json. Unable to construct siren objects.', errors=e)
+
+        kind, key, value = event
+        if kind == MEMBER:
+            self._root_dict[key] = value
+            self._root = None
+        elif kind == ARRAY_START:
+            self._started = True
+        return event
 
 
 # ==============
@@ -622,6 +2241,59 @@ class UnexpectedStatusError(Exception):
         Exception.__init__(self, message)
 
 
+class ModelClassCache(object):
+    """
+    Bounded least recently used cache of the python classes generated for siren entities, keyed by entity shape.
+    """
+
+    def __init__(self, max_size=DEFAULT_MODEL_CLASS_CACHE_SIZE):
+        """
+        :param int max_size: maximum number of cached classes, 0 disables caching
+        """
+        self.max_size = max_size
+        self.stats = dict(hits=0, misses=0)
+        self._classes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._classes)
+
+    def get_or_create(self, key, factory):
+        """
+        Gets the class for a key, creating and caching it when missing.
+
+        :param tuple key: entity shape
+        :param function factory: creates the class
+        :return: the class
+        :rtype: type
+        """
+        with self._lock:
+            cls = self._classes.pop(key, None)
+            if cls is not None:
+                self._classes[key] = cls
+                self.stats['hits'] += 1
+                return cls
+            self.stats['misses'] += 1
+
+        cls = factory()
+        if self.max_size > 0:
+            with self._lock:
+                self._classes[key] = cls
+                while len(self._classes) > self.max_size:
+                    self._classes.popitem(last=False)
+        return cls
+
+    def clear(self):
+        """Removes every cached class and resets the statistics."""
+        with self._lock:
+            self._classes.clear()
+            self.stats = dict(hits=0, misses=0)
+
+
+#: classes generated by SirenEntity.as_python_object
+model_classes = ModelClassCache()
+
+
 class TemplatedString(object):
     """
     Helper class for handling templated strings and allows for partial templating.
@@ -638,8 +2310,7 @@ class TemplatedString(object):
         self.base = str(base)
 
         # locate parameters
-        param_locator = re.compile('\{[^}]+\}')
-        params = param_locator.findall(self.base)
+        params = _TEMPLATE_PARAMETER.findall(self.base)
         self.param_dict = {}
         for p in params:
             self.param_dict[p.replace('{', '').replace('}', '')] = p
@@ -711,15 +2382,210 @@ def _create_action_fn(action, siren_builder, **kwargs):
 
     :param action: action object capable of making a request
     :type action: SirenAction or SirenLink
+    :param SirenBuilder siren_builder: builder for the response, its session is used to send the request and its cache
+        (when set) to answer it
     :param kwargs: keyword arguments for passage into the underlying requests library object
     :return: action function capable of requesting data from the server and creating a new proxy object
     :rtype: function
     """
     def _action_fn(self, **kwargs):
-        response = action.make_request(verify=siren_builder.verify, **kwargs)  # create request and obtain response
-        siren = siren_builder.from_api_response(response=response)  # interpret response as a siren object
+        return _call_requestor(action, siren_builder, **kwargs)
+
+    return _action_fn
+
+
+def _call_requestor(action, siren_builder, **kwargs):
+    """
+    Makes the request of an action or link, retrieves content, and creates a python object.
+
+    :param action: action object capable of making a request
+    :type action: SirenAction or SirenLink
+    :param SirenBuilder siren_builder: builder for the response, its session is used to send the request and its cache
+        (when set) to answer it
+    :param kwargs: fields of the request
+    :return: proxy object for the response, None when it was not found
+    :rtype: object
+    """
+    with operation(siren_builder.metrics, _requestor_name(action)):
+        if siren_builder.cache is None and (siren_builder.coalescer is None or not _is_get(action)):
+            response = action.make_request(_session=siren_builder.session, **kwargs)  # create request and obtain response
+            siren = siren_builder.from_api_response(response=response)  # interpret response as a siren object
+        else:
+            siren = _retrieve_entity(action, siren_builder, action.as_request(**kwargs), siren_builder.session)
         if not siren:
             return None
         return siren.as_python_object()  # represent this as a legitimate python object (proxy to the service)
 
-    return _action_fn
+
+def _retrieve_entity(requestor, siren_builder, prepared_request, _session=None):
+    """
+    Sends the request of an action or link and constructs the entity of the response, sharing the in-flight
+    request of concurrent identical GET requests when the builder has a coalescer.
+
+    :param requestor: action or link sending the request
+    :type requestor: SirenAction or SirenLink
+    :param SirenBuilder siren_builder: builder for the response
+    :param requests.PreparedRequest prepared_request: the request
+    :param requests.Session _session: session to use in place of the one assigned to the requestor
+    :return: the entity, None when it was not found
+    :rtype: SirenEntity
+    """
+    if siren_builder.coalescer is not None and _is_get(requestor):
+        # concurrent callers share the entity, each gets its own python object
+        return siren_builder.coalescer.fetch(
+            prepared_request, functools.partial(_fetch_entity, requestor, siren_builder, prepared_request, _session))
+    return _fetch_entity(requestor, siren_builder, prepared_request, _session)
+
+
+def _fetch_entity(requestor, siren_builder, prepared_request, _session=None):
+    """
+    Sends the request of an action or link and constructs the entity of the response, from the cache of the builder
+    when it has one.
+
+    :param requestor: action or link sending the request
+    :type requestor: SirenAction or SirenLink
+    :param SirenBuilder siren_builder: builder for the response
+    :param requests.PreparedRequest prepared_request: the request
+    :param requests.Session _session: session to use in place of the one assigned to the requestor
+    :return: the entity, None when it was not found
+    :rtype: SirenEntity
+    """
+    send = functools.partial(requestor.send, _session=_session)
+    if siren_builder.cache is None:
+        return siren_builder.from_api_response(send(prepared_request))
+    return siren_builder.cache.fetch(prepared_request, send, siren_builder.from_api_response,
+                                     metrics=siren_builder.metrics)
+
+
+def _bind_template(template, href, kwfields):
+    """
+    Expands a compiled href with the fields naming its variables.
+
+    :param pypermedia.uri_template.UriTemplate template: the compiled href
+    :param str|unicode href: the href
+    :param dict kwfields: fields of the request
+    :return: the bound href and the fields which are not template variables
+    :rtype: str|unicode, dict
+    """
+    if not template.variables:
+        return href, kwfields
+    bound_href = template.expand(kwfields)
+    return bound_href, dict((k, v) for k, v in kwfields.items() if k not in template.variables)
+
+
+def _encode_field(name, value):
+    """
+    :param str|unicode name: name of a field
+    :param str|unicode value: serialized value of the field
+    :return: the field url encoded the way requests encodes query parameters and form bodies
+    :rtype: str
+    """
+    if isinstance(name, six.text_type):
+        name = name.encode('utf-8')
+    if isinstance(value, six.text_type):
+        value = value.encode('utf-8')
+    return urlencode(((name, value),))
+
+
+def _payload_encoding(method, media_type):
+    """
+    :param str method: method of an action
+    :param str media_type: type of the action
+    :return: encoding of the fields of the action, see ActionRequestBuilder, None when they are not sent
+    :rtype: str
+    """
+    if method == 'GET':
+        return QUERY_ENCODING
+    if method not in ('PUT', 'POST', 'PATCH'):
+        return None
+    media_type = (media_type or '').split(';')[0].strip().lower()
+    if media_type == JSON_TYPE or media_type.endswith('+json'):
+        return JSON_ENCODING
+    if media_type == MULTIPART_TYPE:
+        return MULTIPART_ENCODING
+    return FORM_ENCODING
+
+
+def _multipart_part(codec, name, value):
+    """
+    :param pypermedia.codec.JsonCodec codec: codec serializing the values which are not strings, bytes or files
+    :param str|unicode name: name of a field
+    :param value: value of the field
+    :return: the part of the field in a multipart body
+    :rtype: bytes or pypermedia.multipart.FilePart
+    """
+    if is_file(value):
+        return FilePart(name, value)
+    if not isinstance(value, (six.binary_type, six.text_type)):
+        value = codec.dumps(value)
+    return encode_part(name, value)
+
+
+class _SameType(object):
+    """Number in the state of the fields of an action, equal only to numbers of its type: 1 and True are equal but
+    serialized differently."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return other.__class__ is self.value.__class__ and other == self.value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+def _field_state(fields):
+    """
+    :param list[dict] fields: fields of an action
+    :return: copies of the fields, equal to the fields as long as they are unchanged: list and dict values are copied
+        so that their changes are detected as well
+    :rtype: list[dict]
+    """
+    state = []
+    for field in fields:
+        field = dict(field)
+        value = field.get('value')
+        if isinstance(value, (list, dict)):
+            field['value'] = copy.deepcopy(value)
+        elif isinstance(value, numbers.Number):
+            field['value'] = _SameType(value)
+        state.append(field)
+    return state
+
+
+def _result_or_error(future):
+    """
+    :param concurrent.futures.Future future: a future
+    :return: the result of the future, the exception it raised in its place
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+def _is_get(requestor):
+    """
+    :param requestor: action or link
+    :type requestor: SirenAction or SirenLink
+    :return: whether its request is a GET
+    :rtype: bool
+    """
+    if isinstance(requestor, BaseSirenLink):
+        return True
+    return isinstance(requestor, BaseSirenAction) and (requestor.method or 'GET').upper() == 'GET'
+
+
+def _requestor_name(requestor):
+    """
+    :param requestor: action or link
+    :type requestor: SirenAction or SirenLink
+    :return: name of the action or first relationship of the link, used to name its metrics and select its policy
+    :rtype: str
+    """
+    if isinstance(requestor, BaseSirenLink):
+        return requestor.rel[0] if requestor.rel else None
+    return getattr(requestor, 'name', None)
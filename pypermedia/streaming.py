@@ -0,0 +1,214 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[,}\] \t\n\r]')
+
+#: event for a member of the root object, the value is the decoded member value
+MEMBER = 'member'
+
+#: event for the start of the streamed array member, the value is None
+ARRAY_START = 'array_start'
+
+#: event for an element of the streamed array member, the value is the decoded element
+ARRAY_ITEM = 'array_item'
+
+
+class _ChunkBuffer(object):
+    """Text buffer filled on demand from an iterable of byte chunks."""
+
+    def __init__(self, chunks, encoding):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Appends the next non-empty chunk to the buffer.
+
+        :return: False when the chunks are exhausted
+        :rtype: bool
+        """
+        while not self.eof:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self.eof = True
+                text = self._decoder.decode(b'', final=True)
+            else:
+                text = self._decoder.decode(chunk)
+            if text:
+                self.text += text
+                return True
+        return False
+
+    def compact(self):
+        """Drops the consumed part of the buffer."""
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+    def skip_whitespace(self):
+        """
+        Moves past whitespace, reading more when the buffer is exhausted.
+
+        :return: the next character, empty when the chunks are exhausted
+        :rtype: unicode
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, characters):
+        """
+        Consumes the next non-whitespace character.
+
+        :param unicode characters: accepted characters
+        :return: the consumed character
+        :rtype: unicode
+        :raises: ValueError
+        """
+        character = self.skip_whitespace()
+        if not character or character not in characters:
+            raise ValueError('Expected one of "{0}" at offset {1} but found "{2}".'.format(characters, self.pos,
+                                                                                          character))
+        self.pos += 1
+        return character
+
+    def _scan_container(self):
+        """
+        Finds the end of the object or array starting at the current position, reading as needed. Scanning resumes
+        where it stopped when more data arrives so that each character is only scanned once.
+
+        :return: position just past the container
+        :rtype: int
+        :raises: ValueError
+        """
+        depth = 0
+        in_string = False
+        i = self.pos
+        while True:
+            if in_string:
+                match = _STRING_SPECIAL.search(self.text, i)
+                if match and match.group() == '"':
+                    in_string = False
+                    i = match.end()
+                    continue
+                if match and match.end() < len(self.text):  # skip the escaped character
+                    i = match.end() + 1
+                    continue
+                if match:
+                    i = match.start()
+            else:
+                match = _STRUCTURE.search(self.text, i)
+                if match:
+                    character = match.group()
+                    i = match.end()
+                    if character == '"':
+                        in_string = True
+                    elif character in '{[':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return i
+                    continue
+            if match is None:
+                i = len(self.text)
+            if not self.fill():
+                raise ValueError('Unexpected end of json content.')
+
+    def decode_value(self, decoder, loads):
+        """
+        Decodes the value at the current position and moves past it.
+
+        :param json.JSONDecoder decoder: decoder for strings, numbers and literals
+        :param function loads: decoder for objects and arrays
+        :return: the decoded value
+        :raises: ValueError
+        """
+        character = self.skip_whitespace()
+        if not character:
+            raise ValueError('Unexpected end of json content.')
+        if character in '{[':
+            end = self._scan_container()
+            value = loads(self.text[self.pos:end])
+            self.pos = end
+            return value
+
+        if character == '"':  # a string is complete once its closing quote is read
+            while True:
+                try:
+                    value, self.pos = decoder.raw_decode(self.text, self.pos)
+                    return value
+                except ValueError:
+                    if not self.fill():
+                        raise
+
+        # a number or literal may continue in the next chunk (e.g. "1." then "5"), it is only complete at a delimiter
+        start = self.pos
+        while _SCALAR_END.search(self.text, start) is None:
+            start = len(self.text)
+            if not self.fill():
+                break
+        value, self.pos = decoder.raw_decode(self.text, self.pos)
+        return value
+
+
+def iter_root_members(chunks, array_key, encoding='utf-8', loads=None):
+    """
+    Incrementally parses a json object, yielding its members as they are parsed and the elements of one array member
+    one at a time so that the array is never held in memory as a whole.
+
+    :param chunks: the json document as an iterable of byte chunks (e.g. ``Response.iter_content``)
+    :param unicode array_key: name of the root member whose elements are streamed
+    :param str encoding: encoding of the chunks
+    :param function loads: decoder for the object and array values, json.loads when None
+    :return: generator of (event, member name, value) tuples, see MEMBER, ARRAY_START and ARRAY_ITEM
+    :rtype: generator
+    :raises: ValueError
+    """
+    decoder = json.JSONDecoder()
+    loads = loads or json.loads
+    buf = _ChunkBuffer(chunks, encoding)
+    buf.expect('{')
+    if buf.skip_whitespace() == '}':
+        buf.pos += 1
+        return
+
+    while True:
+        key = buf.decode_value(decoder, loads)
+        buf.expect(':')
+        if key == array_key and buf.skip_whitespace() == '[':
+            buf.pos += 1
+            yield ARRAY_START, key, None
+            if buf.skip_whitespace() == ']':
+                buf.pos += 1
+            else:
+                while True:
+                    buf.compact()
+                    yield ARRAY_ITEM, key, buf.decode_value(decoder, loads)
+                    if buf.expect(',]') == ']':
+                        break
+        else:
+            yield MEMBER, key, buf.decode_value(decoder, loads)
+
+        buf.compact()
+        if buf.expect(',}') == '}':
+            break
+
+    if buf.skip_whitespace():
+        raise ValueError('Unexpected content after the json object.')
@@ -0,0 +1,252 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+import six
+import threading
+from collections import OrderedDict
+from six.moves.urllib.parse import quote
+
+#: maximum number of compiled templates kept by compile_template, the least recently used are dropped first
+MAX_CACHED_TEMPLATES = 1024
+
+_EXPRESSION = re.compile(r'\{([^}]*)\}')
+_VARSPEC = re.compile(r'^([A-Za-z0-9_.%]+)(?::([0-9]{1,4})|(\*))?$')
+
+_UNRESERVED_SAFE = str('~')
+_RESERVED_SAFE = str(":/?#[]@!$&'()*+,;=~%")
+
+# operator -> (first, separator, named, if empty, allow reserved), see RFC 6570 appendix A
+_OPERATORS = {
+    '': ('', ',', False, '', False),
+    '+': ('', ',', False, '', True),
+    '.': ('.', '.', False, '', False),
+    '/': ('/', '/', False, '', False),
+    ';': (';', ';', True, '', False),
+    '?': ('?', '&', True, '=', False),
+    '&': ('&', '&', True, '=', False),
+    '#': ('#', ',', False, '', True),
+}
+
+
+def _encode(value, allow_reserved):
+    """
+    Percent-encodes a value.
+
+    :param unicode value: value to encode
+    :param bool allow_reserved: whether reserved characters are kept as is
+    :return: encoded value
+    :rtype: unicode
+    """
+    if six.PY2:  # pragma: no cover
+        value = value.encode('utf-8')
+    return six.text_type(quote(value, safe=_RESERVED_SAFE if allow_reserved else _UNRESERVED_SAFE))
+
+
+def _as_text(value):
+    """
+    :param value: scalar value
+    :return: text representation of the value
+    :rtype: unicode
+    """
+    return value if isinstance(value, six.text_type) else six.text_type(value)
+
+
+class _Expression(object):
+    """A compiled template expression such as ``{?x,y*,z:3}``."""
+
+    def __init__(self, expression):
+        """
+        :param unicode expression: expression text without the braces
+        :raises: ValueError
+        """
+        operator = expression[:1] if expression[:1] in _OPERATORS else ''
+        self.operator = operator
+        self.first, self.separator, self.named, self.if_empty, self.allow_reserved = _OPERATORS[operator]
+        self.varspecs = []
+        for varspec in expression[len(operator):].split(','):
+            match = _VARSPEC.match(varspec)
+            if not match:
+                raise ValueError('Invalid uri template expression "{{{0}}}".'.format(expression))
+            name, prefix, explode = match.groups()
+            self.varspecs.append((name, int(prefix) if prefix else None, bool(explode)))
+        self.variables = tuple(name for name, _, _ in self.varspecs)
+
+    def expand(self, values):
+        """
+        Expands the expression, undefined variables are omitted.
+
+        :param dict values: variable values
+        :return: expansion
+        :rtype: unicode
+        """
+        parts = []
+        for name, prefix, explode in self.varspecs:
+            value = values.get(name)
+            if value is None or (isinstance(value, (list, tuple, dict)) and not value):
+                continue
+            parts.append(self._expand_value(name, value, prefix, explode))
+        if not parts:
+            return ''
+        return self.first + self.separator.join(parts)
+
+    def _expand_value(self, name, value, prefix, explode):
+        encode = _encode
+        allow_reserved = self.allow_reserved
+        if isinstance(value, dict):
+            pairs = [(_as_text(k), _as_text(v)) for k, v in value.items()]
+            if explode:
+                return self.separator.join(encode(k, allow_reserved) + ('=' + encode(v, allow_reserved)
+                                                                        if v or not self.named else self.if_empty)
+                                           for k, v in pairs)
+            joined = ','.join(encode(k, allow_reserved) + ',' + encode(v, allow_reserved) for k, v in pairs)
+            return name + '=' + joined if self.named else joined
+
+        if isinstance(value, (list, tuple)):
+            items = [_as_text(v) for v in value]
+            if explode:
+                if self.named:
+                    return self.separator.join(name + ('=' + encode(v, allow_reserved) if v else self.if_empty)
+                                               for v in items)
+                return self.separator.join(encode(v, allow_reserved) for v in items)
+            joined = ','.join(encode(v, allow_reserved) for v in items)
+            return name + '=' + joined if self.named else joined
+
+        value = _as_text(value)
+        if prefix is not None:
+            value = value[:prefix]
+        if self.named:
+            return name + ('=' + encode(value, allow_reserved) if value else self.if_empty)
+        return encode(value, allow_reserved)
+
+
+class _VerbatimExpression(object):
+    """
+    An expression which is not valid per RFC 6570, such as ``{item-id}``: as with the former TemplatedString, its whole
+    text names a variable whose value replaces it as is.
+    """
+
+    operator = ''
+
+    def __init__(self, expression):
+        """
+        :param unicode expression: expression text without the braces
+        """
+        self.name = expression
+        self.variables = (expression,)
+
+    def expand(self, values):
+        """
+        :param dict values: variable values
+        :return: the value of the variable as text, nothing when undefined
+        :rtype: unicode
+        """
+        value = values.get(self.name)
+        return '' if value is None else _as_text(value)
+
+
+def _compile_expression(expression):
+    """
+    :param unicode expression: expression text without the braces
+    :return: the compiled expression
+    :rtype: _Expression or _VerbatimExpression
+    :raises: ValueError when the expression is empty
+    """
+    try:
+        return _Expression(expression)
+    except ValueError:
+        if not expression:
+            raise
+        return _VerbatimExpression(expression)
+
+
+class UriTemplate(object):
+    """
+    A uri template (RFC 6570, levels 1 through 4) split once into literal segments and expressions so that each
+    expansion is a single pass. Use compile_template to share compiled templates. Expressions which are not valid
+    per the RFC, such as ``{item-id}``, are replaced by the value of the variable named by their whole text, as is.
+    """
+
+    def __init__(self, template):
+        """
+        :param unicode template: the template
+        :raises: ValueError
+        """
+        self.template = template
+        self.segments = []
+        variables = []
+        required = []
+        position = 0
+        for match in _EXPRESSION.finditer(template):
+            if match.start() > position:
+                self.segments.append(template[position:match.start()])
+            expression = _compile_expression(match.group(1))
+            self.segments.append(expression)
+            variables.extend(expression.variables)
+            if not expression.operator:
+                required.extend(expression.variables)
+            position = match.end()
+        if position < len(template):
+            self.segments.append(template[position:])
+        if '{' in ''.join(s for s in self.segments if isinstance(s, six.text_type)):
+            raise ValueError('Unclosed uri template expression in "{0}".'.format(template))
+
+        #: every variable of the template
+        self.variables = frozenset(variables)
+        #: variables of simple (level 1 style) expressions which must be given, typically path segments
+        self.required_variables = frozenset(required)
+
+    def expand(self, values):
+        """
+        Expands the template.
+
+        :param dict values: variable values, values for names which are not template variables are ignored
+        :return: the expanded uri
+        :rtype: unicode
+        :raises: ValueError
+        """
+        missing = [name for name in self.required_variables if values.get(name) is None]
+        if missing:
+            raise ValueError('Unbound template parameters in url detected! All variables must be specified! '
+                             'Unbound variables: {0}'.format(sorted(missing)))
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, six.text_type):
+                parts.append(segment)
+            else:
+                parts.append(segment.expand(values))
+        return ''.join(parts)
+
+    def __repr__(self):
+        return 'UriTemplate({0!r})'.format(self.template)
+
+
+#: compiled templates by template string, least recently used first
+_compiled_templates = OrderedDict()
+_compiled_templates_lock = threading.Lock()
+
+
+def compile_template(template):
+    """
+    Compiles a uri template, reusing the compiled template for identical template strings. The MAX_CACHED_TEMPLATES
+    most recently used templates are kept.
+
+    :param unicode template: the template
+    :return: compiled template
+    :rtype: UriTemplate
+    :raises: ValueError
+    """
+    with _compiled_templates_lock:
+        compiled = _compiled_templates.pop(template, None)
+        if compiled is not None:
+            _compiled_templates[template] = compiled
+            return compiled
+
+    compiled = UriTemplate(six.text_type(template))
+    with _compiled_templates_lock:
+        _compiled_templates[template] = compiled
+        while len(_compiled_templates) > MAX_CACHED_TEMPLATES:
+            _compiled_templates.popitem(last=False)
+    return compiled
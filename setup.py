@@ -21,10 +21,20 @@ version = '0.4.2'
 
 # run-time dependencies, listed here so that they can be shared with test requirements
 install_requirements = [
+    'futures; python_version < "3"',
     'requests>=2.3.0',
     'six'
 ]
 
+# optional dependencies enabling additional features
+extra_requirements = {
+    'aiohttp': ['aiohttp'],
+    'brotli': ['brotli'],
+    'orjson': ['orjson'],
+    'ujson': ['ujson'],
+    'zstd': ['zstandard'],
+}
+
 test_requirements = [
     'mock',
     'pytest',
@@ -56,6 +66,7 @@ setup(
 
         'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3.3',
+        'Programming Language :: Python :: 3.6',  # pypermedia.aio requires Python 3.6+
     ],
 
     keywords='client rest hypermedia http proxy siren api hateoas',
@@ -63,6 +74,7 @@ setup(
     packages=find_packages(include=['pypermedia', 'pypermedia.*', 'tests', 'tests.*']),
 
     install_requires=install_requirements,
+    extras_require=extra_requirements,
     tests_require=test_requirements,
     test_suite='tests'
 
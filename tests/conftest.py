@@ -0,0 +1,10 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import sys
+
+# pypermedia.aio and its tests use async/await, which older interpreters cannot parse, the asyncio client requires
+# Python 3.6+
+collect_ignore = ['unit/test_aio.py'] if sys.version_info < (3, 6) else []
@@ -0,0 +1,173 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.aio import AsyncHypermediaClient, AsyncSirenBuilder, AsyncSirenLink, AsyncSirenAction, \
+    FakeTransport, ExecutorTransport, _create_async_action_fn
+from pypermedia.client import APIError, ConnectError
+from pypermedia.siren import UnexpectedStatusError
+
+from requests import PreparedRequest
+
+import asyncio
+import mock
+import unittest2
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+ROOT = {
+    'class': ['root'],
+    'properties': {'name': 'root'},
+    'actions': [{'name': 'create-item', 'href': 'http://api.io/items', 'method': 'POST',
+                 'fields': [{'name': 'size', 'type': 'number'}]}],
+    'links': [{'rel': ['next'], 'href': 'http://api.io/next'}],
+    'entities': [{'rel': ['item'], 'href': 'http://api.io/items/1'},
+                 {'class': ['item'], 'rel': ['item'], 'properties': {'id': 2}}],
+}
+
+
+class TestAsyncHypermediaClient(unittest2.TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.transport.add_response('http://api.io', ROOT)
+        self.transport.add_response('http://api.io/next', {'class': ['next'], 'properties': {'page': 2}})
+        self.transport.add_response('http://api.io/items', {'class': ['item'], 'properties': {'id': 3}},
+                                    method='POST')
+        self.transport.add_response('http://api.io/items/1', {'class': ['item'], 'properties': {'id': 1}})
+
+    def test_connect(self):
+        root = _run(AsyncHypermediaClient.connect('http://api.io', transport=self.transport))
+        self.assertEqual(type(root).__name__, 'root')
+        self.assertEqual(root.name, 'root')
+
+    def test_connect_error(self):
+        self.assertRaises(ConnectError, _run, AsyncHypermediaClient.connect('http://nope.io', transport=self.transport))
+
+    def test_generated_methods(self):
+        async def traverse():
+            root = await AsyncHypermediaClient.connect('http://api.io', transport=self.transport)
+            return await asyncio.gather(root.next(), root.create_item(size=4))
+
+        nxt, item = _run(traverse())
+        self.assertEqual(nxt.page, 2)
+        self.assertEqual(item.id, 3)
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_get_entities(self):
+        async def traverse():
+            root = await AsyncHypermediaClient.connect('http://api.io', transport=self.transport)
+            return [x.id async for x in root.get_entities('item')]
+
+        self.assertEqual(_run(traverse()), [1, 2])
+
+    def test_expand(self):
+        async def traverse():
+            root = AsyncSirenBuilder(transport=self.transport).from_api_response(ROOT)
+            return await root.expand()
+
+        root = _run(traverse())
+        self.assertEqual([x.classnames for x in root.get_entities('item')], [['item'], ['item']])
+        self.assertEqual(root.entities[0].properties['id'], 1)
+        self.assertRaises(ValueError, AsyncSirenBuilder().from_api_response, ROOT, expand_depth=1)
+
+    def test_not_found(self):
+        self.transport.add_response('http://api.io/next', '', status_code=404)
+
+        async def traverse():
+            root = await AsyncHypermediaClient.connect('http://api.io', transport=self.transport)
+            return await root.next()
+
+        self.assertIsNone(_run(traverse()))
+
+    def test_transport_ownership(self):
+        self.transport.close = mock.Mock(return_value=asyncio.sleep(0))
+
+        async def traverse():
+            async with AsyncHypermediaClient.open('http://api.io', transport=self.transport) as root:
+                return await root.next()
+
+        self.assertEqual(_run(traverse()).page, 2)
+        self.transport.close.assert_called_once_with()
+
+        # the default transport is created once per client, and closed when the connection fails
+        created = FakeTransport()
+        created.close = mock.Mock(return_value=asyncio.sleep(0))
+        with mock.patch('pypermedia.aio.default_transport', return_value=created) as default_transport:
+            self.assertRaises(ConnectError, _run, AsyncHypermediaClient.connect('http://nope.io'))
+        self.assertEqual(default_transport.call_count, 1)
+        created.close.assert_called_once_with()
+
+        # as it is when the response is an error
+        for status_code, error in ((404, APIError), (500, UnexpectedStatusError)):
+            created.add_response('http://nope.io', '', status_code=status_code)
+            created.close = mock.Mock(side_effect=lambda: asyncio.sleep(0))
+            with mock.patch('pypermedia.aio.default_transport', return_value=created):
+                self.assertRaises(error, _run, AsyncHypermediaClient.connect('http://nope.io'))
+            created.close.assert_called_once_with()
+
+    def test_iter_pages(self):
+        for page in range(1, 4):
+            document = {'class': ['page'],
+                        'entities': [{'class': ['item'], 'rel': ['item'], 'properties': {'id': page}}]}
+            if page < 3:
+                document['links'] = [{'rel': ['next'], 'href': 'http://api.io/pages/{0}'.format(page + 1)}]
+            self.transport.add_response('http://api.io/pages/{0}'.format(page), document)
+
+        async def traverse(**kwargs):
+            first = await AsyncSirenLink('first', 'http://api.io/pages/1', transport=self.transport).retrieve()
+            return [x.properties['id'] async for x in first.iter_paged_entities(rel='item', **kwargs)]
+
+        self.assertEqual(_run(traverse()), [1, 2, 3])
+        self.assertEqual(_run(traverse(prefetch=0)), [1, 2, 3])
+        self.assertEqual(_run(traverse(max_pages=2)), [1, 2])
+
+    def test_synchronous_traversals(self):
+        root = AsyncSirenBuilder(transport=self.transport).from_api_response(ROOT)
+        self.assertRaises(TypeError, root.links[0].stream)
+        self.assertRaises(TypeError, root.actions[0].make_requests, [{'size': 1}])
+
+    def test_requires_transport(self):
+        link = AsyncSirenLink('next', 'http://api.io/next')
+        self.assertRaises(ValueError, _run, link.make_request())
+        self.assertEqual(_run(link.retrieve(_transport=self.transport)).classnames, ['next'])
+
+
+class TestAsyncSirenBuilder(unittest2.TestCase):
+    def test_shares_transport(self):
+        transport = FakeTransport()
+        entity = AsyncSirenBuilder(transport=transport).from_api_response(ROOT)
+        self.assertIs(entity.transport, transport)
+        self.assertIsInstance(entity.actions[0], AsyncSirenAction)
+        self.assertIs(entity.actions[0].transport, transport)
+        self.assertIsInstance(entity.links[0], AsyncSirenLink)
+        self.assertIs(entity.links[0].transport, transport)
+        self.assertIs(entity.entities[0].transport, transport)
+
+
+class TestAsyncActionFunction(unittest2.TestCase):
+    def test_create_async_action_function(self):
+        action = mock.MagicMock()
+        action.make_request = mock.Mock(return_value=asyncio.sleep(0, result='resp'))
+        siren = mock.MagicMock()
+        func = _create_async_action_fn(action, siren)
+        resp = _run(func(mock.MagicMock(), blah='ha'))
+        self.assertEqual(siren.from_api_response.return_value.as_python_object.return_value, resp)
+        action.make_request.assert_called_once_with(_transport=siren.transport, blah='ha')
+        siren.from_api_response.assert_called_once_with(response='resp')
+
+
+class TestExecutorTransport(unittest2.TestCase):
+    def test_send(self):
+        session = mock.Mock()
+        request = PreparedRequest()
+        resp = _run(ExecutorTransport(session=session).send(request, verify=True))
+        self.assertIs(resp, session.send.return_value)
+        session.send.assert_called_once_with(request, verify=True)
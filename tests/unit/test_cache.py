@@ -0,0 +1,202 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.cache import ResponseCache, _parse_cache_control
+from pypermedia.client import HypermediaClient
+from pypermedia.siren import SirenBuilder, SirenLink, UnexpectedStatusError
+
+from requests import Request, Response
+
+import json
+import mock
+import six
+import unittest2
+
+
+def _response(status_code=200, body=None, headers=None):
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers.update(headers or {})
+    resp._content = six.binary_type(json.dumps(body).encode('utf8')) if body is not None else b''
+    return resp
+
+
+def _request(url='http://api.io/thing', method='GET', headers=None):
+    return Request(method, url, headers=headers).prepare()
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest2.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = ResponseCache(clock=self.clock)
+        self.build = mock.Mock(side_effect=lambda resp: SirenBuilder().from_api_response(resp))
+
+    def test_parse_cache_control(self):
+        directives = _parse_cache_control('Max-Age=60, no-cache, private="x"')
+        self.assertDictEqual(directives, {'max-age': '60', 'no-cache': None, 'private': 'x'})
+        self.assertDictEqual(_parse_cache_control(None), {})
+
+    def test_fresh_hit(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60'}))
+        first = self.cache.fetch(_request(), send, self.build)
+        self.clock.now += 30
+        second = self.cache.fetch(_request(), send, self.build)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.classnames, ['a'])
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(self.build.call_count, 1)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_hits_are_copies(self):
+        document = {'class': ['a'], 'properties': {'tags': ['x']},
+                    'actions': [{'name': 'act', 'href': 'http://api.io/act', 'fields': [{'name': 'f'}]}],
+                    'links': [{'rel': ['self'], 'href': 'http://api.io/thing'}],
+                    'entities': [{'rel': ['item'], 'href': 'http://api.io/item'},
+                                 {'class': ['item'], 'rel': ['item'], 'properties': {'id': 1}}]}
+        send = mock.Mock(return_value=_response(body=document, headers={'Cache-Control': 'max-age=60'}))
+        for _ in range(2):  # the entity of a miss, then of a hit
+            entity = self.cache.fetch(_request(), send, self.build)
+            entity.properties['tags'].append('y')
+            entity.classnames = ['b']
+            entity.actions[0].fields[0]['value'] = 1
+            entity.links[0].rel.append('other')
+            entity.entities[0] = entity.entities[1]  # as expand does
+            entity.entities[1].properties['id'] = 2
+
+        cached = self.cache.fetch(_request(), send, self.build)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(cached.properties, {'tags': ['x']})
+        self.assertEqual(cached.classnames, ['a'])
+        self.assertEqual(cached.actions[0].fields, [{'name': 'f'}])
+        self.assertEqual(cached.get_links('self')[0].rel, ['self'])
+        self.assertEqual(cached.entities[0].href, 'http://api.io/item')
+        self.assertEqual(cached.get_entities('item')[1].properties['id'], 1)
+        self.assertIs(cached.context, entity.context)
+
+    def test_revalidation_not_modified(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'ETag': '"v1"',
+                                                                               'Last-Modified': 'yesterday'}))
+        first = self.cache.fetch(_request(), send, self.build)
+        send.return_value = _response(status_code=304, headers={'Cache-Control': 'max-age=10'})
+        second = self.cache.fetch(_request(), send, self.build)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.classnames, ['a'])
+        self.assertEqual(self.build.call_count, 1)
+        request = send.call_args[0][0]
+        self.assertEqual(request.headers['If-None-Match'], '"v1"')
+        self.assertEqual(request.headers['If-Modified-Since'], 'yesterday')
+        self.assertTrue(self.cache.is_fresh(self.cache.get(request.url)))
+
+    def test_revalidation_modified(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'ETag': '"v1"'}))
+        first = self.cache.fetch(_request(), send, self.build)
+        send.return_value = _response(body={'class': ['b']}, headers={'ETag': '"v2"'})
+        second = self.cache.fetch(_request(), send, self.build)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.classnames, ['b'])
+        self.assertEqual(self.cache.get(_request().url).etag, '"v2"')
+
+    def test_not_stored(self):
+        for headers in ({}, {'Cache-Control': 'no-store', 'ETag': '"v1"'}):
+            self.cache.fetch(_request(), mock.Mock(return_value=_response(body={'class': ['a']}, headers=headers)),
+                             self.build)
+            self.assertEqual(len(self.cache), 0)
+
+    def test_non_get_bypasses(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60'}))
+        self.cache.fetch(_request(method='POST'), send, self.build)
+        self.cache.fetch(_request(method='POST'), send, self.build)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_unsafe_method_invalidates(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60'}))
+        self.cache.fetch(_request(), send, self.build)
+        send.return_value = _response(status_code=409)
+        self.assertRaises(UnexpectedStatusError, self.cache.fetch, _request(method='PUT'), send, self.build)
+        self.assertIn(_request().url, self.cache)  # failed requests did not change the resource
+
+        send.return_value = _response(body={'class': ['deleted']})
+        self.cache.fetch(_request(method='DELETE'), send, self.build)
+        self.assertNotIn(_request().url, self.cache)
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_vary(self):
+        send = mock.Mock(return_value=_response(body={'class': ['json']}, headers={'Cache-Control': 'max-age=60',
+                                                                                  'Vary': 'Accept, Accept-Language'}))
+        first = self.cache.fetch(_request(headers={'Accept': 'application/json'}), send, self.build)
+        send.return_value = _response(body={'class': ['siren']}, headers={'Cache-Control': 'max-age=60',
+                                                                          'Vary': 'accept-language,accept'})
+        second = self.cache.fetch(_request(headers={'Accept': 'application/vnd.siren+json'}), send, self.build)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(second.classnames, ['siren'])
+        self.assertEqual(self.cache.fetch(_request(headers={'accept': 'application/json'}), send, self.build).classnames,
+                         first.classnames)
+        self.assertEqual(send.call_count, 2)
+        self.assertIsNone(self.cache.get(_request().url))
+
+        # responses varying on other headers replace the variants, those varying on anything are not stored
+        send.return_value = _response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60', 'Vary': 'Accept'})
+        self.cache.fetch(_request(headers={'Accept': 'application/xml'}), send, self.build)
+        self.assertEqual(len(self.cache), 1)
+        send.return_value = _response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60', 'Vary': '*'})
+        self.cache.fetch(_request(headers={'Accept': 'text/html'}), send, self.build)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_expires_header(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']},
+                                                headers={'Expires': 'Thu, 01 Jan 1970 00:20:00 GMT'}))
+        self.cache.fetch(_request(), send, self.build)
+        self.assertEqual(self.cache.get(_request().url).expires, 1200)
+
+    def test_lru_eviction_by_entries(self):
+        cache = ResponseCache(max_entries=2, clock=self.clock)
+        headers = {'Cache-Control': 'max-age=60'}
+        for url in ('http://a.io/', 'http://b.io/', 'http://a.io/', 'http://c.io/'):
+            cache.fetch(_request(url), mock.Mock(return_value=_response(body={'class': ['a']}, headers=headers)),
+                        self.build)
+        self.assertIn('http://a.io/', cache)
+        self.assertIn('http://c.io/', cache)
+        self.assertNotIn('http://b.io/', cache)
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        body = {'class': ['a']}
+        size = len(_response(body=body).content)
+        cache = ResponseCache(max_bytes=size * 2, clock=self.clock)
+        headers = {'Cache-Control': 'max-age=60'}
+        for url in ('http://a.io/', 'http://b.io/', 'http://c.io/'):
+            cache.fetch(_request(url), mock.Mock(return_value=_response(body=body, headers=headers)), self.build)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.total_bytes, size * 2)
+        self.assertNotIn('http://a.io/', cache)
+
+    def test_link_uses_cache(self):
+        session = mock.Mock()
+        session.send.return_value = _response(body={'class': ['a'], 'properties': {'x': 1}},
+                                              headers={'Cache-Control': 'max-age=60'})
+        link = SirenLink(['self'], 'http://api.io/thing', session=session, cache=self.cache)
+        self.assertEqual(link.as_python_object().x, 1)
+        self.assertEqual(link.as_python_object().x, 1)
+        self.assertEqual(session.send.call_count, 1)
+
+    def test_generated_link_method_uses_cache(self):
+        session = mock.Mock()
+        session.send.return_value = _response(body={'class': ['a'], 'links': [{'rel': ['self'], 'href': 'http://a.io/'}]},
+                                              headers={'Cache-Control': 'max-age=60'})
+        obj = HypermediaClient.connect('http://a.io/', session=session, cache=self.cache)
+        obj.self().self()
+        self.assertEqual(session.send.call_count, 1)
+        self.assertEqual(self.cache.stats['hits'], 2)
@@ -3,10 +3,12 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from pypermedia.client import HypermediaClient, ConnectError
+from pypermedia.client import HypermediaClient, APIError, ConnectError
 
+import json
 import mock
 import requests
+import six
 import unittest2
 
 
@@ -35,3 +37,54 @@ class TestClient(unittest2.TestCase):
         request = mock.Mock(url='url')
         session = mock.Mock(send=mock.Mock(side_effect=requests.exceptions.ConnectionError))
         self.assertRaises(ConnectError, HypermediaClient.send_and_construct, request, session=session)
+
+    def test_send_and_construct_not_found(self):
+        builder = mock.MagicMock()
+        builder.return_value.from_api_response.return_value = None
+        request = mock.Mock(url='url')
+        self.assertRaises(APIError, HypermediaClient.send_and_construct, request, session=mock.MagicMock(),
+                          builder=builder)
+
+    def test_send_and_construct_shares_session(self):
+        builder = mock.MagicMock()
+        session = mock.MagicMock()
+        request = mock.Mock(url='url')
+        HypermediaClient.send_and_construct(request, session=session, builder=builder)
+        self.assertIs(builder.call_args[1]['session'], session)
+
+    def test_send_and_construct_creates_pooled_session(self):
+        builder = mock.MagicMock()
+        request = mock.Mock(url='url')
+        with mock.patch('pypermedia.client.create_session') as create:
+            HypermediaClient.send_and_construct(request, builder=builder, pool_connections=3, pool_maxsize=7)
+        create.assert_called_once_with(pool_connections=3, pool_maxsize=7)
+        self.assertIs(builder.call_args[1]['session'], create.return_value)
+
+    def test_send_and_construct_request_settings(self):
+        builder = mock.MagicMock()
+        request = mock.Mock(url='url')
+        with mock.patch('pypermedia.client.create_session'):
+            HypermediaClient.send_and_construct(request, builder=builder, pool_maxsize=7, verify=True, codec='json',
+                                                deadline=5, scheduler='scheduler')
+        kwargs = builder.call_args[1]
+        self.assertEqual((True, 'json', 5, 'scheduler'), (kwargs['verify'], kwargs['codec'], kwargs['deadline'],
+                                                          kwargs['scheduler']))
+        self.assertNotIn('pool_maxsize', kwargs)
+
+    def test_paginate(self):
+        bodies = {
+            'http://api.io/1': {'class': ['page'], 'links': [{'rel': ['next'], 'href': 'http://api.io/2'}],
+                                'entities': [{'class': ['item'], 'rel': ['item'], 'properties': {'id': 1}}]},
+            'http://api.io/2': {'class': ['page'], 'entities': [{'class': ['item'], 'rel': ['item'],
+                                                                 'properties': {'id': 2}}]},
+        }
+
+        def send(request, verify=False):
+            resp = requests.Response()
+            resp.status_code = 200
+            resp._content = six.binary_type(json.dumps(bodies[request.url]).encode('utf8'))
+            return resp
+        session = mock.Mock(send=mock.Mock(side_effect=send))
+        self.assertEqual([x.id for x in HypermediaClient.paginate('http://api.io/1', session=session)], [1, 2])
+        self.assertEqual([x.id for x in HypermediaClient.paginate('http://api.io/1', session=session, max_pages=1)],
+                         [1])
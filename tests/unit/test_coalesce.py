@@ -0,0 +1,136 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.client import HypermediaClient
+from pypermedia.coalesce import RequestCoalescer
+
+from concurrent.futures import ThreadPoolExecutor
+from requests import Request, Response
+
+import json
+import mock
+import threading
+import time
+import unittest2
+
+ROOT = {'class': ['root'], 'links': [{'rel': ['self'], 'href': 'http://api.io/'},
+                                     {'rel': ['schema'], 'href': 'http://api.io/schema'}],
+        'actions': [{'name': 'find', 'href': 'http://api.io/find', 'method': 'GET', 'fields': [{'name': 'q'}]},
+                    {'name': 'create', 'href': 'http://api.io/find', 'method': 'POST', 'fields': [{'name': 'q'}]}]}
+
+
+def _response(document):
+    resp = Response()
+    resp.status_code = 200
+    resp.headers['Content-Type'] = 'application/vnd.siren+json'
+    resp._content = json.dumps(document).encode('utf-8')
+    resp.encoding = 'utf-8'
+    return resp
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('condition not met')
+        time.sleep(0.001)
+
+
+class TestRequestCoalescer(unittest2.TestCase):
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.request = Request('GET', 'http://api.io/schema').prepare()
+        self.release = threading.Event()
+
+    def blocking(self, result=None, error=None):
+        def retrieve():
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+        return mock.Mock(side_effect=retrieve)
+
+    def test_concurrent_requests_share_retrieval(self):
+        entity = {'items': [1]}
+        retrieve = self.blocking(entity)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.coalescer.fetch, self.request, retrieve) for _ in range(4)]
+            _wait_for(lambda: self.coalescer.stats['coalesced'] == 3)
+            self.release.set()
+            results = [f.result() for f in futures]
+        self.assertEqual(results, [entity] * 4)
+        self.assertEqual(len(set(id(x) for x in results + [entity])), 5)  # each caller may modify its copy
+        self.assertEqual(retrieve.call_count, 1)
+        self.assertEqual(self.coalescer.stats, dict(requests=1, coalesced=3))
+        self.assertEqual(self.coalescer.in_flight(), 0)
+
+    def test_errors_are_shared(self):
+        retrieve = self.blocking(error=ValueError('boom'))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(self.coalescer.fetch, self.request, retrieve) for _ in range(2)]
+            _wait_for(lambda: self.coalescer.stats['coalesced'] == 1)
+            self.release.set()
+            for f in futures:
+                self.assertRaises(ValueError, f.result)
+        self.assertEqual(retrieve.call_count, 1)
+        self.assertEqual(self.coalescer.in_flight(), 0)
+
+    def test_completed_requests_are_not_shared(self):
+        retrieve = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(self.coalescer.fetch(self.request, retrieve), 1)
+        self.assertEqual(self.coalescer.fetch(self.request, retrieve), 2)
+
+    def test_key(self):
+        other = Request('GET', 'http://api.io/schema', headers={'Accept': 'text/html'}).prepare()
+        self.assertNotEqual(RequestCoalescer.key(self.request), RequestCoalescer.key(other))
+        self.assertEqual(RequestCoalescer.key(self.request),
+                         RequestCoalescer.key(Request('GET', 'http://api.io/schema').prepare()))
+
+    def test_other_methods(self):
+        post = Request('POST', 'http://api.io/schema', data='{}').prepare()
+        retrieve = mock.Mock(return_value=1)
+        self.coalescer.fetch(post, retrieve)
+        self.assertEqual(self.coalescer.stats, dict(requests=0, coalesced=0))
+
+
+class TestCoalescedTraversal(unittest2.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.session = mock.Mock()
+        self.coalescer = RequestCoalescer()
+
+        def send(request, **kwargs):
+            if request.url == 'http://api.io/':
+                return _response(ROOT)
+            self.release.wait(5)
+            return _response({'class': ['schema'], 'properties': {'url': request.url}})
+        self.session.send.side_effect = send
+        self.client = HypermediaClient.connect('http://api.io/', session=self.session, coalescer=self.coalescer)
+
+    def concurrently(self, function, count=3):
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(function) for _ in range(count)]
+            _wait_for(lambda: self.coalescer.stats['coalesced'] == count - 1)
+            self.release.set()
+            return [f.result() for f in futures]
+
+    def test_links(self):
+        objects = self.concurrently(self.client.schema)
+        self.assertEqual(self.session.send.call_count, 2)
+        self.assertEqual(len(set(id(o) for o in objects)), 3)
+        self.assertEqual(len(set(id(o._siren_entity) for o in objects)), 3)
+        self.assertEqual([o.url for o in objects], ['http://api.io/schema'] * 3)
+
+    def test_get_actions(self):
+        objects = self.concurrently(lambda: self.client.find(q='a'))
+        self.assertEqual(self.session.send.call_count, 2)
+        self.assertEqual(objects[0].url, 'http://api.io/find?q=a')
+
+    def test_other_actions_are_not_coalesced(self):
+        self.release.set()
+        self.client.create(q='a')
+        self.client.create(q='a')
+        self.assertEqual(self.session.send.call_count, 3)
+        self.assertEqual(self.coalescer.stats['requests'], 0)
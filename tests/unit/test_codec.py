@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia import codec as codec_module
+from pypermedia.codec import get_codec, JsonCodec, StdlibJsonCodec, OrjsonCodec, CODECS
+from pypermedia.client import HypermediaClient
+from pypermedia.siren import SirenBuilder, SirenAction, SirenLink
+
+from requests import Response
+from requests.utils import get_encoding_from_headers
+
+import json
+import mock
+import unittest2
+
+VALUE = {'name': 'café', 'ids': [1, 2.5, None, True], 'nested': {'href': 'http://api.io/a/b'}}
+
+
+class RecordingCodec(StdlibJsonCodec):
+    def __init__(self):
+        self.loaded = []
+        self.dumped = []
+
+    def loads(self, data):
+        self.loaded.append(data)
+        return super(RecordingCodec, self).loads(data)
+
+    def dumps(self, value):
+        self.dumped.append(value)
+        return super(RecordingCodec, self).dumps(value)
+
+
+def _response(body, content_type='application/vnd.siren+json'):
+    resp = Response()
+    resp.status_code = 200
+    resp.headers['Content-Type'] = content_type
+    resp._content = body
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    return resp
+
+
+class TestGetCodec(unittest2.TestCase):
+    def test_by_name(self):
+        self.assertIsInstance(get_codec('json'), StdlibJsonCodec)
+        self.assertIs(get_codec('json'), get_codec('json'))
+        self.assertRaises(ValueError, get_codec, 'nope')
+
+    def test_instance(self):
+        codec = RecordingCodec()
+        self.assertIs(get_codec(codec), codec)
+
+    def test_default_is_stdlib(self):
+        # faster backends are only used when selected, whether or not they are installed
+        self.assertIs(get_codec(), get_codec('json'))
+        self.assertIsInstance(get_codec(), StdlibJsonCodec)
+        entity = SirenBuilder().from_api_response('{"class": ["a"], "properties": {"id": 1234567890123456789012}}')
+        self.assertEqual(entity.properties['id'], 1234567890123456789012)
+        self.assertEqual(get_codec().dumps({'f': '2', 'n': 2 ** 70, 'e': '\u00e9'}),
+                         '{"f": "2", "n": 1180591620717411303424, "e": "\\u00e9"}')
+
+    def test_missing_backend(self):
+        with mock.patch.object(codec_module, 'orjson', None):
+            self.assertRaises(ImportError, OrjsonCodec)
+
+
+class TestCodecs(unittest2.TestCase):
+    def test_round_trip(self):
+        for name, _ in CODECS:
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+            encoded = codec.dumps(VALUE)
+            self.assertIsInstance(encoded, type(''))
+            self.assertEqual(json.loads(encoded), VALUE, name)
+            self.assertEqual(codec.loads(encoded), VALUE, name)
+            self.assertEqual(codec.loads(encoded.encode('utf-8')), VALUE, name)
+
+
+class TestSirenCodec(unittest2.TestCase):
+    def test_decodes_response_bytes(self):
+        codec = RecordingCodec()
+        body = json.dumps({'class': ['a'], 'properties': {'name': 'café'}}).encode('utf-8')
+        entity = SirenBuilder(codec=codec).from_api_response(_response(body))
+        self.assertEqual(entity.properties['name'], 'café')
+        self.assertEqual(codec.loaded, [body])
+
+    def test_decodes_declared_charset(self):
+        codec = RecordingCodec()
+        body = '{"class": ["a"], "properties": {"name": "café"}}'.encode('latin-1')
+        entity = SirenBuilder(codec=codec).from_api_response(_response(body, 'application/json; charset=latin-1'))
+        self.assertEqual(entity.properties['name'], 'café')
+
+    def test_serializes_with_codec(self):
+        codec = RecordingCodec()
+        entity = SirenBuilder(codec=codec).from_api_response({
+            'class': ['a'], 'links': [{'rel': ['self'], 'href': 'http://a.io/a'}],
+            'actions': [{'name': 'update', 'href': 'http://a.io/a', 'method': 'POST', 'fields': [{'name': 'tags'}]}]})
+        self.assertIs(entity.actions[0].codec, codec)
+        entity.as_json()
+        entity.links[0].as_json()
+        entity.actions[0].as_request(tags=['x', 'y'])
+        self.assertEqual(codec.dumped[-1], ['x', 'y'])
+        self.assertEqual(len(codec.dumped), 3)
+
+    def test_prepare_payload_parameters(self):
+        self.assertEqual(SirenAction.prepare_payload_parameters(a=[1], b='text', c=None), {'a': '[1]', 'b': 'text'})
+
+    def test_client_codec(self):
+        session = mock.Mock()
+        session.send.return_value = _response(b'{"class": ["a"], "links": [{"rel": ["self"], "href": "http://a.io"}]}')
+        obj = HypermediaClient.connect('http://a.io', session=session, codec='json')
+        self.assertIsInstance(obj._siren_entity.codec, StdlibJsonCodec)
+        self.assertIs(obj._siren_entity.links[0].codec, obj._siren_entity.codec)
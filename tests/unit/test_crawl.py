@@ -0,0 +1,156 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.crawl import Crawler
+from pypermedia.siren import SirenBuilder
+
+from requests import Response
+from requests.exceptions import ConnectionError
+
+import json
+import mock
+import threading
+import time
+import unittest2
+
+
+def _link(rel, href):
+    return {'rel': [rel], 'href': href}
+
+
+GRAPH = {
+    'http://api.io/': {'class': ['root'], 'links': [_link('self', 'http://api.io/'),
+                                                    _link('orders', 'http://api.io/orders'),
+                                                    _link('customers', 'http://api.io/customers')]},
+    'http://api.io/orders': {'class': ['orders'], 'links': [_link('self', 'http://api.io/orders')], 'entities': [
+        {'class': ['order'], 'rel': ['item'], 'href': 'http://api.io/orders/1'},
+        {'class': ['order'], 'rel': ['item'], 'properties': {'id': 2},
+         'links': [_link('customer', 'http://api.io/customers/2')]}]},
+    'http://api.io/customers': {'class': ['customers'], 'links': [_link('up', 'http://api.io/'),
+                                                                  _link('item', 'http://api.io/customers/2')]},
+    'http://api.io/orders/1': {'class': ['order'], 'links': [_link('customer', 'http://other.io/customers/1')]},
+    'http://api.io/customers/2': {'class': ['customer']},
+    'http://other.io/customers/1': {'class': ['customer']},
+}
+
+
+def _response(url):
+    resp = Response()
+    if url in GRAPH:
+        resp.status_code = 200
+        resp.headers['Content-Type'] = 'application/vnd.siren+json'
+        resp._content = json.dumps(GRAPH[url]).encode('utf-8')
+    else:
+        resp.status_code = 404
+        resp._content = b''
+    resp._content_consumed = True
+    resp.url = url
+    return resp
+
+
+class TestCrawler(unittest2.TestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.send.side_effect = lambda request, **kwargs: _response(request.url)
+
+    def crawler(self, **kwargs):
+        return Crawler(SirenBuilder(session=self.session), **kwargs)
+
+    def sent(self):
+        return [c[0][0].url for c in self.session.send.call_args_list]
+
+    def test_crawl(self):
+        crawler = self.crawler(max_workers=1)
+        entities = list(crawler.crawl('http://api.io/'))
+        self.assertEqual([e.classnames[0] for e in entities],
+                         ['root', 'orders', 'customers', 'order', 'customer', 'customer'])
+        # breadth-first, every url once
+        self.assertEqual(self.sent(), ['http://api.io/', 'http://api.io/orders', 'http://api.io/customers',
+                                       'http://api.io/orders/1', 'http://api.io/customers/2',
+                                       'http://other.io/customers/1'])
+        self.assertEqual(crawler.visited, set(GRAPH))
+
+    def test_normalized_urls(self):
+        graph = {'http://api.io/': {'class': ['root'], 'links': [_link('a', 'items/1'), _link('self', '#top'),
+                                                                 _link('b', 'http://api.io/items/1#details'),
+                                                                 _link('c', '/items/1')]},
+                 'http://api.io/items/1': {'class': ['item'], 'links': [_link('up', '../')]}}
+        crawler = self.crawler()
+        with mock.patch.dict(GRAPH, graph, clear=True):
+            entities = list(crawler.crawl('http://api.io/#start'))
+        self.assertEqual([e.classnames[0] for e in entities], ['root', 'item'])
+        self.assertEqual(self.sent(), ['http://api.io/', 'http://api.io/items/1'])
+        self.assertEqual(crawler.visited, set(graph))
+
+    def test_rel_filters(self):
+        list(self.crawler(rels=['orders', 'item']).crawl('http://api.io/'))
+        self.assertEqual(set(self.sent()), {'http://api.io/', 'http://api.io/orders', 'http://api.io/orders/1'})
+
+        self.session.send.reset_mock()
+        list(self.crawler(exclude_rels='customer').crawl('http://api.io/'))
+        self.assertNotIn('http://other.io/customers/1', self.sent())
+        self.assertIn('http://api.io/customers/2', self.sent())
+
+    def test_budgets(self):
+        list(self.crawler(max_depth=1).crawl('http://api.io/'))
+        self.assertEqual(set(self.sent()), {'http://api.io/', 'http://api.io/orders', 'http://api.io/customers'})
+
+        self.session.send.reset_mock()
+        self.assertEqual(len(list(self.crawler(max_pages=4).crawl('http://api.io/'))), 4)
+        self.assertEqual(self.session.send.call_count, 4)
+
+    def test_not_found_and_errors(self):
+        root = dict(GRAPH['http://api.io/'])
+        root['links'] = [_link('missing', 'http://api.io/missing'), _link('down', 'http://down.io/')]
+
+        def send(request, **kwargs):
+            if request.url == 'http://down.io/':
+                raise ConnectionError('down')
+            if request.url == 'http://api.io/':
+                resp = _response(request.url)
+                resp._content = json.dumps(root).encode('utf-8')
+                return resp
+            return _response(request.url)
+        self.session.send.side_effect = send
+
+        crawler = self.crawler(ignore_errors=True)
+        self.assertEqual([e.classnames[0] for e in crawler.crawl('http://api.io/')], ['root'])
+        self.assertEqual(list(crawler.errors), ['http://down.io/'])
+        self.assertRaises(ConnectionError, list, self.crawler().crawl('http://api.io/'))
+
+    def test_per_host_concurrency(self):
+        lock = threading.Lock()
+        active = {}
+        peaks = {}
+
+        def send(request, **kwargs):
+            host = request.url.split('/')[2]
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peaks[host] = max(peaks.get(host, 0), active[host])
+            time.sleep(0.01)
+            with lock:
+                active[host] -= 1
+            if request.url == 'http://api.io/':
+                return _fan_out()
+            return _response('http://api.io/customers/2')
+
+        def _fan_out():
+            resp = _response('http://api.io/')
+            links = [_link('item', 'http://{0}.io/{1}'.format(host, i)) for host in ('a', 'b') for i in range(6)]
+            resp._content = json.dumps({'class': ['root'], 'links': links}).encode('utf-8')
+            return resp
+        self.session.send.side_effect = send
+
+        entities = list(self.crawler(max_workers=6, max_per_host=2).crawl('http://api.io/'))
+        self.assertEqual(len(entities), 13)
+        self.assertEqual(peaks['a.io'], 2)
+        self.assertEqual(peaks['b.io'], 2)
+
+    def test_close(self):
+        crawl = self.crawler().crawl('http://api.io/')
+        self.assertEqual(next(crawl).classnames, ['root'])
+        crawl.close()
+        self.assertLessEqual(self.session.send.call_count, 3)
@@ -0,0 +1,233 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.client import HypermediaClient
+from pypermedia.disk_cache import DiskCache
+from pypermedia.gzip_requests import GzipRequest
+from pypermedia.siren import SirenBuilder, UnexpectedStatusError
+
+from requests import Request, Response
+
+import io
+import json
+import mock
+import os
+import shutil
+import tempfile
+import unittest2
+
+ROOT = {'class': ['root'], 'links': [{'rel': ['self'], 'href': 'http://api.io/'},
+                                     {'rel': ['orders'], 'href': 'http://api.io/orders'}]}
+
+
+def _response(status_code=200, body=None, headers=None):
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers['Content-Type'] = 'application/vnd.siren+json'
+    resp.headers.update(headers or {})
+    resp._content = json.dumps(body).encode('utf-8') if body is not None else b''
+    resp._content_consumed = True
+    return resp
+
+
+def _request(url='http://api.io/thing', method='GET', headers=None):
+    return Request(method, url, headers=headers).prepare()
+
+
+def _build(response):
+    return SirenBuilder().from_api_response(response)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDiskCache(unittest2.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'responses.cache')
+        self.clock = Clock()
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        shutil.rmtree(self.directory)
+
+    def cache(self, **kwargs):
+        cache = DiskCache(self.path, clock=self.clock, **kwargs)
+        self.caches.append(cache)
+        return cache
+
+    def test_warm_restart(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60'}))
+        self.assertEqual(self.cache().fetch(_request(), send, _build).classnames, ['a'])
+        self.caches[0].close()
+
+        restarted = self.cache()
+        self.clock.now += 30
+        self.assertEqual(restarted.fetch(_request(), send, _build).classnames, ['a'])
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(restarted.stats['hits'], 1)
+
+    def test_revalidation_is_persisted(self):
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'ETag': '"v1"'}))
+        cache = self.cache()
+        cache.fetch(_request(), send, _build)
+        send.return_value = _response(status_code=304, headers={'Cache-Control': 'max-age=10'})
+        self.assertEqual(cache.fetch(_request(), send, _build).classnames, ['a'])
+        self.assertEqual(send.call_args[0][0].headers['If-None-Match'], '"v1"')
+        self.assertEqual(cache.stats['revalidations'], 1)
+
+        restarted = self.cache()
+        self.assertTrue(restarted.is_fresh(restarted.get(_request().url)))
+        self.assertEqual(restarted.get(_request().url).etag, '"v1"')
+
+    def test_not_stored(self):
+        cache = self.cache()
+        cache.fetch(_request(), mock.Mock(return_value=_response(body={'class': ['a']})), _build)
+        cache.fetch(_request(), mock.Mock(return_value=_response(body={'class': ['a']}, headers={
+            'Cache-Control': 'no-store', 'ETag': '"v1"'})), _build)
+        cache.fetch(_request(method='POST'), mock.Mock(return_value=_response(body={'class': ['a']}, headers={
+            'Cache-Control': 'max-age=60'})), _build)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+    def test_unsafe_method_invalidates(self):
+        cache = self.cache()
+        cache.fetch(_request(), mock.Mock(return_value=_response(body={'class': ['a']}, headers={
+            'Cache-Control': 'max-age=60'})), _build)
+        self.assertRaises(UnexpectedStatusError, cache.fetch, _request(method='POST'),
+                          mock.Mock(return_value=_response(status_code=500)), _build)
+        self.assertIn(_request().url, cache)
+        created = _response(status_code=201, body={'class': ['a']})
+        cache.fetch(_request(method='POST'), mock.Mock(return_value=created), _build)
+        self.assertNotIn(_request().url, cache)
+        self.assertNotIn(_request().url, self.cache())
+
+    def test_vary(self):
+        send = mock.Mock(return_value=_response(body={'class': ['json']}, headers={'Cache-Control': 'max-age=60',
+                                                                                  'Vary': 'Accept'}))
+        cache = self.cache()
+        cache.fetch(_request(headers={'Accept': 'application/json'}), send, _build)
+        send.return_value = _response(body={'class': ['siren']}, headers={'Cache-Control': 'max-age=60',
+                                                                          'Vary': 'Accept'})
+        siren = cache.fetch(_request(headers={'Accept': 'application/vnd.siren+json'}), send, _build)
+        self.assertEqual(siren.classnames, ['siren'])
+        self.assertEqual(send.call_count, 2)
+
+        # the response of the url is that of the last request, along with the values it varies on
+        restarted = self.cache()
+        request = _request(headers={'Accept': 'application/vnd.siren+json'})
+        self.assertEqual(restarted.fetch(request, send, _build).classnames, ['siren'])
+        self.assertEqual(send.call_count, 2)
+        self.assertIsNone(restarted.get(request.url, {'accept': 'application/json'}))
+
+        send.return_value = _response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60', 'Vary': '*'})
+        restarted.fetch(_request(headers={'Accept': 'text/html'}), send, _build)
+        self.assertEqual(len(restarted), 0)
+
+    def test_ttl(self):
+        cache = self.cache(default_ttl=60, max_age=120)
+        send = mock.Mock(return_value=_response(body={'class': ['a']}, headers={'ETag': '"v1"'}))
+        cache.fetch(_request(), send, _build)
+        self.clock.now += 59
+        cache.fetch(_request(), send, _build)
+        self.assertEqual(send.call_count, 1)
+
+        send.return_value = _response(status_code=304)
+        self.clock.now += 2
+        cache.fetch(_request(), send, _build)
+        self.assertEqual(cache.stats['revalidations'], 1)
+
+        # stored over max_age ago, the entry is neither used nor revalidated
+        self.clock.now += 60
+        send.return_value = _response(body={'class': ['b']})
+        self.assertEqual(cache.fetch(_request(), send, _build).classnames, ['b'])
+        self.assertNotIn('If-None-Match', send.call_args[0][0].headers)
+
+    def test_eviction(self):
+        cache = self.cache(max_bytes=4096)
+        body = {'class': ['a'], 'properties': {'padding': 'x' * 900}}
+        for i in range(8):
+            cache.fetch(_request('http://api.io/{0}'.format(i)),
+                        mock.Mock(return_value=_response(body=body, headers={'Cache-Control': 'max-age=60'})), _build)
+            cache.get('http://api.io/0')  # keep using the first one
+        self.assertLessEqual(os.path.getsize(self.path), 4096)
+        self.assertIn('http://api.io/0', cache)
+        self.assertIn('http://api.io/7', cache)
+        self.assertNotIn('http://api.io/1', cache)
+        self.assertGreater(cache.stats['evictions'], 0)
+        self.assertEqual(len(self.cache()), len(cache))
+
+    def test_invalidate_and_clear(self):
+        cache = self.cache()
+        for url in ('http://api.io/a', 'http://api.io/b'):
+            cache.store(url, _response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60'}))
+        cache.invalidate('http://api.io/a')
+        self.assertEqual(list(self.cache()._entries), ['http://api.io/b'])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(len(self.cache()), 0)
+
+    def test_shared_readonly(self):
+        writer = self.cache(max_bytes=4096)
+        reader = self.cache(readonly=True)
+        headers = {'Cache-Control': 'max-age=60'}
+        writer.store('http://api.io/a', _response(body={'class': ['a']}, headers=headers))
+        self.assertEqual(reader.fetch(_request('http://api.io/a'), mock.Mock(), _build).classnames, ['a'])
+
+        # the reader never writes
+        size = os.path.getsize(self.path)
+        send = mock.Mock(return_value=_response(body={'class': ['b']}, headers=headers))
+        reader.fetch(_request('http://api.io/b'), send, _build)
+        self.assertNotIn('http://api.io/b', writer)
+        self.assertEqual(os.path.getsize(self.path), size)
+
+        # compactions by the writer are picked up
+        for i in range(8):
+            writer.store('http://api.io/{0}'.format(i), _response(body={'padding': 'x' * 900}, headers=headers))
+        self.assertEqual(len(reader), len(writer))
+        self.assertEqual(sorted(reader._entries), sorted(writer._entries))
+        self.assertRaises(IOError, DiskCache, os.path.join(self.directory, 'missing'), readonly=True)
+
+    def test_partial_record(self):
+        cache = self.cache()
+        cache.store('http://api.io/a', _response(body={'class': ['a']}, headers={'Cache-Control': 'max-age=60'}))
+        cache.close()
+        size = os.path.getsize(self.path)
+        with io.open(self.path, 'ab') as f:
+            f.write(b'PSC1\x00\x00')
+
+        restarted = self.cache()
+        self.assertEqual(os.path.getsize(self.path), size)
+        restarted.store('http://api.io/b', _response(body={'class': ['b']}, headers={'Cache-Control': 'max-age=60'}))
+        self.assertEqual(sorted(self.cache()._entries), ['http://api.io/a', 'http://api.io/b'])
+
+    def test_undecoded_bodies_are_stored_decompressed(self):
+        cache = self.cache()
+        response = _response(headers={'Cache-Control': 'max-age=60', 'Content-Encoding': 'gzip'})
+        response._content = GzipRequest.gzip_compress(b'{"class": ["a"]}')
+        with mock.patch('pypermedia.disk_cache.undecoded_encodings', return_value=['gzip']):
+            cache.store('http://api.io/thing', response)
+        entry, body = cache.lookup('http://api.io/thing')
+        self.assertEqual(body, b'{"class": ["a"]}')
+        self.assertNotIn('Content-Encoding', entry.headers)
+
+    def test_client(self):
+        session = mock.Mock()
+        session.send.side_effect = lambda request, **kwargs: _response(
+            body=ROOT if request.url == 'http://api.io/' else {'class': ['orders']},
+            headers={'Cache-Control': 'max-age=60'})
+        HypermediaClient.connect('http://api.io/', session=session, cache=self.cache()).orders()
+        self.assertEqual(session.send.call_count, 2)
+
+        client = HypermediaClient.connect('http://api.io/', session=session, cache=self.cache(readonly=True))
+        self.assertEqual(client.orders()._siren_entity.classnames, ['orders'])
+        self.assertEqual(session.send.call_count, 2)
@@ -0,0 +1,188 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia import gzip_requests
+from pypermedia.gzip_requests import GzipRequest, create_compressor, compress_chunks, available_encodings, \
+    accept_encoding, create_decompressor, decompress_chunks, undecoded_encodings
+from pypermedia.metrics import Metrics, DECOMPRESS, DECODE
+from pypermedia.siren import SirenBuilder, _check_and_decode_response
+
+from requests import Request, Response
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+import functools
+import io
+import json
+import mock
+import unittest2
+import zlib
+
+PAYLOAD = b'{"name": "value"}' * 200
+
+
+class TestCompressors(unittest2.TestCase):
+    def test_gzip_and_deflate(self):
+        self.assertEqual(zlib.decompress(b''.join(compress_chunks([PAYLOAD], create_compressor('gzip'))), 47),
+                         PAYLOAD)
+        self.assertEqual(zlib.decompress(b''.join(compress_chunks([PAYLOAD], create_compressor('deflate')))),
+                         PAYLOAD)
+
+    def test_levels(self):
+        fast = b''.join(compress_chunks([PAYLOAD], create_compressor('gzip', 1)))
+        self.assertEqual(zlib.decompress(fast, 47), PAYLOAD)
+        self.assertEqual(zlib.decompress(GzipRequest.gzip_compress(PAYLOAD), 47), PAYLOAD)
+
+    def test_unknown_and_missing(self):
+        self.assertRaises(ValueError, create_compressor, 'lzma')
+        with mock.patch.object(gzip_requests, 'brotli', None):
+            self.assertRaises(ImportError, create_compressor, 'br')
+            self.assertNotIn('br', available_encodings())
+        with mock.patch.object(gzip_requests, 'zstandard', None):
+            self.assertRaises(ImportError, create_compressor, 'zstd')
+
+    def test_chunks(self):
+        chunks = list(compress_chunks((PAYLOAD[i:i + 100] for i in range(0, len(PAYLOAD), 100)),
+                                      create_compressor('gzip')))
+        self.assertEqual(zlib.decompress(b''.join(chunks), 47), PAYLOAD)
+
+
+class TestDecompressors(unittest2.TestCase):
+    def test_round_trip(self):
+        for encoding in available_encodings():
+            compressed = b''.join(compress_chunks([PAYLOAD], create_compressor(encoding)))
+            chunks = [compressed[i:i + 64] for i in range(0, len(compressed), 64)]
+            self.assertEqual(b''.join(decompress_chunks(chunks, [encoding])), PAYLOAD, encoding)
+
+    def test_raw_deflate(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(PAYLOAD) + compressor.flush()
+        self.assertEqual(b''.join(decompress_chunks([compressed], ['deflate'])), PAYLOAD)
+
+    def test_several_encodings(self):
+        gzipped = GzipRequest.gzip_compress(PAYLOAD)
+        compressed = b''.join(compress_chunks([gzipped], create_compressor('deflate')))
+        self.assertEqual(b''.join(decompress_chunks([compressed], ['gzip', 'deflate'])), PAYLOAD)
+
+    def test_unknown_and_missing(self):
+        self.assertRaises(ValueError, create_decompressor, 'lzma')
+        with mock.patch.object(gzip_requests, 'zstandard', None):
+            self.assertRaises(ImportError, create_decompressor, 'zstd')
+
+    def test_accept_encoding(self):
+        encodings = accept_encoding().split(', ')
+        self.assertEqual(encodings[:2], ['gzip', 'deflate'])
+        self.assertEqual(set(encodings), set(HTTPResponse.CONTENT_DECODERS + available_encodings()) - {'x-gzip'})
+
+
+def _urllib3_response(body, content_encoding, decoders=None):
+    """A response read through urllib3, which decodes the content encodings in decoders."""
+    raw = HTTPResponse(body=io.BytesIO(body), status=200, preload_content=False, decode_content=True,
+                       headers={'Content-Type': 'application/vnd.siren+json', 'Content-Encoding': content_encoding})
+    if decoders is not None:
+        raw.CONTENT_DECODERS = decoders
+    return HTTPAdapter().build_response(Request('GET', 'http://api.io/items').prepare(), raw)
+
+
+class TestCompressedResponses(unittest2.TestCase):
+    def setUp(self):
+        self.document = {'class': ['items'], 'properties': {'name': 'caf\u00e9'},
+                         'entities': [{'class': ['item'], 'rel': ['item'], 'properties': {'id': i}} for i in range(50)]}
+        self.body = GzipRequest.gzip_compress(json.dumps(self.document).encode('utf-8'))
+
+    def test_decoded_by_urllib3(self):
+        response = _urllib3_response(self.body, 'gzip')
+        self.assertEqual(undecoded_encodings(response), [])
+        self.assertEqual(SirenBuilder().from_api_response(response).properties['name'], 'caf\u00e9')
+
+    def test_decoded_by_client(self):
+        events = []
+        response = _urllib3_response(self.body, 'gzip', decoders=[])
+        self.assertEqual(undecoded_encodings(response), ['gzip'])
+        entity = SirenBuilder(metrics=Metrics([events.append])).from_api_response(response)
+        self.assertEqual(len(entity.entities), 50)
+
+        decompress = [e for e in events if e.phase == DECOMPRESS][0]
+        self.assertEqual(decompress.attributes['content_encoding'], 'gzip')
+        self.assertEqual(decompress.attributes['bytes_wire'], len(self.body))
+        decode = [e for e in events if e.phase == DECODE][0]
+        self.assertEqual(decode.attributes['bytes_in'], decompress.attributes['bytes_in'])
+        self.assertIsNone(decode.attributes['charset'])
+
+    def test_streamed(self):
+        response = _urllib3_response(self.body, 'gzip', decoders=[])
+        with SirenBuilder().stream_api_response(response, chunk_size=64) as stream:
+            self.assertEqual(stream.root.properties['name'], 'caf\u00e9')
+            self.assertEqual(len(list(stream)), 50)
+
+    def test_decoded_responses(self):
+        response = Response()
+        response.status_code = 200
+        response.headers['Content-Encoding'] = 'gzip'
+        response._content = b'{"class": ["a"]}'
+        self.assertEqual(undecoded_encodings(response), [])
+
+    def test_assumes_utf8(self):
+        response = Response()
+        response.status_code = 200
+        response._content = '{"name": "caf\u00e9"}'.encode('utf-8')
+        with mock.patch('requests.models.chardet', create=True) as chardet:
+            self.assertEqual(json.loads(_check_and_decode_response(response))['name'], 'caf\u00e9')
+        self.assertEqual(response.encoding, 'utf-8')
+        self.assertFalse(chardet.detect.called)
+
+
+class TestGzipRequest(unittest2.TestCase):
+    def test_accept_encoding(self):
+        self.assertEqual(GzipRequest('GET', 'http://api.io').prepare().headers['Accept-Encoding'], accept_encoding())
+
+    def test_compresses_payload(self):
+        p = GzipRequest('POST', 'http://api.io', data=PAYLOAD).prepare()
+        self.assertEqual(p.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(p.headers['Content-Length'], str(len(p.body)))
+        self.assertEqual(zlib.decompress(p.body, 47), PAYLOAD)
+
+    def test_text_payload(self):
+        p = GzipRequest('PUT', 'http://api.io', data=PAYLOAD.decode('utf-8')).prepare()
+        self.assertEqual(zlib.decompress(p.body, 47), PAYLOAD)
+
+    def test_small_payload(self):
+        p = GzipRequest('POST', 'http://api.io', data=b'{}').prepare()
+        self.assertEqual(p.body, b'{}')
+        self.assertNotIn('Content-Encoding', p.headers)
+
+        p = GzipRequest('POST', 'http://api.io', data=b'{}', min_size=0).prepare()
+        self.assertEqual(p.headers['Content-Encoding'], 'gzip')
+
+    def test_other_methods(self):
+        p = GzipRequest('DELETE', 'http://api.io', data=PAYLOAD).prepare()
+        self.assertEqual(p.body, PAYLOAD)
+
+    def test_configured(self):
+        factory = functools.partial(GzipRequest, content_encoding='deflate', level=1)
+        p = factory('POST', 'http://api.io', data=PAYLOAD).prepare()
+        self.assertEqual(p.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(p.body), PAYLOAD)
+
+    def test_streams_generators(self):
+        consumed = []
+
+        def chunks():
+            for i in range(0, len(PAYLOAD), 500):
+                consumed.append(i)
+                yield PAYLOAD[i:i + 500]
+        p = GzipRequest('POST', 'http://api.io', data=chunks()).prepare()
+        self.assertEqual(consumed, [])
+        self.assertEqual(p.headers['Transfer-Encoding'], 'chunked')
+        self.assertNotIn('Content-Length', p.headers)
+        self.assertEqual(zlib.decompress(b''.join(p.body), 47), PAYLOAD)
+
+    def test_streams_files(self):
+        p = GzipRequest('POST', 'http://api.io', data=io.BytesIO(PAYLOAD), chunk_size=100).prepare()
+        self.assertNotIn('Content-Length', p.headers)
+        self.assertEqual(zlib.decompress(b''.join(p.body), 47), PAYLOAD)
+
+        p = GzipRequest('POST', 'http://api.io', data=io.BytesIO(b'{}')).prepare()
+        self.assertNotIn('Content-Encoding', p.headers)
@@ -0,0 +1,174 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.cache import ResponseCache
+from pypermedia.client import HypermediaClient
+from pypermedia.metrics import Metrics, MetricsAggregator, MetricEvent, measure, operation, percentile, \
+    SEND, DECODE, CONSTRUCT, PYTHON_OBJECT, CACHE
+
+from requests import Response
+from requests.utils import get_encoding_from_headers
+
+import json
+import mock
+import unittest2
+
+ROOT = {
+    'class': ['root'],
+    'links': [{'rel': ['self'], 'href': 'http://api.io/'}, {'rel': ['orders'], 'href': 'http://api.io/orders'}],
+    'actions': [{'name': 'create-order', 'href': 'http://api.io/orders', 'method': 'POST',
+                 'fields': [{'name': 'item'}]}],
+}
+ORDERS = {'class': ['orders'], 'properties': {'count': 1}, 'links': [{'rel': ['self'], 'href': 'http://api.io/orders'}]}
+
+
+def _response(document, headers=None):
+    resp = Response()
+    resp.status_code = 200
+    resp.headers['Content-Type'] = 'application/vnd.siren+json'
+    resp.headers.update(headers or {})
+    resp._content = json.dumps(document).encode('utf-8')
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    return resp
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+class TestMetrics(unittest2.TestCase):
+    def test_measure(self):
+        events = []
+        metrics = Metrics([events.append], clock=Clock())
+        with metrics.measure(SEND, 'next', url='http://a.io') as measurement:
+            self.assertTrue(measurement.active)
+            measurement.update(status_code=200)
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events[0].phase, events[0].name, events[0].duration), (SEND, 'next', 1))
+        self.assertEqual(events[0].attributes, {'url': 'http://a.io', 'status_code': 200})
+
+    def test_measure_error(self):
+        events = []
+        metrics = Metrics([events.append])
+        error = ValueError('bad')
+        with self.assertRaises(ValueError):
+            with metrics.measure(DECODE):
+                raise error
+        self.assertIs(events[0].error, error)
+
+    def test_no_listeners(self):
+        metrics = Metrics()
+        self.assertFalse(metrics.measure(SEND).active)
+        self.assertFalse(measure(None, SEND).active)
+        with operation(None, 'next'):
+            pass
+
+    def test_listener_errors_are_ignored(self):
+        events = []
+        metrics = Metrics([mock.Mock(side_effect=RuntimeError), events.append])
+        metrics.emit(CACHE, result='hit')
+        self.assertEqual(len(events), 1)
+
+    def test_operation_names_events(self):
+        events = []
+        metrics = Metrics([events.append])
+        with metrics.operation('next'):
+            with metrics.operation('item'):
+                metrics.emit(SEND)
+            metrics.emit(SEND)
+            metrics.emit(SEND, 'explicit')
+        metrics.emit(SEND)
+        self.assertEqual([e.name for e in events], ['item', 'next', 'explicit', None])
+
+
+class TestMetricsAggregator(unittest2.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([3], 90), 3)
+        self.assertIsNone(percentile([], 50))
+
+    def test_aggregates_by_phase_and_name(self):
+        aggregator = MetricsAggregator()
+        for duration in range(1, 11):
+            aggregator(MetricEvent(SEND, 'next', duration, attributes={'status_code': 200, 'bytes_in': 10}))
+        aggregator(MetricEvent(SEND, 'next', 20, error=ValueError(), attributes={'status_code': 500}))
+        aggregator(MetricEvent(CACHE, 'next', attributes={'result': 'hit'}))
+
+        self.assertEqual(set(aggregator.keys()), {(SEND, 'next'), (CACHE, 'next')})
+        self.assertEqual(aggregator.percentiles(SEND, 'next', (50, 100)), {50: 6, 100: 20})
+        self.assertEqual(aggregator.percentiles(SEND, 'other'), {})
+
+        summary = aggregator.summary()
+        send = summary[(SEND, 'next')]
+        self.assertEqual((send['count'], send['errors'], send['bytes_in']), (11, 1, 100))
+        self.assertEqual(send['status_codes'], {200: 10, 500: 1})
+        self.assertEqual(summary[(CACHE, 'next')]['results'], {'hit': 1})
+        self.assertEqual(summary[(CACHE, 'next')]['percentiles'], {})
+
+        aggregator.reset()
+        self.assertEqual(aggregator.keys(), [])
+
+    def test_max_samples(self):
+        aggregator = MetricsAggregator(max_samples=2)
+        for duration in (100, 1, 2):
+            aggregator(MetricEvent(SEND, None, duration))
+        self.assertEqual(aggregator.percentiles(SEND, percents=(100,)), {100: 2})
+        self.assertEqual(aggregator.summary()[(SEND, None)]['count'], 3)
+
+
+class TestClientMetrics(unittest2.TestCase):
+    def setUp(self):
+        self.events = []
+        self.metrics = Metrics([self.events.append])
+        self.session = mock.Mock()
+        self.session.send.side_effect = lambda request, **kwargs: _response(
+            ROOT if request.url == 'http://api.io/' else ORDERS, {'Cache-Control': 'max-age=60'})
+
+    def phases(self, name):
+        return [e.phase for e in self.events if e.name == name]
+
+    def test_traversal(self):
+        client = HypermediaClient.connect('http://api.io/', session=self.session, metrics=self.metrics)
+        self.assertEqual(self.phases(None), [SEND, DECODE, CONSTRUCT])
+        self.assertEqual(self.phases('root'), [PYTHON_OBJECT])
+
+        del self.events[:]
+        client.orders()
+        self.assertEqual(self.phases('orders'), [SEND, DECODE, CONSTRUCT, PYTHON_OBJECT])
+        send = self.events[0]
+        self.assertEqual(send.attributes['url'], 'http://api.io/orders')
+        self.assertEqual(send.attributes['status_code'], 200)
+        self.assertGreater(send.attributes['bytes_in'], 0)
+
+        del self.events[:]
+        client.create_order(item='pen')
+        # the python object is named by the class of the entity
+        self.assertEqual(self.phases('create-order'), [SEND, DECODE, CONSTRUCT])
+        self.assertEqual(self.events[-1].phase, PYTHON_OBJECT)
+        self.assertEqual(self.events[0].attributes['method'], 'POST')
+        self.assertGreater(self.events[0].attributes['bytes_out'], 0)
+
+    def test_cache_results(self):
+        client = HypermediaClient.connect('http://api.io/', session=self.session, metrics=self.metrics,
+                                          cache=ResponseCache())
+        client.orders()
+        client.orders()
+        results = [e.attributes['result'] for e in self.events if e.phase == CACHE and e.name == 'orders']
+        self.assertEqual(results, ['miss', 'hit'])
+        self.assertEqual(self.session.send.call_count, 2)
+
+    def test_without_metrics(self):
+        client = HypermediaClient.connect('http://api.io/', session=self.session)
+        self.assertIsNone(client._siren_entity.metrics)
+        client.orders()
+        self.assertEqual(self.events, [])
@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.multipart import encode_part, is_file, FilePart, MultipartBody
+
+from email.parser import BytesParser
+from requests import Request
+
+import io
+import os
+import shutil
+import tempfile
+import unittest2
+
+
+def _parse(body):
+    message = BytesParser().parsebytes(b'Content-Type: ' + body.content_type.encode('ascii') + b'\r\n\r\n' +
+                                       b''.join(body))
+    return [(part.get_param('name', header='content-disposition'), part.get_filename(),
+             part.get_content_type(), part.get_payload(decode=True)) for part in message.get_payload()]
+
+
+class UnsizedFile(io.RawIOBase):
+    """File which cannot seek, such as a pipe."""
+
+    def __init__(self, content):
+        self.content = io.BytesIO(content)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.content.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class TestMultipartBody(unittest2.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parts(self):
+        path = os.path.join(self.directory, 'photo.png')
+        with io.open(path, 'wb') as f:
+            f.write(b'\x89PNG' * 1000)
+        with io.open(path, 'rb') as f:
+            body = MultipartBody([encode_part('title', 'été'), FilePart('photo', f),
+                                  FilePart('notes', ('notes', io.BytesIO(b'n'), 'text/markdown'))], chunk_size=1024)
+            parts = _parse(body)
+            self.assertEqual(body.len, len(b''.join(body)))
+        self.assertEqual(parts, [
+            ('title', None, 'text/plain', 'été'.encode('utf-8')),
+            ('photo', 'photo.png', 'image/png', b'\x89PNG' * 1000),
+            ('notes', 'notes', 'text/markdown', b'n')])
+
+    def test_streamed_in_chunks(self):
+        content = io.BytesIO(b'a' * 10000)
+        content.seek(100)  # files are sent from their position
+        body = MultipartBody([encode_part('a', 'b'), FilePart('file', content)], chunk_size=1000)
+        chunks = list(body)
+        self.assertEqual(max(len(c) for c in chunks[1:-1]), 1000)
+        self.assertEqual(sum(1 for c in chunks if c == b'a' * 1000), 9)
+
+        # sent again, the file is sent from its original position
+        self.assertEqual(b''.join(body), b''.join(chunks))
+        self.assertEqual(_parse(body)[1][3], b'a' * 9900)
+
+    def test_length(self):
+        body = MultipartBody([encode_part('a', 'b'), FilePart('file', io.BytesIO(b'abc'))])
+        prepared = Request('POST', 'http://api.io', data=body, headers={'Content-Type': body.content_type}).prepare()
+        self.assertEqual(prepared.headers['Content-Length'], str(len(b''.join(body))))
+
+        # bodies whose length is not known are sent chunked
+        body = MultipartBody([FilePart('file', io.BufferedReader(UnsizedFile(b'abc')))])
+        self.assertIsNone(body.len)
+        prepared = Request('POST', 'http://api.io', data=body, headers={'Content-Type': body.content_type}).prepare()
+        self.assertEqual(prepared.headers['Transfer-Encoding'], 'chunked')
+        self.assertNotIn('Content-Length', prepared.headers)
+        self.assertEqual(_parse(body)[0][3], b'abc')
+
+    def test_quoting(self):
+        body = MultipartBody([encode_part('a"b\r\nc', 'x'), FilePart('f', ('x".txt', io.BytesIO(b'')))])
+        content = b''.join(body)
+        self.assertIn(b'name="a%22b%0D%0Ac"', content)
+        self.assertIn(b'filename="x%22.txt"', content)
+        self.assertEqual(len(content), body.len)
+
+    def test_is_file(self):
+        self.assertTrue(is_file(io.BytesIO()))
+        self.assertTrue(is_file(('a.txt', io.BytesIO())))
+        self.assertTrue(is_file(('a.txt', io.BytesIO(), 'text/plain')))
+        self.assertFalse(is_file(('a', 'b')))
+        self.assertFalse(is_file(b'bytes'))
@@ -0,0 +1,253 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.client import HypermediaClient
+from pypermedia.gzip_requests import GzipRequest
+from pypermedia.metrics import Metrics, RETRY
+from pypermedia.multipart import encode_part, MultipartBody
+from pypermedia.policy import Deadline, DeadlineExceeded, RequestPolicy, parse_retry_after, start_deadline
+from pypermedia.siren import SirenBuilder
+
+from requests import Request, Response
+from requests.exceptions import ConnectTimeout, ReadTimeout
+from requests.utils import get_encoding_from_headers
+
+import io
+import json
+import mock
+import time
+import unittest2
+
+ROOT = {'class': ['root'], 'links': [{'rel': ['self'], 'href': 'http://api.io/'},
+                                     {'rel': ['orders'], 'href': 'http://api.io/orders'},
+                                     {'rel': ['search'], 'href': 'http://api.io/search'}]}
+
+
+def _response(status_code=200, document=None, headers=None):
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers['Content-Type'] = 'application/vnd.siren+json'
+    resp.headers.update(headers or {})
+    resp._content = json.dumps(document or {'class': ['a']}).encode('utf-8')
+    resp._content_consumed = True
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    return resp
+
+
+class Clock(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest2.TestCase):
+    def test_remaining(self):
+        clock = Clock()
+        deadline = Deadline(10, clock=clock)
+        self.assertEqual(deadline.remaining(), 10)
+        clock.now += 4
+        self.assertEqual(deadline.remaining(), 6)
+        self.assertFalse(deadline.expired)
+        clock.now += 7
+        self.assertEqual(deadline.remaining(), 0)
+        self.assertTrue(deadline.expired)
+        self.assertRaises(DeadlineExceeded, deadline.check, Request('GET', 'http://api.io').prepare())
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('Thu, 01 Jan 1970 00:01:40 GMT', clock=lambda: 40), 60)
+        self.assertEqual(parse_retry_after('Thu, 01 Jan 1970 00:01:40 GMT', clock=lambda: 400), 0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestRequestPolicy(unittest2.TestCase):
+    def setUp(self):
+        self.sleep = mock.Mock()
+        self.request = Request('GET', 'http://api.io/orders').prepare()
+
+    def policy(self, **kwargs):
+        kwargs.setdefault('jitter', False)
+        return RequestPolicy(sleep=self.sleep, **kwargs)
+
+    def test_timeout(self):
+        self.assertIsNone(RequestPolicy().timeout())
+        self.assertEqual(RequestPolicy(connect_timeout=3, read_timeout=30).timeout(), (3, 30))
+        deadline = Deadline(10, clock=Clock())
+        self.assertEqual(RequestPolicy(connect_timeout=3, read_timeout=30).timeout(deadline), (3, 10))
+        self.assertEqual(RequestPolicy().timeout(deadline), (10, 10))
+
+    def test_backoff(self):
+        policy = self.policy(backoff_factor=0.5, max_backoff=3)
+        self.assertEqual([policy.backoff(attempt) for attempt in range(5)], [0.5, 1, 2, 3, 3])
+        jittered = RequestPolicy(backoff_factor=0.5, random=lambda: 0.5)
+        self.assertEqual(jittered.backoff(2), 1)
+
+    def test_for_name(self):
+        search = RequestPolicy(read_timeout=120)
+        policy = RequestPolicy(read_timeout=5, overrides={'search': search})
+        self.assertIs(policy.for_name('search'), search)
+        self.assertIs(policy.for_name('orders'), policy)
+        self.assertIs(policy.for_name(None), policy)
+
+    def test_retries_failed_responses(self):
+        send = mock.Mock(side_effect=[_response(502), _response(504), _response(200)])
+        response = self.policy(retries=3, read_timeout=5).send(self.request, send)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c[0][1] for c in send.call_args_list], [(None, 5)] * 3)
+        self.assertEqual([c[0][0] for c in self.sleep.call_args_list], [0.1, 0.2])
+
+    def test_retries_exhausted(self):
+        send = mock.Mock(return_value=_response(503))
+        self.assertEqual(self.policy(retries=2).send(self.request, send).status_code, 503)
+        self.assertEqual(send.call_count, 3)
+
+        send = mock.Mock(side_effect=ReadTimeout())
+        self.assertRaises(ReadTimeout, self.policy(retries=1).send, self.request, send)
+        self.assertEqual(send.call_count, 2)
+
+    def test_retry_after(self):
+        send = mock.Mock(side_effect=[_response(429, headers={'Retry-After': '7'}), _response(200)])
+        metrics = mock.Mock()
+        self.policy(retries=1).send(self.request, send, metrics=metrics, name='orders')
+        self.sleep.assert_called_once_with(7)
+        metrics.emit.assert_called_once_with(RETRY, 'orders', url='http://api.io/orders', attempt=1, reason=429,
+                                             delay=7)
+
+    def test_retry_after_too_long(self):
+        send = mock.Mock(return_value=_response(503, headers={'Retry-After': '600'}))
+        self.assertEqual(self.policy(retries=1).send(self.request, send).status_code, 503)
+        self.assertFalse(self.sleep.called)
+
+    def test_non_idempotent_methods(self):
+        post = Request('POST', 'http://api.io/orders', data='{}').prepare()
+        send = mock.Mock(return_value=_response(503))
+        self.assertEqual(self.policy(retries=2).send(post, send).status_code, 503)
+        self.assertEqual(send.call_count, 1)
+
+        send = mock.Mock(side_effect=ReadTimeout())
+        self.assertRaises(ReadTimeout, self.policy(retries=2).send, post, send)
+        self.assertEqual(send.call_count, 1)
+
+        # the request was never sent when the connection could not be established
+        send = mock.Mock(side_effect=[ConnectTimeout(), _response(201)])
+        self.assertEqual(self.policy(retries=2).send(post, send).status_code, 201)
+
+    def test_one_shot_bodies(self):
+        # a streamed compressed body is a generator, exhausted once sent
+        put = GzipRequest('PUT', 'http://api.io/orders/1', data=io.BytesIO(b'x' * 4096)).prepare()
+        send = mock.Mock(return_value=_response(503))
+        self.assertEqual(self.policy(retries=2).send(put, send).status_code, 503)
+        self.assertEqual(send.call_count, 1)
+        send = mock.Mock(side_effect=ReadTimeout())
+        self.assertRaises(ReadTimeout, self.policy(retries=2).send, put, send)
+        self.assertEqual(send.call_count, 1)
+
+        # files are sent again from their position, bytes and re-iterable bodies as they are
+        upload = io.BytesIO(b'0123456789')
+        upload.seek(2)
+        put = Request('PUT', 'http://api.io/orders/1', data=upload).prepare()
+        sent = []
+
+        def send(prepared_request, timeout):
+            sent.append(prepared_request.body.read())
+            return _response(503 if len(sent) < 3 else 200)
+
+        self.assertEqual(self.policy(retries=2).send(put, send).status_code, 200)
+        self.assertEqual(sent, [b'23456789'] * 3)
+        for body in (b'{}', MultipartBody([encode_part('a', 'b')])):
+            put = Request('PUT', 'http://api.io/orders/1', data=body).prepare()
+            send = mock.Mock(side_effect=[_response(503), _response(200)])
+            self.assertEqual(self.policy(retries=1).send(put, send).status_code, 200)
+
+    def test_deadline(self):
+        clock = Clock()
+        deadline = Deadline(1, clock=clock)
+        send = mock.Mock(return_value=_response(503))
+        # the backoff does not fit in the remaining budget
+        policy = self.policy(retries=3, backoff_factor=2)
+        self.assertEqual(policy.send(self.request, send, deadline=deadline).status_code, 503)
+        self.assertEqual(send.call_count, 1)
+
+        clock.now += 1
+        self.assertRaises(DeadlineExceeded, policy.send, self.request, send, deadline=deadline)
+        self.assertEqual(send.call_count, 1)
+
+
+class TestPolicyIntegration(unittest2.TestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.send.side_effect = lambda request, **kwargs: _response(
+            document=ROOT if request.url == 'http://api.io/' else None)
+
+    def test_timeouts_per_rel(self):
+        policy = RequestPolicy(connect_timeout=1, read_timeout=2, overrides={'search': RequestPolicy(read_timeout=60)})
+        client = HypermediaClient.connect('http://api.io/', session=self.session, policy=policy)
+        client.orders()
+        client.search()
+        timeouts = [c[1]['timeout'] for c in self.session.send.call_args_list]
+        self.assertEqual(timeouts, [(1, 2), (1, 2), (None, 60)])
+
+    def test_no_policy(self):
+        client = HypermediaClient.connect('http://api.io/', session=self.session)
+        client.orders()
+        for c in self.session.send.call_args_list:
+            self.assertNotIn('timeout', c[1])
+
+    def test_retries_links(self):
+        responses = [_response(document=ROOT), _response(503), _response(200)]
+        self.session.send.side_effect = responses
+        events = []
+        client = HypermediaClient.connect('http://api.io/', session=self.session, metrics=Metrics([events.append]),
+                                          policy=RequestPolicy(retries=1, sleep=mock.Mock()))
+        self.assertIsNotNone(client.orders())
+        self.assertEqual([(e.name, e.attributes['reason']) for e in events if e.phase == RETRY], [('orders', 503)])
+
+    def test_deadline_propagates(self):
+        clock = Clock()
+        client = HypermediaClient.connect('http://api.io/', session=self.session, deadline=Deadline(5, clock=clock))
+        orders = client.orders()
+        self.assertIs(orders._siren_entity.deadline, client._siren_entity.deadline)
+        self.assertEqual(self.session.send.call_args[1]['timeout'], (5, 5))
+
+        clock.now += 5
+        self.assertRaises(DeadlineExceeded, client.search)
+        self.assertEqual(self.session.send.call_count, 2)
+
+    def test_deadline_seconds(self):
+        # each call starts its own deadline, a long-lived client outlives the budget of any one call
+        client = HypermediaClient.connect('http://api.io/', session=self.session, deadline=0.05)
+        self.assertEqual(client._siren_entity.deadline, 0.05)
+        time.sleep(0.1)
+        self.assertIsNotNone(client.orders())
+        connect, read = self.session.send.call_args[1]['timeout']
+        self.assertTrue(0 < read <= 0.05)
+
+    def test_deadline_per_traversal(self):
+        entity = SirenBuilder(session=self.session, deadline=30).from_api_response(
+            {'class': ['root'], 'entities': [{'rel': ['item'], 'href': 'http://api.io/items/{0}'.format(i)}
+                                             for i in range(3)]})
+        with mock.patch('pypermedia.siren.start_deadline', wraps=start_deadline) as start:
+            entity.expand()
+        self.assertEqual(start.call_count, 1)
+        self.assertEqual(self.session.send.call_count, 3)
+
+        # outside of a traversal each call starts its own
+        link = SirenBuilder(session=self.session, deadline=30).construct_link(['x'], 'http://api.io/x')
+        with mock.patch('pypermedia.siren.start_deadline', wraps=start_deadline) as start:
+            link.retrieve()
+            link.retrieve()
+        self.assertEqual(start.call_count, 2)
+
+    def test_paginate_deadline(self):
+        pages = [_response(document={'class': ['page'], 'links': [{'rel': ['next'], 'href': 'http://api.io/2'}]}),
+                 _response(document={'class': ['page']})]
+        self.session.send.side_effect = pages
+        with mock.patch('pypermedia.siren.start_deadline', wraps=start_deadline) as start:
+            list(HypermediaClient.paginate('http://api.io/1', session=self.session, deadline=30))
+        self.assertEqual(self.session.send.call_count, 2)
+        self.assertEqual(start.call_count, 0)  # started once by paginate, shared by the requests of both pages
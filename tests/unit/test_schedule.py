@@ -0,0 +1,187 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.client import HypermediaClient
+from pypermedia.metrics import Metrics, QUEUE
+from pypermedia.policy import Deadline, DeadlineExceeded
+from pypermedia.schedule import RequestScheduler
+from pypermedia.siren import SirenLink
+
+from concurrent.futures import ThreadPoolExecutor
+from requests import Request, Response
+
+import io
+import json
+import mock
+import threading
+import time
+import unittest2
+
+ROOT = {'class': ['root'], 'links': [{'rel': ['self'], 'href': 'http://api.io/'},
+                                     {'rel': ['orders'], 'href': 'http://api.io/orders'},
+                                     {'rel': ['export'], 'href': 'http://api.io/export'}]}
+
+
+def _request(url='http://api.io/orders'):
+    return Request('GET', url).prepare()
+
+
+def _response(document):
+    resp = Response()
+    resp.status_code = 200
+    resp.headers['Content-Type'] = 'application/vnd.siren+json'
+    resp._content = json.dumps(document).encode('utf-8')
+    resp._content_consumed = True
+    return resp
+
+
+def _streamed(document):
+    resp = Response()
+    resp.status_code = 200
+    resp.raw = io.BytesIO(json.dumps(document).encode('utf-8'))
+    return resp
+
+
+class TestRequestScheduler(unittest2.TestCase):
+    def test_max_in_flight(self):
+        scheduler = RequestScheduler(max_in_flight=2)
+        scheduler.acquire(_request())
+        scheduler.acquire(_request())
+        self.assertEqual(scheduler.in_flight('http://api.io/'), 2)
+
+        # other hosts are limited separately
+        scheduler.acquire(_request('http://other.io/'))
+        self.assertEqual(scheduler.in_flight(), 3)
+
+        admitted = threading.Event()
+        waiter = threading.Thread(target=lambda: (scheduler.acquire(_request()), admitted.set()))
+        waiter.start()
+        self.assertFalse(admitted.wait(0.05))
+        scheduler.release(_request())
+        self.assertTrue(admitted.wait(5))
+        waiter.join()
+        self.assertEqual(scheduler.stats['requests'], 4)
+        self.assertEqual(scheduler.stats['queued'], 1)
+
+    def test_rate(self):
+        scheduler = RequestScheduler(rate=50, burst=2)
+        start = time.time()
+        for _ in range(4):
+            with scheduler.slot(_request()):
+                pass
+        # the first two use the burst, the next two wait 20ms each
+        self.assertGreaterEqual(time.time() - start, 0.035)
+        self.assertEqual(scheduler.stats['queued'], 2)
+
+    def test_first_in_first_out(self):
+        scheduler = RequestScheduler(max_in_flight=1)
+        scheduler.acquire(_request())
+        order = []
+
+        def acquire(i):
+            scheduler.acquire(_request())
+            order.append(i)
+            scheduler.release(_request())
+        threads = []
+        for i in range(5):
+            threads.append(threading.Thread(target=acquire, args=(i,)))
+            threads[-1].start()
+            while len(scheduler._hosts['http://api.io'].waiting) < i + 1:
+                time.sleep(0.001)
+        scheduler.release(_request())
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, list(range(5)))
+
+    def test_deadline(self):
+        scheduler = RequestScheduler(max_in_flight=1)
+        scheduler.acquire(_request())
+        self.assertRaises(DeadlineExceeded, scheduler.acquire, _request(), deadline=Deadline(0.02))
+        self.assertEqual(len(scheduler._hosts['http://api.io'].waiting), 0)
+
+    def test_idle_hosts_evicted(self):
+        scheduler = RequestScheduler(max_in_flight=2)
+        for i in range(1000):
+            with scheduler.slot(_request('http://host{0}.io/'.format(i))):
+                pass
+        self.assertEqual(len(scheduler._hosts), 0)
+
+        # hosts are kept while their bucket refills, and forgotten once it is full
+        now = [0.0]
+        scheduler = RequestScheduler(rate=1, clock=lambda: now[0])
+        for i in range(1000):
+            now[0] += 0.1
+            with scheduler.slot(_request('http://host{0}.io/'.format(i))):
+                pass
+            self.assertLessEqual(len(scheduler._hosts), 64)
+
+    def test_streamed_response(self):
+        scheduler = RequestScheduler(max_in_flight=1)
+        response = Response()
+        response._content_consumed = True
+        with scheduler.slot(_request()) as admission:
+            admission.release_on_close(response)
+        self.assertEqual(scheduler.in_flight(), 1)
+        response.close()
+        response.close()
+        self.assertEqual(scheduler.in_flight(), 0)
+
+        # the slot of a streamed link is held until the stream is consumed
+        session = mock.Mock()
+        session.send.side_effect = lambda request, **kwargs: _streamed(ROOT)
+        link = SirenLink('orders', 'http://api.io/orders', session=session, scheduler=scheduler)
+        stream = link.stream()
+        self.assertEqual(scheduler.in_flight(), 1)
+        self.assertEqual(stream.root.classnames, ['root'])
+        list(stream)
+        self.assertEqual(scheduler.in_flight(), 0)
+
+    def test_for_name(self):
+        export = RequestScheduler(max_in_flight=1)
+        scheduler = RequestScheduler(overrides={'export': export})
+        self.assertIs(scheduler.for_name('export'), export)
+        self.assertIs(scheduler.for_name('orders'), scheduler)
+        self.assertIs(scheduler.for_name(None), scheduler)
+
+
+class TestScheduledClient(unittest2.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.session = mock.Mock()
+        self.session.send.side_effect = self.send
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return _response(ROOT if request.url == 'http://api.io/' else {'class': ['orders']})
+
+    def test_generated_methods(self):
+        events = []
+        scheduler = RequestScheduler(max_in_flight=2, overrides={'export': RequestScheduler(max_in_flight=1)})
+        client = HypermediaClient.connect('http://api.io/', session=self.session, scheduler=scheduler,
+                                          metrics=Metrics([events.append]))
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(lambda _: client.orders(), range(6)))
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(scheduler.stats['requests'], 7)
+
+        queued = [e for e in events if e.phase == QUEUE]
+        self.assertEqual(len(queued), 7)
+        self.assertEqual(queued[0].name, None)
+        self.assertEqual(set(e.name for e in queued[1:]), {'orders'})
+        self.assertGreater(max(e.duration for e in queued), 0)
+
+        self.peak = 0
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda _: client.export(), range(3)))
+        self.assertEqual(self.peak, 1)
+        self.assertEqual(scheduler.for_name('export').stats['requests'], 3)
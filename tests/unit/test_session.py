@@ -0,0 +1,17 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.session import create_session
+
+import unittest2
+
+
+class TestCreateSession(unittest2.TestCase):
+    def test_create_session(self):
+        session = create_session(pool_connections=3, pool_maxsize=7)
+        for prefix in ('http://', 'https://'):
+            adapter = session.get_adapter(prefix + 'host.com')
+            self.assertEqual(adapter._pool_connections, 3)
+            self.assertEqual(adapter._pool_maxsize, 7)
@@ -4,14 +4,19 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from pypermedia.siren import _check_and_decode_response, SirenBuilder, UnexpectedStatusError, \
-    MalformedSirenError, SirenLink, SirenEntity, SirenAction, TemplatedString, \
-    _create_action_fn
+    MalformedSirenError, SirenLink, SirenEntity, SirenAction, SirenStream, TemplatedString, ModelClassCache, \
+    _create_action_fn, BaseSirenEntity, BaseSirenLink, CompactSirenBuilder, CompactSirenEntity, CompactSirenAction, \
+    CompactSirenLink, RequestContext, FORM_TYPE
+from pypermedia.uri_template import compile_template
 
-from requests import Response, PreparedRequest
+from requests import Response, PreparedRequest, Request
 
+import copy
 import json
 import mock
 import six
+import threading
+import time
 import types
 import unittest2
 
@@ -45,6 +50,14 @@ class TestSirenBuilder(unittest2.TestCase):
         link = builder._construct_link(dict(rel=['rel'], href='whocares'))
         self.assertIsInstance(link, SirenLink)
 
+    def test_construct_link_public(self):
+        builder = CompactSirenBuilder(verify=True)
+        link = builder.construct_link('rel', 'http://api.io/x')
+        self.assertIsInstance(link, CompactSirenLink)
+        self.assertEqual(['rel'], link.rel)
+        self.assertEqual('http://api.io/x', link.href)
+        self.assertTrue(link.verify)
+
     def test_construct_link_bad(self):
         """
         Tests constructing a link.
@@ -80,10 +93,120 @@ class TestSirenBuilder(unittest2.TestCase):
         builder = SirenBuilder()
         self.assertRaises(MalformedSirenError, builder.from_api_response, 'asdfgsjdfg')
 
+    def test_from_api_response_expand(self):
+        builder = SirenBuilder()
+        with mock.patch.object(SirenEntity, 'expand') as expand:
+            entity = builder.from_api_response({'class': ['blah']}, expand_depth=2, expand_rels=['item'])
+            self.assertIsInstance(entity, SirenEntity)
+            expand.assert_called_once_with(rels=['item'], depth=2, max_workers=8)
+
+    def test_from_api_response_lazy(self):
+        entity = {'class': ['blah'], 'properties': {'x': 1},
+                  'actions': [dict(name='act', href='/act')],
+                  'links': [dict(rel=['self'], href='/self')],
+                  'entities': [{'class': ['sub'], 'rel': ['sub'], 'links': [dict(rel=['up'], href='/up')]}]}
+        builder = SirenBuilder()
+        with mock.patch.object(builder, '_construct_action', wraps=builder._construct_action) as construct_action:
+            resp = builder.from_api_response(entity, lazy=True)
+            self.assertEqual(resp.properties, {'x': 1})
+            self.assertEqual(construct_action.call_count, 0)
+            self.assertEqual(resp.actions[0].name, 'act')
+            self.assertIs(resp.actions, resp.actions)
+            self.assertEqual(construct_action.call_count, 1)
+        self.assertEqual(resp.links[0].href, '/self')
+        sub = resp.get_entities('sub')[0]
+        self.assertIsNotNone(sub._deferred)
+        self.assertEqual(sub.links[0].href, '/up')
+        self.assertIsNone(sub._deferred)
+        self.assertIsNone(resp._deferred)
+
+    def test_from_api_response_lazy_malformed(self):
+        builder = SirenBuilder()
+        resp = builder.from_api_response({'class': ['blah'], 'links': [dict(rel=['self'])]}, lazy=True)
+        self.assertRaises(MalformedSirenError, getattr, resp, 'links')
+        self.assertRaises(MalformedSirenError, builder.from_api_response, {'properties': {}}, lazy=True)
+
+    def test_lazy_concurrent_access(self):
+        builder = SirenBuilder()
+        construct_links = builder._construct_links
+
+        def slow_construct_links(dicts):
+            time.sleep(0.05)
+            return construct_links(dicts)
+
+        for _ in range(3):
+            resp = builder.from_api_response({'class': ['blah'], 'links': [dict(rel=['self'], href='/self')]},
+                                             lazy=True)
+            results = []
+            with mock.patch.object(builder, '_construct_links', side_effect=slow_construct_links):
+                threads = [threading.Thread(target=lambda: results.append(resp.links)) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            self.assertEqual(len(results), 4)
+            self.assertTrue(all(links is resp.links for links in results))
+            self.assertEqual(len(resp.links), 1)
+            self.assertIsNone(resp._deferred)
+
+    def test_lazy_copy(self):
+        resp = SirenBuilder().from_api_response({'class': ['blah'], 'links': [dict(rel=['self'], href='/self')]},
+                                                lazy=True)
+        resp_copy = copy.copy(resp)
+        self.assertEqual(len(resp_copy.links), 1)
+        self.assertEqual(len(resp.links), 1)
+
     def test_from_api_response_bad_type(self):
         builder = SirenBuilder()
         self.assertRaises(TypeError, builder.from_api_response, [])
 
+    def _batch(self):
+        not_found = Response()
+        not_found.status_code = 404
+        error = Response()
+        error.status_code = 500
+        found = Response()
+        found.status_code = 200
+        found._content = b'{"class": ["response"]}'
+        return [json.dumps({'class': ['text'], 'properties': {'x': 1}}), b'{"class": ["bytes"]}', 'not json',
+                {'class': ['dict']}, not_found, error, found, '[]', {'properties': {}}]
+
+    def test_from_api_responses(self):
+        for processes in (0, 2):
+            results = SirenBuilder().from_api_responses(self._batch(), processes=processes, chunksize=2)
+            self.assertEqual(len(results), 9)
+            self.assertEqual(results[0].properties, {'x': 1})
+            self.assertEqual(results[1].classnames, ['bytes'])
+            self.assertIsInstance(results[2], MalformedSirenError)
+            self.assertEqual(results[3].classnames, ['dict'])
+            self.assertIsNone(results[4])
+            self.assertIsInstance(results[5], UnexpectedStatusError)
+            self.assertEqual(results[6].classnames, ['response'])
+            self.assertIsInstance(results[7], TypeError)
+            self.assertIsInstance(results[8], MalformedSirenError)
+
+    def test_from_api_responses_shares_settings(self):
+        session = mock.Mock()
+        first, second = SirenBuilder(session=session).from_api_responses(['{"class": ["a"]}', '{"class": ["a"]}'],
+                                                                          lazy=True)
+        self.assertIs(first.context, second.context)
+        self.assertIs(first.session, session)
+        self.assertIsNotNone(first._deferred)
+        self.assertIs(type(first.as_python_object()), type(second.as_python_object()))
+
+    def test_construct_entity_shares_session(self):
+        session = mock.Mock()
+        entity = {'class': ['blah'], 'actions': [dict(name='act', href='/act')],
+                  'links': [dict(rel=['self'], href='/self')],
+                  'entities': [dict(rel=['child'], href='/child'), {'class': ['sub'], 'rel': ['sub']}]}
+        builder = SirenBuilder(session=session)
+        resp = builder.from_api_response(entity)
+        self.assertIs(resp.session, session)
+        self.assertIs(resp.actions[0].session, session)
+        self.assertIs(resp.links[0].session, session)
+        for sub in resp.entities:
+            self.assertIs(sub.session, session)
+
 
 class TestSirenEntity(unittest2.TestCase):
     def test_init_no_classnames(self):
@@ -101,6 +224,107 @@ class TestSirenEntity(unittest2.TestCase):
         self.assertEqual([link], resp)
         self.assertListEqual(entity.get_links('badrel'), [])
 
+    def test_get_links_index_consistency(self):
+        link = SirenLink(['a'], '/a')
+        entity = SirenEntity(['blah'], [link])
+        self.assertEqual(entity.get_links('a'), [link])
+        link.add_rel('b')
+        self.assertEqual(entity.get_links('b'), [link])
+        link.rem_rel('a')
+        self.assertEqual(entity.get_links('a'), [])
+        other = SirenLink(['b'], '/b')
+        entity.add_link(other)
+        self.assertEqual(entity.get_links('b'), [link, other])
+        appended = SirenLink(['b'], '/c')
+        entity.links.append(appended)
+        self.assertEqual(entity.get_links('b'), [link, other, appended])
+        entity.links = [appended]
+        self.assertEqual(entity.get_links('b'), [appended])
+
+    def test_get_links_index_in_place_changes(self):
+        first, second = SirenLink(['a'], '/a'), SirenLink(['b'], '/b')
+        entity = SirenEntity(['blah'], [first, second])
+        self.assertEqual(entity.get_links('a'), [first])
+
+        # changes which keep the number of links
+        first.rel = ['z']
+        self.assertEqual(entity.get_links('z'), [first])
+        replacement = SirenLink(['q'], '/q')
+        entity.links[1] = replacement
+        self.assertEqual(entity.get_links('q'), [replacement])
+        self.assertEqual(entity.get_links('b'), [])
+        first.rel.append('w')
+        self.assertEqual(entity.get_links('w'), [first])
+
+        action = SirenAction('act', '/1')
+        entity.add_action(action)
+        self.assertIs(entity.get_action('act'), action)
+        action.name = 'renamed'
+        self.assertIs(entity.get_action('renamed'), action)
+        self.assertIsNone(entity.get_action('act'))
+
+        sub = SirenEntity(['item'], [], rel=['child'])
+        entity.add_entity(sub)
+        self.assertEqual(entity.get_entities_by_class('item'), [sub])
+        sub.classnames = ['other']
+        self.assertEqual(entity.get_entities_by_class('other'), [sub])
+
+    def test_get_links_index_is_per_entity(self):
+        entity = SirenEntity(['blah'], [SirenLink(['a'], '/a')])
+        other = SirenEntity(['blah'], [SirenLink(['a'], '/a')])
+        entity.get_links('a')
+        index = other.links.lookup('links_by_rel', 'a')
+        for i in range(3):
+            link = SirenLink(['n{0}'.format(i)], '/n')
+            entity.add_link(link)
+            self.assertEqual(entity.get_links('n{0}'.format(i)), [link])
+        # the index of the other entity is kept, appending updates the index in place
+        self.assertIs(other.links.lookup('links_by_rel', 'a'), index)
+        self.assertEqual(len(entity.get_links('a')), 1)
+
+        # changing the keys of an object drops the indexes of the lists holding it only
+        entity.links[0].rel = ['b']
+        entity.links[1].rel.append('c')
+        SirenLink(['x'], '/x').rel = ['y']
+        self.assertIs(other.links.lookup('links_by_rel', 'a'), index)
+        self.assertEqual([x.href for x in entity.get_links('b')], ['/a'])
+        self.assertEqual([x.href for x in entity.get_links('c')], ['/n'])
+
+        # an object held by several lists, or whose relationships are shared with a copy, drops each of their indexes
+        shared = SirenLink(['s'], '/s')
+        duplicate = copy.copy(shared)
+        holders = [SirenEntity(['blah'], [shared]), SirenEntity(['blah'], [shared]), SirenEntity(['blah'], [duplicate])]
+        self.assertEqual([len(x.get_links('s')) for x in holders], [1, 1, 1])
+        shared.rel.append('t')
+        self.assertEqual([len(x.get_links('t')) for x in holders], [1, 1, 1])
+        shared.rel = ['u']
+        self.assertEqual([len(x.get_links('u')) for x in holders], [1, 1, 0])
+
+    def test_get_links_returns_copy(self):
+        link = SirenLink(['a'], '/a')
+        entity = SirenEntity(['blah'], [link])
+        entity.get_links('a').append('junk')
+        self.assertEqual(entity.get_links('a'), [link])
+
+    def test_get_entities_by_class(self):
+        sub = SirenEntity(['item', 'thing'], [], rel=['child'])
+        link = SirenLink(['child'], '/child')
+        entity = SirenEntity(['blah'], [], entities=[sub, link])
+        self.assertEqual(entity.get_entities_by_class('thing'), [sub])
+        self.assertEqual(entity.get_entities_by_class('nope'), [])
+        other = SirenEntity(['item'], [])
+        entity.add_entity(other)
+        self.assertEqual(entity.get_entities_by_class('item'), [sub, other])
+
+    def test_get_action(self):
+        first = SirenAction('act', '/1')
+        entity = SirenEntity(['blah'], [], actions=[first, SirenAction('act', '/2')])
+        self.assertIs(entity.get_action('act'), first)
+        self.assertIsNone(entity.get_action('nope'))
+        other = SirenAction('other', '/3')
+        entity.add_action(other)
+        self.assertIs(entity.get_action('other'), other)
+
     def test_get_entity_no_entities(self):
         entity = SirenEntity(['blah'], None)
         self.assertEqual(entity.get_entities('sakdf'), [])
@@ -112,6 +336,119 @@ class TestSirenEntity(unittest2.TestCase):
         self.assertEqual([ent], resp)
         self.assertEqual(entity.get_entities('badrel'), [])
 
+    def _expandable(self, session, lazy=False):
+        entity = {'class': ['page'],
+                  'entities': [{'rel': ['item'], 'href': 'http://api.io/1'},
+                               {'rel': ['item', 'first'], 'href': 'http://api.io/1'},
+                               {'rel': ['owner'], 'href': 'http://api.io/owner'},
+                               {'class': ['embedded'], 'rel': ['embedded'],
+                                'entities': [{'rel': ['item'], 'href': 'http://api.io/2'}]}]}
+        bodies = {
+            'http://api.io/1': {'class': ['item'], 'entities': [{'rel': ['part'], 'href': 'http://api.io/2'}]},
+            'http://api.io/2': {'class': ['part']},
+            'http://api.io/owner': {'class': ['owner']},
+        }
+
+        def send(request, verify=False):
+            resp = Response()
+            resp.status_code = 200
+            resp._content = six.binary_type(json.dumps(bodies[request.url]).encode('utf8'))
+            return resp
+        session.send.side_effect = send
+        return SirenBuilder(session=session).from_api_response(entity, lazy=lazy)
+
+    def test_expand(self):
+        session = mock.Mock()
+        entity = self._expandable(session)
+        self.assertIs(entity.expand(), entity)
+        items = entity.get_entities('item')
+        self.assertEqual([x.classnames for x in items], [['item'], ['item']])
+        self.assertIsNot(items[0], items[1])
+        self.assertEqual(items[1].rel, ['item', 'first'])
+        self.assertEqual(entity.get_entities('owner')[0].classnames, ['owner'])
+        # depth of one leaves the links of the linked and embedded entities alone
+        self.assertIsInstance(entity.get_entities('embedded')[0].entities[0], SirenLink)
+        self.assertIsInstance(items[0].entities[0], SirenLink)
+        self.assertEqual(session.send.call_count, 2)
+
+    def test_expand_depth_and_rels(self):
+        session = mock.Mock()
+        entity = self._expandable(session)
+        entity.expand(rels='item', depth=2)
+        self.assertIsInstance(entity.get_entities('owner')[0], SirenLink)
+        self.assertIsInstance(entity.get_entities('item')[0].entities[0], SirenLink)
+        self.assertEqual(entity.get_entities('embedded')[0].entities[0].classnames, ['part'])
+        self.assertEqual(session.send.call_count, 2)
+
+        entity.expand(depth=2)
+        self.assertEqual(entity.get_entities('owner')[0].classnames, ['owner'])
+        self.assertEqual(entity.get_entities('item')[0].entities[0].classnames, ['part'])
+
+    def test_expand_lazy(self):
+        session = mock.Mock()
+        entity = self._expandable(session, lazy=True)
+        entity.expand(depth=2)
+        first, second = entity.get_entities('item')
+        self.assertEqual(first.entities[0].classnames, ['part'])
+        self.assertEqual(second.entities[0].classnames, ['part'])
+        self.assertEqual(session.send.call_count, 3)
+
+    def test_expand_not_found(self):
+        link = SirenLink(['item'], 'http://api.io/1')
+        entity = SirenEntity(['blah'], [], entities=[link])
+        with mock.patch.object(SirenLink, 'retrieve', return_value=None):
+            entity.expand()
+        self.assertIs(entity.entities[0], link)
+
+    def _paged(self, session, pages=4):
+        def page(number):
+            body = {'class': ['page'], 'properties': {'page': number},
+                    'entities': [{'class': ['item'], 'rel': ['item'], 'properties': {'id': number * 10 + i}}
+                                 for i in range(2)]}
+            if number < pages:
+                body['links'] = [{'rel': ['next'], 'href': 'http://api.io/pages/{0}'.format(number + 1)}]
+            return body
+
+        def send(request, verify=False):
+            resp = Response()
+            resp.status_code = 200
+            resp._content = six.binary_type(json.dumps(page(int(request.url.rsplit('/', 1)[1]))).encode('utf8'))
+            return resp
+        session.send.side_effect = send
+        return SirenBuilder(session=session).from_api_response(page(1))
+
+    def test_iter_pages(self):
+        for prefetch in (0, 1, 3):
+            session = mock.Mock()
+            pages = list(self._paged(session).iter_pages(prefetch=prefetch))
+            self.assertEqual([x.properties['page'] for x in pages], [1, 2, 3, 4])
+            self.assertEqual(session.send.call_count, 3)
+
+    def test_iter_pages_max_pages(self):
+        session = mock.Mock()
+        pages = list(self._paged(session).iter_pages(prefetch=5, max_pages=2))
+        self.assertEqual([x.properties['page'] for x in pages], [1, 2])
+        self.assertEqual(session.send.call_count, 1)
+        self.assertEqual(list(self._paged(session).iter_pages(max_pages=0)), [])
+
+    def test_iter_pages_prefetches(self):
+        session = mock.Mock()
+        pages = self._paged(session).iter_pages(prefetch=2)
+        next(pages)
+        # the two following pages are retrieved while the first one is held
+        deadline = time.time() + 5
+        while session.send.call_count < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(session.send.call_count, 2)
+        pages.close()
+        self.assertEqual(session.send.call_count, 2)
+
+    def test_iter_paged_entities(self):
+        session = mock.Mock()
+        ids = [x.properties['id'] for x in self._paged(session, pages=3).iter_paged_entities(rel='item')]
+        self.assertEqual(ids, [10, 11, 20, 21, 30, 31])
+        self.assertEqual(list(self._paged(session).iter_paged_entities(rel='nope')), [])
+
     def test_get_primary_classname(self):
         entity = SirenEntity(['blah'], None)
         self.assertEqual(entity.get_primary_classname(), 'blah')
@@ -139,6 +476,29 @@ class TestSirenEntity(unittest2.TestCase):
         self.assertTrue(hasattr(siren_class, 'get_entities'))
         # TODO we definitely need some more tests for this part.
 
+    def test_as_python_object_class_cached(self):
+        session = mock.Mock()
+        first = SirenEntity(['blah'], [SirenLink(['self'], 'http://api.io/1', session=session)],
+                            properties={'x': 1, 'self': 'shadowed'}, session=session)
+        second = SirenEntity(['blah'], [SirenLink(['self'], 'http://api.io/2', session=session)],
+                             properties={'x': 2}, session=session)
+        other = SirenEntity(['blah'], [SirenLink(['other'], 'http://api.io/3')])
+        first_obj, second_obj = first.as_python_object(), second.as_python_object()
+        self.assertIs(type(first_obj), type(second_obj))
+        self.assertIsNot(type(first_obj), type(other.as_python_object()))
+        self.assertEqual((first_obj.x, second_obj.x), (1, 2))
+        self.assertTrue(callable(first_obj.self))
+
+        with mock.patch.object(SirenBuilder, 'from_api_response', return_value=None):
+            first_obj.self()
+            second_obj.self()
+        self.assertEqual([c[0][0].url for c in session.send.call_args_list], ['http://api.io/1', 'http://api.io/2'])
+
+    def test_as_python_object_get_entities(self):
+        child = SirenEntity(['child'], [], rel=['item'], properties={'x': 1})
+        obj = SirenEntity(['parent'], [], entities=[child]).as_python_object()
+        self.assertEqual([x.x for x in obj.get_entities('item')], [1])
+
     def test_create_python_method_name(self):
         original_expected = [
             ('original', 'original',),
@@ -198,6 +558,18 @@ class TestSirenAction(unittest2.TestCase):
         action = SirenAction('action', 'http://host.com/{id}/{id}', 'application/json')
         self.assertRaises(ValueError, action._get_bound_href, TemplatedString, x=1, y=2)
 
+    def test_get_bound_href_compiled(self):
+        action = SirenAction('action', 'http://host.com/{id}/{id}', 'application/json')
+        bound_href, request_fields = action._get_bound_href(x=1, id='a b')
+        self.assertEqual(bound_href, 'http://host.com/a%20b/a%20b')
+        self.assertDictEqual(dict(x=1), request_fields)
+        self.assertRaises(ValueError, action._get_bound_href, x=1)
+
+    def test_as_request_rfc6570_template(self):
+        action = SirenAction('action', 'http://blah.com/items/{id}{?sort,fields*}', 'application/json')
+        resp = action.as_request(id=3, sort='name', fields=['a', 'b'], x=1)
+        self.assertEqual(resp.path_url, '/items/3?sort=name&fields=a&fields=b&x=1')
+
     def test_as_request_get(self):
         action = SirenAction('action', 'http://blah.com', 'application/json')
         resp = action.as_request(x=1, y=2)
@@ -220,6 +592,127 @@ class TestSirenAction(unittest2.TestCase):
         self.assertEqual(resp.method, 'DELETE')
         self.assertEqual('/', resp.path_url)
 
+    def test_as_request_encodes_like_requests(self):
+        fields = [dict(name='a', value='default a'), dict(name='b', value='default b'), dict(name='c', value=None),
+                  dict(name='d', value='default d')]
+        overrides = dict(b='\u00e9t\u00e9 & co', c=[1, 2], d='')
+        expected = dict(a='default a', b='\u00e9t\u00e9 & co', c='[1, 2]')
+        for method in ('GET', 'POST', 'PUT', 'PATCH'):
+            action = SirenAction('action', 'http://blah.com/x', 'application/x-www-form-urlencoded', method=method,
+                                 fields=fields, codec='json')
+            resp = action.as_request(**overrides)
+            if method == 'GET':
+                uncompiled = Request(method, 'http://blah.com/x', params=expected).prepare()
+                self.assertEqual(resp.url, uncompiled.url)
+            else:
+                uncompiled = Request(method, 'http://blah.com/x', data=expected).prepare()
+                self.assertEqual(resp.body, uncompiled.body)
+                self.assertEqual(resp.headers['Content-Type'], 'application/x-www-form-urlencoded')
+
+        # without any field values no body is sent
+        resp = SirenAction('action', 'http://blah.com/x', 'application/x-www-form-urlencoded', method='POST').as_request()
+        self.assertIsNone(resp.body)
+        self.assertNotIn('Content-Type', resp.headers)
+
+    def test_request_builder_reused(self):
+        action = SirenAction('action', 'http://blah.com/{id}', 'application/x-www-form-urlencoded', method='POST',
+                             fields=[dict(name='a', value='1')])
+        builder = action._request_builder()
+        action.as_request(id=1)
+        action.as_request(id=2, a='2')
+        self.assertIs(action._request_builder(), builder)
+
+        # changes of the action compile a new builder
+        action.add_field('b', value='2')
+        self.assertIn('b=2', action.as_request(id=1).body)
+        self.assertIsNot(action._request_builder(), builder)
+
+        action.fields = [dict(name='c', value='3')]
+        self.assertEqual(action.as_request(id=1).body, 'c=3')
+
+        # fields modified in place
+        action.fields[0]['value'] = 'x'
+        self.assertEqual(action.as_request(id=1).body, 'c=x')
+        action.fields[0]['value'] = ['y']
+        self.assertEqual(action.as_request(id=1).body, 'c=%5B%22y%22%5D')
+        action.fields[0]['value'].append('z')
+        self.assertEqual(action.as_request(id=1).body, 'c=%5B%22y%22%2C+%22z%22%5D')
+        action.fields[0]['name'] = 'd'
+        self.assertEqual(action.as_request(id=1).body, 'd=%5B%22y%22%2C+%22z%22%5D')
+        action.fields[0] = dict(name='c', value=1)
+        self.assertEqual(action.as_request(id=1).body, 'c=1')
+        builder = action._request_builder()
+        action.as_request(id=1)
+        self.assertIs(action._request_builder(), builder)
+        action.fields[0]['value'] = True  # equal to 1 but serialized differently
+        self.assertEqual(action.as_request(id=1).body, 'c=true')
+        action.fields[0]['value'] = '3'
+
+        action.href = 'http://blah.com/other/{id}'
+        self.assertEqual(action.as_request(id=1).url, 'http://blah.com/other/1')
+
+        action.method = 'GET'
+        self.assertEqual(action.as_request(id=1).url, 'http://blah.com/other/1?c=3')
+
+        action.request_factory = mock.Mock()
+        action.as_request(id=1)
+        self.assertEqual(action.request_factory.call_count, 1)
+
+    def test_default_type_is_form(self):
+        fields = [dict(name='f', value='2')]
+        direct = SirenAction('action', 'http://blah.com/x', method='POST', fields=fields)
+        built = SirenBuilder()._construct_action(dict(name='action', href='http://blah.com/x', method='POST',
+                                                      fields=fields))
+        for action in (direct, built):
+            self.assertEqual(action.type, FORM_TYPE)
+            resp = action.as_request()
+            self.assertEqual(resp.body, 'f=2')
+            self.assertEqual(resp.headers['Content-Type'], FORM_TYPE)
+
+    def test_as_request_json(self):
+        fields = [dict(name='a', value='default a'), dict(name='b', value=None), dict(name='c', value='default c')]
+        for media_type in ('application/json', 'application/vnd.api+json; charset=utf-8'):
+            action = SirenAction('action', 'http://blah.com/x', media_type, method='PATCH', fields=fields)
+            resp = action.as_request(b=[1, {'x': 0}], c=None, d=False, e='\u00e9')
+            self.assertEqual(json.loads(resp.body.decode('utf-8')),
+                             {'a': 'default a', 'b': [1, {'x': 0}], 'd': False, 'e': '\u00e9'})
+            self.assertEqual(resp.headers['Content-Type'], media_type)
+            self.assertEqual(resp.headers['Content-Length'], str(len(resp.body)))
+
+        # the fields are serialized once, as a whole
+        with mock.patch.object(action.codec, 'dumps', return_value='{}') as dumps:
+            action.as_request(b=[1])
+        dumps.assert_called_once_with({'a': 'default a', 'c': 'default c', 'b': [1]})
+
+    def test_as_request_multipart(self):
+        action = SirenAction('action', 'http://blah.com/x', 'multipart/form-data', method='POST',
+                             fields=[dict(name='title', value='default'), dict(name='tags'), dict(name='upload')])
+        upload = six.BytesIO(b'x' * 200000)
+        resp = action.as_request(tags=['a'], upload=('report.csv', upload), extra=b'\x00')
+        self.assertTrue(resp.headers['Content-Type'].startswith('multipart/form-data; boundary='))
+        body = b''.join(resp.body)
+        self.assertEqual(resp.headers['Content-Length'], str(len(body)))
+        self.assertIn(b'name="title"\r\n\r\ndefault\r\n', body)
+        self.assertIn(b'name="tags"\r\n\r\n["a"]\r\n', body)
+        self.assertIn(b'name="extra"\r\n\r\n\x00\r\n', body)
+        self.assertIn(b'name="upload"; filename="report.csv"\r\nContent-Type: text/csv\r\n\r\n' + b'x' * 200000, body)
+
+        # the body is streamed, and may be sent again
+        self.assertNotIsInstance(resp.body, six.binary_type)
+        self.assertEqual(b''.join(resp.body), body)
+
+    def test_as_request_type(self):
+        # the body encoding of actions which do not declare a type is the siren default
+        entity = SirenBuilder().from_api_response({'class': ['a'], 'actions': [
+            {'name': 'update', 'href': 'http://blah.com', 'method': 'POST', 'fields': [{'name': 'a'}]}]})
+        action = entity.actions[0]
+        self.assertEqual(action.type, 'application/x-www-form-urlencoded')
+        self.assertEqual(action.as_request(a='1').body, 'a=1')
+
+        # the builder is compiled again when the type changes
+        action.type = 'application/json'
+        self.assertEqual(json.loads(action.as_request(a='1').body.decode('utf-8')), {'a': '1'})
+
     def test_make_request(self):
         action = SirenAction('action', 'http://blah.com', 'application/json')
         mck = mock.Mock(send=mock.Mock(return_value=True))
@@ -228,6 +721,81 @@ class TestSirenAction(unittest2.TestCase):
         self.assertEqual(mck.send.call_count, 1)
         self.assertIsInstance(mck.send.call_args[0][0], PreparedRequest)
 
+    def test_make_request_assigned_session(self):
+        session = mock.Mock()
+        action = SirenAction('action', 'http://blah.com', 'application/json', session=session)
+        action.make_request(x=1)
+        self.assertEqual(session.send.call_count, 1)
+
+    def _siren_response(self, request, **kwargs):
+        if 'id=0' in request.url:
+            raise ValueError('boom')
+        resp = Response()
+        resp.status_code = 404 if 'id=1' in request.url else 200
+        resp.headers['Content-Type'] = 'application/vnd.siren+json'
+        resp._content = json.dumps({'class': [request.url]}).encode('utf-8')
+        resp._content_consumed = True
+        return resp
+
+    def test_make_requests(self):
+        session = mock.Mock()
+        session.send.side_effect = self._siren_response
+        action = SirenAction('action', 'http://blah.com/{?id}', 'application/json', session=session,
+                             fields=[dict(name='x', type=None, value='1')])
+        results = list(action.make_requests((dict(id=i) for i in range(6)), concurrency=2))
+        self.assertEqual(len(results), 6)
+        # errors and missing entities are returned in place, results keep the order of the fields
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsNone(results[1])
+        self.assertEqual([r.classnames[0] for r in results[2:]],
+                         ['http://blah.com/?id={0}&x=1'.format(i) for i in range(2, 6)])
+        self.assertEqual(session.send.call_count, 6)
+
+    def test_make_requests_concurrency(self):
+        lock = threading.Lock()
+        counts = dict(active=0, peak=0)
+
+        def send(request, **kwargs):
+            with lock:
+                counts['active'] += 1
+                counts['peak'] = max(counts['peak'], counts['active'])
+            time.sleep(0.01)
+            with lock:
+                counts['active'] -= 1
+            return self._siren_response(request)
+        session = mock.Mock()
+        session.send.side_effect = send
+        action = SirenAction('action', 'http://blah.com/{?id}', 'application/json')
+        results = list(action.make_requests([dict(id=i) for i in range(2, 10)], concurrency=3, _session=session))
+        self.assertEqual(len(results), 8)
+        self.assertEqual(counts['peak'], 3)
+
+    def test_make_requests_compiles_once(self):
+        session = mock.Mock()
+        session.send.side_effect = self._siren_response
+        action = SirenAction('action', 'http://blah.com/{?id}', 'application/json', session=session)
+        with mock.patch('pypermedia.siren.compile_template', wraps=compile_template) as compile_mock:
+            list(action.make_requests([dict(id=i) for i in range(2, 6)]))
+        self.assertEqual(compile_mock.call_count, 1)
+
+    def test_make_requests_pooled_session(self):
+        action = SirenAction('action', 'http://blah.com/{?id}', 'application/json')
+        session = mock.Mock()
+        session.send.side_effect = self._siren_response
+        with mock.patch('pypermedia.siren.create_session', return_value=session) as create:
+            results = list(action.make_requests([dict(id=2)], concurrency=4))
+        create.assert_called_once_with(pool_maxsize=4)
+        self.assertEqual(results[0].classnames, ['http://blah.com/?id=2'])
+
+    def test_make_requests_close(self):
+        session = mock.Mock()
+        session.send.side_effect = self._siren_response
+        action = SirenAction('action', 'http://blah.com/{?id}', 'application/json', session=session)
+        requests = action.make_requests((dict(id=i) for i in range(2, 1000)), concurrency=1)
+        next(requests)
+        requests.close()
+        self.assertLess(session.send.call_count, 10)
+
 
 class TestSirenLink(unittest2.TestCase):
     def test_init_errors(self):
@@ -275,6 +843,13 @@ class TestSirenLink(unittest2.TestCase):
         resp = link.make_request(_session=session)
         self.assertEqual(session.send.call_count, 1)
 
+    def test_retrieve(self):
+        link = SirenLink('blah', 'blah')
+        with mock.patch.object(link, 'make_request') as make_request:
+            with mock.patch.object(link, 'from_api_response') as from_api_response:
+                self.assertIs(link.retrieve(), from_api_response.return_value)
+                from_api_response.assert_called_once_with(make_request.return_value)
+
     def test_as_python_object(self):
         """
         Mostly just an explosion test.
@@ -287,6 +862,191 @@ class TestSirenLink(unittest2.TestCase):
                 self.assertEqual(from_api_respons.call_count, 1)
 
 
+    def test_stream(self):
+        session = mock.MagicMock()
+        session.send.return_value = _streamed_response({'class': ['collection'], 'entities': []})
+        link = SirenLink('blah', 'http://notreal.com', session=session)
+        stream = link.stream(chunk_size=4)
+        self.assertIsInstance(stream, SirenStream)
+        self.assertEqual(stream.root.classnames, ['collection'])
+        self.assertTrue(session.send.call_args[1]['stream'])
+
+
+def _streamed_response(body, status_code=200):
+    resp = Response()
+    resp.status_code = status_code
+    resp.raw = six.BytesIO(json.dumps(body).encode('utf8'))
+    return resp
+
+
+class TestSirenStream(unittest2.TestCase):
+    collection = {
+        'class': ['collection'],
+        'properties': {'count': 3},
+        'links': [{'rel': ['self'], 'href': 'http://api.io/items'}],
+        'entities': [{'class': ['item'], 'rel': ['item'], 'properties': {'id': 1}},
+                     {'rel': ['item'], 'href': 'http://api.io/items/2'},
+                     {'class': ['item'], 'rel': ['item'], 'properties': {'id': 3}}],
+        'actions': [{'name': 'add', 'href': 'http://api.io/items', 'method': 'POST'}],
+    }
+
+    def test_stream_api_response(self):
+        stream = SirenBuilder().stream_api_response(_streamed_response(self.collection), chunk_size=7)
+        root = stream.root
+        self.assertEqual(root.properties, {'count': 3})
+        self.assertEqual(root.get_links('self')[0].href, 'http://api.io/items')
+        self.assertEqual(root.entities, [])
+        self.assertEqual(root.actions, [])
+
+        items = list(stream)
+        self.assertIsInstance(items[0], SirenEntity)
+        self.assertIsInstance(items[1], SirenLink)
+        self.assertEqual([x.properties['id'] for x in (items[0], items[2])], [1, 3])
+        # members following the sub-entities are available once iteration completes
+        self.assertEqual(stream.root.get_action('add').method, 'POST')
+        self.assertEqual(list(stream), [])
+
+    def test_yields_before_body_is_read(self):
+        chunks = iter([b'{"class": ["c"], "entities": [{"class": ["a"]},', b' {"class": ["b"]}', b']}'])
+        stream = SirenStream(SirenBuilder(), chunks)
+        self.assertEqual(next(iter(stream)).classnames, ['a'])
+        self.assertEqual(next(chunks), b' {"class": ["b"]}')
+
+    def test_close(self):
+        close = mock.Mock()
+        with SirenStream(SirenBuilder(), [b'{"class": ["c"], "entities": [{"class": ["a"]}]}'], close=close) as s:
+            self.assertEqual(len(list(s)), 1)
+        close.assert_called_once_with()
+
+    def test_status(self):
+        self.assertIsNone(SirenBuilder().stream_api_response(_streamed_response({}, status_code=404)))
+        self.assertRaises(UnexpectedStatusError, SirenBuilder().stream_api_response,
+                          _streamed_response({}, status_code=500))
+
+    def test_malformed(self):
+        close = mock.Mock()
+        stream = SirenStream(SirenBuilder(), [b'{"class": ["c"], "entities": [{"class": '], close=close)
+        self.assertRaises(MalformedSirenError, list, stream)
+        close.assert_called_once_with()
+        stream = SirenStream(SirenBuilder(), [b'{"entities": [{"properties": {}}]}'])
+        self.assertRaises(MalformedSirenError, list, stream)
+        self.assertRaises(MalformedSirenError, getattr, SirenStream(SirenBuilder(), [b'{"entities": []}']), 'root')
+
+
+class TestCompactSiren(unittest2.TestCase):
+    collection = {
+        'class': ['collection'],
+        'links': [{'rel': ['self'], 'href': 'http://api.io/items'}],
+        'actions': [{'name': 'add', 'href': 'http://api.io/items', 'method': 'POST'}],
+        'entities': [{'class': ['item'], 'rel': ['item'], 'properties': {'id': 1}},
+                     {'rel': ['item'], 'href': 'http://api.io/items/2'}],
+    }
+
+    def _build(self, session=None):
+        return CompactSirenBuilder(session=session).from_api_response(json.dumps(self.collection))
+
+    def test_compact_objects(self):
+        entity = self._build()
+        self.assertIsInstance(entity, CompactSirenEntity)
+        self.assertIsInstance(entity.actions[0], CompactSirenAction)
+        self.assertIsInstance(entity.links[0], CompactSirenLink)
+        item, link = entity.entities
+        self.assertIsInstance(item, BaseSirenEntity)
+        self.assertIsInstance(link, BaseSirenLink)
+        for obj in (entity, entity.actions[0], entity.links[0], item, link):
+            self.assertFalse(hasattr(obj, '__dict__'))
+            self.assertIs(obj.context, entity.context)
+        self.assertRaises(AttributeError, setattr, entity, 'anything', 1)
+
+    def test_interned(self):
+        first, second = self._build(), self._build()
+        self.assertIs(first.entities[0].rel[0], second.entities[1].rel[0])
+        self.assertIs(first.classnames[0], second.classnames[0])
+
+    def test_behaves_like_standard(self):
+        session = mock.Mock()
+        session.send.return_value = Response()
+        session.send.return_value.status_code = 200
+        session.send.return_value._content = json.dumps({'class': ['item'], 'properties': {'id': 2}}).encode('utf8')
+        entity = self._build(session=session)
+        self.assertEqual(entity.get_entities('item')[0].properties['id'], 1)
+        entity.expand()
+        self.assertIsInstance(entity.entities[1], CompactSirenEntity)
+        self.assertEqual(entity.entities[1].properties['id'], 2)
+        self.assertEqual(entity.as_siren()['class'], ['collection'])
+        self.assertIsInstance(entity.as_python_object().self()._siren_entity, CompactSirenEntity)
+        duplicate = copy.copy(entity)
+        self.assertEqual(duplicate.classnames, entity.classnames)
+        self.assertIs(duplicate.entities, entity.entities)
+
+        # deep copies share the context, compact and lazily constructed ones as well
+        for original in (entity, SirenBuilder().from_api_response(TestCompactSiren.collection, lazy=True)):
+            duplicate = copy.deepcopy(original)
+            self.assertIs(type(duplicate), type(original))
+            self.assertIs(duplicate.context, original.context)
+            self.assertIsNot(duplicate.entities, original.entities)
+            self.assertEqual(duplicate.as_siren(), original.as_siren())
+            self.assertIsNot(duplicate.entities[0], original.entities[0])
+
+
+class TestRequestContext(unittest2.TestCase):
+    def test_shared_by_constructed_objects(self):
+        session = mock.Mock()
+        entity = SirenBuilder(session=session, verify=True).from_api_response(TestCompactSiren.collection)
+        self.assertIs(entity.entities[1].context, entity.context)
+        self.assertIs(entity.actions[0].session, session)
+        self.assertTrue(entity.links[0].verify)
+
+    def test_setting_copies_context(self):
+        entity = SirenBuilder().from_api_response(TestCompactSiren.collection)
+        link = entity.links[0]
+        link.verify = True
+        self.assertTrue(link.verify)
+        self.assertFalse(entity.verify)
+        self.assertIsNot(link.context, entity.context)
+
+    def test_replace(self):
+        context = RequestContext(verify=True)
+        replaced = context.replace(verify=False, cache='cache')
+        self.assertTrue(context.verify)
+        self.assertIsNone(context.cache)
+        self.assertFalse(replaced.verify)
+        self.assertEqual(replaced.cache, 'cache')
+        self.assertIs(replaced.request_factory, context.request_factory)
+
+
+class TestModelClassCache(unittest2.TestCase):
+    def test_get_or_create(self):
+        cache = ModelClassCache(max_size=2)
+        factory = mock.Mock(side_effect=lambda: type(str('blah'), (), {}))
+        a = cache.get_or_create('a', factory)
+        self.assertIs(cache.get_or_create('a', factory), a)
+        cache.get_or_create('b', factory)
+        cache.get_or_create('a', factory)
+        cache.get_or_create('c', factory)  # evicts b, the least recently used
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get_or_create('a', factory), a)
+        self.assertEqual(factory.call_count, 3)
+        self.assertDictEqual(cache.stats, dict(hits=3, misses=3))
+        cache.get_or_create('b', factory)
+        self.assertEqual(factory.call_count, 4)
+
+    def test_disabled(self):
+        cache = ModelClassCache(max_size=0)
+        factory = mock.Mock()
+        cache.get_or_create('a', factory)
+        cache.get_or_create('a', factory)
+        self.assertEqual(factory.call_count, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = ModelClassCache()
+        cache.get_or_create('a', mock.Mock())
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertDictEqual(cache.stats, dict(hits=0, misses=0))
+
+
 class TestTemplatedString(unittest2.TestCase):
     def test_init(self):
         base = '/blah/'
@@ -347,7 +1107,7 @@ class TestTemplatedString(unittest2.TestCase):
 class TestMiscellaneousSiren(unittest2.TestCase):
     def test_create_action_function(self):
         action = mock.MagicMock()
-        siren = mock.MagicMock()
+        siren = mock.MagicMock(cache=None)
         func = _create_action_fn(action, siren)
         self.assertIsInstance(func, types.FunctionType)
         slf = mock.MagicMock()
@@ -355,9 +1115,16 @@ class TestMiscellaneousSiren(unittest2.TestCase):
         self.assertEqual(siren.from_api_response.return_value.as_python_object.return_value, resp)
         self.assertEqual(action.make_request.return_value, siren.from_api_response.call_args[1]['response'])
 
+    def test_create_action_function_passes_session(self):
+        action = mock.MagicMock()
+        siren = mock.MagicMock(cache=None)
+        func = _create_action_fn(action, siren)
+        func(mock.MagicMock(), blah='ha')
+        action.make_request.assert_called_once_with(_session=siren.session, blah='ha')
+
     def test_create_action_function_none_response(self):
         action = mock.MagicMock()
-        siren = mock.MagicMock()
+        siren = mock.MagicMock(cache=None)
         siren.from_api_response.return_value = None
         func = _create_action_fn(action, siren)
         slf = mock.MagicMock()
@@ -0,0 +1,70 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from pypermedia.streaming import iter_root_members, ARRAY_START, ARRAY_ITEM, MEMBER
+
+import json
+import unittest2
+
+DOCUMENT = {
+    'class': ['collection'],
+    'total': -12.5e+3,
+    'size': 10,
+    'partial': True,
+    'next': None,
+    'properties': {'count': 3, 'ratio': 0.25, 'title': 'café "quoted" \\ {braces} [brackets]', 'flag': None},
+    'entities': [{'class': ['item'], 'properties': {'id': 1, 'nested': {'a': [1, {'b': '}'}]}}},
+                 {'rel': ['item'], 'href': 'http://api.io/items/2'},
+                 {'class': ['item'], 'properties': {'id': 12345678}}],
+    'links': [{'rel': ['self'], 'href': 'http://api.io/items'}],
+}
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterRootMembers(unittest2.TestCase):
+    def assertParses(self, text, chunk_size):
+        events = list(iter_root_members(_chunks(text.encode('utf8'), chunk_size), 'entities'))
+        members = dict((key, value) for kind, key, value in events if kind == MEMBER)
+        items = [value for kind, _, value in events if kind == ARRAY_ITEM]
+        expected = json.loads(text)
+        self.assertEqual(items, expected.pop('entities'))
+        self.assertDictEqual(members, expected)
+        self.assertEqual([kind for kind, _, _ in events].count(ARRAY_START), 1)
+
+    def test_every_chunk_size(self):
+        for text in (json.dumps(DOCUMENT), json.dumps(DOCUMENT, indent=2, ensure_ascii=False)):
+            for chunk_size in range(1, 40):
+                self.assertParses(text, chunk_size)
+
+    def test_events_in_document_order(self):
+        text = '{"class": ["a"], "entities": [{"x": 1}, {"x": 2}], "links": []}'
+        events = list(iter_root_members([text.encode('utf8')], 'entities'))
+        self.assertEqual(events, [(MEMBER, 'class', ['a']), (ARRAY_START, 'entities', None),
+                                  (ARRAY_ITEM, 'entities', {'x': 1}), (ARRAY_ITEM, 'entities', {'x': 2}),
+                                  (MEMBER, 'links', [])])
+
+    def test_empty(self):
+        self.assertEqual(list(iter_root_members([b'{ }'], 'entities')), [])
+        self.assertEqual(list(iter_root_members([b'{"entities": []}'], 'entities')),
+                         [(ARRAY_START, 'entities', None)])
+
+    def test_number_split_across_chunks(self):
+        self.assertEqual(list(iter_root_members([b'{"a": 12', b'34}'], 'entities')), [(MEMBER, 'a', 1234)])
+        self.assertEqual(list(iter_root_members([b'{"a": 1.', b'5, "entities": []}'], 'entities')),
+                         [(MEMBER, 'a', 1.5), (ARRAY_START, 'entities', None)])
+        self.assertEqual(list(iter_root_members([b'{"a": 2e', b'3}'], 'entities')), [(MEMBER, 'a', 2e3)])
+        self.assertEqual(list(iter_root_members([b'{"a": -', b'1}'], 'entities')), [(MEMBER, 'a', -1)])
+
+    def test_one_byte_chunks(self):
+        text = '{"a": -1.5E-2, "b": 0, "c": [1.25], "entities": [3, 4.5e1, true, "x"], "d": false, "e": null}'
+        self.assertParses(text, 1)
+        self.assertParses(json.dumps(DOCUMENT, separators=(',', ':')), 1)
+
+    def test_invalid(self):
+        for text in (b'', b'[]', b'{"a": 1', b'{"entities": [{"a": 1}', b'{"a": 1}}', b'{"a" 1}', b'{"a": tru}'):
+            self.assertRaises(ValueError, list, iter_root_members(_chunks(text, 3), 'entities'))
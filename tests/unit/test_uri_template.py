@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from pypermedia.uri_template import UriTemplate, compile_template
+
+import mock
+import unittest2
+
+# example variables from RFC 6570 section 3.2
+VALUES = {
+    'count': ['one', 'two', 'three'],
+    'dom': ['example', 'com'],
+    'dub': 'me/too',
+    'hello': 'Hello World!',
+    'half': '50%',
+    'var': 'value',
+    'who': 'fred',
+    'base': 'http://example.com/home/',
+    'path': '/foo/bar',
+    'list': ['red', 'green', 'blue'],
+    'keys': OrderedDict([('semi', ';'), ('dot', '.'), ('comma', ',')]),
+    'v': '6',
+    'x': '1024',
+    'y': '768',
+    'empty': '',
+    'empty_keys': {},
+    'undef': None,
+}
+
+
+class TestUriTemplate(unittest2.TestCase):
+    def assertExpansions(self, expansions):
+        for template, expected in expansions:
+            self.assertEqual(UriTemplate(template).expand(VALUES), expected, template)
+
+    def test_level1(self):
+        self.assertExpansions([
+            ('{var}', 'value'),
+            ('{hello}', 'Hello%20World%21'),
+            ('http://host.com/{v}/{v}', 'http://host.com/6/6'),
+        ])
+
+    def test_level2(self):
+        self.assertExpansions([
+            ('{+var}', 'value'),
+            ('{+hello}', 'Hello%20World!'),
+            ('{+path}/here', '/foo/bar/here'),
+            ('here?ref={+path}', 'here?ref=/foo/bar'),
+            ('X{#var}', 'X#value'),
+            ('X{#hello}', 'X#Hello%20World!'),
+        ])
+
+    def test_level3(self):
+        self.assertExpansions([
+            ('map?{x,y}', 'map?1024,768'),
+            ('{x,hello,y}', '1024,Hello%20World%21,768'),
+            ('{+x,hello,y}', '1024,Hello%20World!,768'),
+            ('{+path,x}/here', '/foo/bar,1024/here'),
+            ('{#x,hello,y}', '#1024,Hello%20World!,768'),
+            ('X{.var}', 'X.value'),
+            ('X{.x,y}', 'X.1024.768'),
+            ('{/var}', '/value'),
+            ('{/var,x}/here', '/value/1024/here'),
+            ('{;x,y}', ';x=1024;y=768'),
+            ('{;x,y,empty}', ';x=1024;y=768;empty'),
+            ('{?x,y}', '?x=1024&y=768'),
+            ('{?x,y,empty}', '?x=1024&y=768&empty='),
+            ('?fixed=yes{&x}', '?fixed=yes&x=1024'),
+            ('{&x,y,empty}', '&x=1024&y=768&empty='),
+        ])
+
+    def test_level4(self):
+        self.assertExpansions([
+            ('{var:3}', 'val'),
+            ('{var:30}', 'value'),
+            ('{list}', 'red,green,blue'),
+            ('{list*}', 'red,green,blue'),
+            ('{keys}', 'semi,%3B,dot,.,comma,%2C'),
+            ('{keys*}', 'semi=%3B,dot=.,comma=%2C'),
+            ('{+path:6}/here', '/foo/b/here'),
+            ('{+list}', 'red,green,blue'),
+            ('{+keys*}', 'semi=;,dot=.,comma=,'),
+            ('{#keys}', '#semi,;,dot,.,comma,,'),
+            ('X{.list*}', 'X.red.green.blue'),
+            ('{/list*,path:4}', '/red/green/blue/%2Ffoo'),
+            ('{;list}', ';list=red,green,blue'),
+            ('{;list*}', ';list=red;list=green;list=blue'),
+            ('{;keys*}', ';semi=%3B;dot=.;comma=%2C'),
+            ('{?var:3}', '?var=val'),
+            ('{?list*}', '?list=red&list=green&list=blue'),
+            ('{?keys*}', '?semi=%3B&dot=.&comma=%2C'),
+            ('{&keys}', '&keys=semi,%3B,dot,.,comma,%2C'),
+        ])
+
+    def test_undefined_omitted(self):
+        self.assertExpansions([
+            ('{?undef}', ''),
+            ('{?x,undef,empty_keys}', '?x=1024'),
+            ('{/undef}', ''),
+        ])
+
+    def test_required_variables(self):
+        template = UriTemplate('/items/{id}{?page}')
+        self.assertEqual(template.variables, frozenset(['id', 'page']))
+        self.assertEqual(template.required_variables, frozenset(['id']))
+        self.assertRaises(ValueError, template.expand, {'page': 2})
+        self.assertEqual(template.expand({'id': 3}), '/items/3')
+        self.assertEqual(template.expand({'id': 3, 'page': 2, 'other': 1}), '/items/3?page=2')
+
+    def test_invalid(self):
+        for template in ('/{id', '/{}', '/{a}{'):
+            self.assertRaises(ValueError, UriTemplate, template)
+
+    def test_behavior_changes(self):
+        # expressions which are not valid per the RFC, such as hyphenated names, are replaced as is
+        template = UriTemplate('/items/{item-id}{?q}')
+        self.assertEqual(template.expand({'item-id': 'a b', 'q': 'x'}), '/items/a b?q=x')
+        self.assertEqual(template.required_variables, frozenset(['item-id']))
+        self.assertRaises(ValueError, template.expand, {'q': 'x'})
+        self.assertEqual(UriTemplate('/{a b}/{a:x}').expand({'a b': 1, 'a:x': 2}), '/1/2')
+        self.assertEqual(UriTemplate('/items/{item_id}').expand({'item_id': 3}), '/items/3')
+        self.assertRaises(ValueError, UriTemplate, '/items/{}')
+
+        # simple expansion encodes reserved characters such as slashes, reserved expansion keeps them
+        self.assertEqual(UriTemplate('/files/{path}').expand({'path': 'a/b c'}), '/files/a%2Fb%20c')
+        self.assertEqual(UriTemplate('/files/{+path}').expand({'path': 'a/b c'}), '/files/a/b%20c')
+
+    def test_compile_template_cached(self):
+        self.assertIs(compile_template('/a/{b}'), compile_template('/a/{b}'))
+
+    def test_compile_template_least_recently_used(self):
+        with mock.patch('pypermedia.uri_template.MAX_CACHED_TEMPLATES', 2), \
+                mock.patch('pypermedia.uri_template._compiled_templates', OrderedDict()) as cache:
+            first = compile_template('/a/{b}')
+            compile_template('/c/{d}')
+            self.assertIs(compile_template('/a/{b}'), first)  # now the most recently used
+            compile_template('/e/{f}')
+            self.assertEqual(list(cache), ['/a/{b}', '/e/{f}'])
+            self.assertIs(compile_template('/a/{b}'), first)